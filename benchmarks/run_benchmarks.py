@@ -0,0 +1,232 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # Mjerenja rade bez prozora
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+from src.ai_game import main_ai
+from src.ai_game.ai_brain import Brain
+from src.ai_game.game_simulation import run_simulation_for_brain
+from src.ai_game.headless_simulation import SCREEN_WIDTH, SCREEN_HEIGHT, PLAYER_SCREEN_X, simulate_brain
+from src.core import level
+from src.core.platforms import PlatformManager
+from src.core.player import Player
+
+# Mjerenje brzine simulacije i treniranja. Pokreće se iz korijena projekta:
+#     python -m benchmarks.run_benchmarks --output rezultati.json
+# Svi nasumični podaci (mozgovi, sintetički leveli) nastaju iz fiksnog seeda, pa su rezultati
+# dva commita usporedivi. Rezultat je JSON s metapodacima (commit, verzije) i listom mjerenja.
+
+DEFAULT_SEED = 12345
+DEFAULT_REPEATS = 3 # Svako mjerenje se ponavlja, a prijavljuje se medijan
+SYNTHETIC_PLATFORM_COUNTS = (10, 1000, 50000)
+BRAIN_COUNT = 200 # Mozgova po mjerenju simulacije
+GA_GENERATIONS = 5
+COLLISION_PROBES = 2000 # Položaja igrača po mjerenju sudara
+
+project_root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+DEFAULT_LEVEL_FILEPATH = os.path.join(project_root, "src", "core", "level.txt")
+
+
+def write_synthetic_level(filepath, platform_count, seed):
+    # Niz platformi slijeva nadesno s nasumičnim razmacima, visinama i širinama
+    rng = random.Random(seed)
+    x = 400
+    with open(filepath, "w") as f:
+        f.write(f"# Sinteticki level: {platform_count} platformi, seed {seed}\n")
+        for _ in range(platform_count):
+            width = rng.randint(100, 250)
+            f.write(f"{x},{rng.randint(350, 520)},{width}\n")
+            x += width + rng.randint(60, 180)
+
+
+def _median_time(function, repeats):
+    timings = []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start_time)
+    return statistics.median(timings)
+
+
+def _make_brains(count, seed):
+    random.seed(seed)
+    return [Brain(main_ai.INSTRUCTION_COUNT) for _ in range(count)]
+
+
+def benchmark_headless_simulation(level_filepath, level_name, brain_count, seed, repeats):
+    """Frameovi i mozgovi u sekundi za run_simulation_for_brain bez iscrtavanja."""
+    brains = _make_brains(brain_count, seed)
+    level.load_level(SCREEN_WIDTH, SCREEN_HEIGHT, level_filepath) # Prevođenje levela se ne mjeri
+    frames = sum(simulate_brain(brain, level_filepath).frames_survived for brain in brains)
+
+    def run():
+        for brain in brains:
+            brain.fitness = 0.0
+            run_simulation_for_brain(brain, level_filepath, render=False)
+
+    seconds = _median_time(run, repeats)
+    return {
+        "name": "headless_simulation",
+        "params": {"level": level_name, "brains": brain_count},
+        "metrics": {
+            "seconds": seconds,
+            "frames": frames,
+            "frames_per_sec": frames / seconds if seconds else 0.0,
+            "brains_per_sec": brain_count / seconds if seconds else 0.0,
+        },
+    }
+
+
+def benchmark_genetic_algorithm(level_filepath, level_name, generations, seed, work_dir):
+    """Generacije u sekundi za run_genetic_algorithm bez iscrtavanja, checkpointa i spremanja AI-a."""
+    saved_globals = {name: getattr(main_ai, name) for name in
+                     ("NUM_GENERATIONS", "LEVEL_FILEPATH", "SAVED_ARCHIVE_FILEPATH",
+                      "CHECKPOINT_FILEPATH", "_should_render_brain", "_show_brain")}
+    main_ai.NUM_GENERATIONS = generations
+    main_ai.LEVEL_FILEPATH = level_filepath
+    main_ai.SAVED_ARCHIVE_FILEPATH = os.path.join(work_dir, "ga_best.genomes")
+    main_ai.CHECKPOINT_FILEPATH = os.path.join(work_dir, "ga_checkpoint.pkl")
+    main_ai._should_render_brain = lambda generation, brain_idx: False
+    main_ai._show_brain = lambda brain, spectator, current_generation, brain_idx, level_filepath=None: None # Bez prikaza najboljeg mozga na kraju
+    try:
+        random.seed(seed)
+        start_time = time.perf_counter()
+        main_ai.run_genetic_algorithm(checkpoint_interval=0, spectator_rendering=False,
+                                      legacy_brain_filepath=os.path.join(work_dir, "ga_best.pkl"))
+        seconds = time.perf_counter() - start_time
+    finally:
+        for name, value in saved_globals.items():
+            setattr(main_ai, name, value)
+
+    completed_generations = len(main_ai.generation_stats) # Trening staje ranije ako AI pobijedi
+    return {
+        "name": "genetic_algorithm",
+        "params": {"level": level_name, "generations": generations, "population": main_ai.POPULATION_SIZE},
+        "metrics": {
+            "seconds": seconds,
+            "completed_generations": completed_generations,
+            "generations_per_sec": completed_generations / seconds if seconds else 0.0,
+            "won": main_ai.ai_has_won_session,
+        },
+    }
+
+
+def benchmark_collisions(level_filepath, platform_count, probes, seed, repeats):
+    """Cijena provjere sudara igrača s platformama (PlatformManager + Player) na sintetičkom levelu."""
+    start_time = time.perf_counter()
+    compiled_level = level.compile_level(SCREEN_WIDTH, SCREEN_HEIGHT, level_filepath) # Bez cachea prevedenih levela
+    compile_seconds = time.perf_counter() - start_time
+
+    platform_manager = PlatformManager(SCREEN_WIDTH, SCREEN_HEIGHT, level_filepath)
+    platform_manager.generate_platforms()
+    player = Player(PLAYER_SCREEN_X, 0, 50, 50)
+
+    rng = random.Random(seed)
+    level_right = max(x + width for x, _, width, _ in compiled_level.platforms)
+    positions = [(rng.uniform(0, level_right), rng.randint(250, SCREEN_HEIGHT - 75)) for _ in range(probes)]
+
+    def run():
+        for world_x, player_top in positions:
+            view_offset_x = int(world_x)
+            player.rect.y = player_top
+            player.vel_y = 5
+            for platform_idx in platform_manager.collision_candidates(player.rect, view_offset_x):
+                platform_rect = platform_manager.platforms[platform_idx]
+                if player.collide_with_platform(platform_rect.move(-view_offset_x, 0)):
+                    break
+
+    seconds = _median_time(run, repeats)
+    return {
+        "name": "collisions",
+        "params": {"platforms": platform_count, "probes": probes},
+        "metrics": {
+            "seconds": seconds,
+            "checks_per_sec": probes / seconds if seconds else 0.0,
+            "level_compile_seconds": compile_seconds,
+        },
+    }
+
+
+def _git_commit():
+    try:
+        output = subprocess.run(["git", "rev-parse", "HEAD"], cwd=project_root, capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError) as e:
+        return None
+    return output.stdout.strip() or None
+
+
+def run_benchmarks(seed=DEFAULT_SEED, repeats=DEFAULT_REPEATS, brain_count=BRAIN_COUNT, ga_generations=GA_GENERATIONS,
+                   collision_probes=COLLISION_PROBES, platform_counts=SYNTHETIC_PLATFORM_COUNTS):
+    work_dir = tempfile.mkdtemp(prefix="stb_benchmarks_")
+    results = []
+    try:
+        synthetic_levels = {}
+        for platform_count in platform_counts:
+            filepath = os.path.join(work_dir, f"synthetic_{platform_count}.txt")
+            write_synthetic_level(filepath, platform_count, seed)
+            synthetic_levels[platform_count] = filepath
+
+        level_cases = [("level.txt", DEFAULT_LEVEL_FILEPATH)]
+        level_cases += [(f"synthetic_{count}", filepath) for count, filepath in synthetic_levels.items()]
+        for level_name, filepath in level_cases:
+            results.append(benchmark_headless_simulation(filepath, level_name, brain_count, seed, repeats))
+
+        # Zadani level AI brzo pobijedi, pa se treniranje mjeri na najvećem sintetičkom levelu do 1000 platformi
+        ga_count = max([count for count in platform_counts if count <= 1000] or platform_counts)
+        results.append(benchmark_genetic_algorithm(synthetic_levels[ga_count], f"synthetic_{ga_count}", ga_generations, seed, work_dir))
+
+        for platform_count, filepath in synthetic_levels.items():
+            results.append(benchmark_collisions(filepath, platform_count, collision_probes, seed, repeats))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        "metadata": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "seed": seed,
+            "repeats": repeats,
+        },
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mjerenje brzine simulacije i treniranja Super Toni Bros")
+    parser.add_argument("--output", help="JSON datoteka za rezultate (zadano: standardni izlaz)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    parser.add_argument("--brains", type=int, default=BRAIN_COUNT)
+    parser.add_argument("--generations", type=int, default=GA_GENERATIONS)
+    parser.add_argument("--probes", type=int, default=COLLISION_PROBES)
+    parser.add_argument("--quick", action="store_true", help="Manje ponavljanja i mozgova, za brzu provjeru")
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        args.repeats, args.brains, args.generations, args.probes = 1, 20, 2, 200
+    report = run_benchmarks(args.seed, args.repeats, args.brains, args.generations, args.probes)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -27,6 +27,9 @@ class Brain:
         self.instructions = [] # Lista AI akcija (poteza)
         self.current_instruction_number = 0
         self.fitness = 0.0 # Ocjena uspješnosti mozga
+        self.parent_instructions = None # Instrukcije mozga od kojeg je ovaj kloniran
+        self.pruned = False # Evaluacija prekinuta jer mozak ne može ući u selekciju (fitness je gornja granica)
+        self.won = False # Zadnja simulacija je došla do cilja (na paketu levela: na svakom levelu)
         if randomize_instructions:
             self.randomize(instruction_size)
 
@@ -49,11 +52,19 @@ class Brain:
     def reset_instructions(self):
         self.current_instruction_number = 0 # Vraća brojač instrukcija na početak
 
-    def clone(self):
+    def clone(self, keep_parent=False):
+        # keep_parent čuva instrukcije roditelja za PrefixCheckpointCache; inače klon ne drži roditelja u memoriji
         clone = Brain(len(self.instructions), randomize_instructions=False)
         clone.instructions = [instr.clone() for instr in self.instructions]
+        clone.parent_instructions = self.instructions if keep_parent else None
         return clone
 
+    def __getstate__(self):
+        # Roditelj se ne serijalizira (radni procesi, checkpointi, migranti); snapshotovi roditelja postoje samo lokalno
+        state = self.__dict__.copy()
+        state["parent_instructions"] = None
+        return state
+
     def mutate(self, mutation_rate, chance_of_new_instruction):
         for i in range(len(self.instructions)):
             # Šansa da se postojeća instrukcija zamijeni potpuno novom
@@ -0,0 +1,190 @@
+try:
+    import numpy as np
+except ImportError: # numpy je neobavezan; bez njega se koristi obični Brain
+    np = None
+
+from .ai_brain import AIAction, Brain
+
+# Genom spremljen kao tri kontinuirana polja (struct-of-arrays) umjesto liste AIAction objekata.
+# Vjerojatnosti nasumičnih akcija i mutacija iste su kao u Brain i AIAction.
+
+X_DIRECTIONS = (-1, 0, 1)
+RANDOM_X_DIRECTION_P = (0.05, 0.15, 0.80) # Brain._get_random_action: težine 5, 15, 80
+MUTATED_X_DIRECTION_P = (1 / 6, 1 / 6, 4 / 6) # AIAction.mutate: izbor iz [-1, 0, 1, 1, 1, 1]
+DIRECTION_CHANGE_CHANCE = 0.25
+JUMP_FLIP_CHANCE = 0.15
+
+_rng = np.random.default_rng() if np is not None else None
+
+
+def is_available():
+    return np is not None
+
+
+def seed(value):
+    global _rng
+    _rng = np.random.default_rng(value)
+
+
+def get_rng_state():
+    return _rng.bit_generator.state
+
+
+def set_rng_state(state):
+    _rng.bit_generator.state = state
+
+
+def _random_actions(size):
+    is_jump = _rng.random(size) < Brain.JUMP_CHANCE
+    hold_time = _rng.uniform(0.1, 0.8, size)
+    x_direction = _rng.choice(X_DIRECTIONS, size=size, p=RANDOM_X_DIRECTION_P).astype(np.int8)
+    return is_jump, hold_time, x_direction
+
+
+def _mutate_arrays(is_jump, hold_time, x_direction, mutation_rate, chance_of_new_instruction):
+    # Radi na poljima bilo kojeg oblika (jedan genom ili cijeli blok genoma), mijenja ih na mjestu.
+    # Jedan uniformni broj po instrukciji: zamjena s vjerojatnošću p_nova, inače mutacija s vjerojatnošću p_mut,
+    # što daje istu raspodjelu kao dva uzastopna random.random() u Brain.mutate.
+    is_jump = is_jump.reshape(-1)
+    hold_time = hold_time.reshape(-1)
+    x_direction = x_direction.reshape(-1)
+    draw = _rng.random(is_jump.size, dtype=np.float32)
+    replace = np.flatnonzero(draw < chance_of_new_instruction)
+    mutate = np.flatnonzero((draw >= chance_of_new_instruction) &
+                            (draw < chance_of_new_instruction + (1.0 - chance_of_new_instruction) * mutation_rate))
+
+    if replace.size:
+        new_jump, new_hold, new_direction = _random_actions(replace.size)
+        is_jump[replace] = new_jump
+        hold_time[replace] = new_hold
+        x_direction[replace] = new_direction
+
+    if mutate.size:
+        # AIAction.mutate: pomak trajanja, zatim moguća promjena smjera i skoka
+        hold_time[mutate] = np.clip(hold_time[mutate] + _rng.uniform(-0.15, 0.15, mutate.size), 0.1, 1.0)
+        change_direction = mutate[_rng.random(mutate.size) < DIRECTION_CHANGE_CHANCE]
+        x_direction[change_direction] = _rng.choice(X_DIRECTIONS, size=change_direction.size, p=MUTATED_X_DIRECTION_P)
+        flip_jump = mutate[_rng.random(mutate.size) < JUMP_FLIP_CHANCE]
+        is_jump[flip_jump] = ~is_jump[flip_jump]
+
+
+class ArrayInstructions:
+    """Pogled na genom ArrayBrain-a koji se ponaša kao lista AIAction objekata (samo za čitanje)."""
+
+    def __init__(self, is_jump, hold_time, x_direction):
+        self.is_jump = is_jump
+        self.hold_time = hold_time
+        self.x_direction = x_direction
+
+    def __len__(self):
+        return len(self.is_jump)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        return AIAction(bool(self.is_jump[idx]), float(self.hold_time[idx]), int(self.x_direction[idx]))
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def quantize(self, max_action_duration_frames):
+        # Brzi put za headless_simulation.quantize_instructions
+        frames = (self.hold_time * max_action_duration_frames).astype(np.int64)
+        return list(zip(self.is_jump.tolist(), frames.tolist(), self.x_direction.tolist()))
+
+
+class ArrayBrain:
+    JUMP_CHANCE = Brain.JUMP_CHANCE
+
+    def __init__(self, instruction_size, randomize_instructions=True):
+        self.is_jump = np.zeros(0, dtype=bool)
+        self.hold_time = np.zeros(0, dtype=np.float64)
+        self.x_direction = np.zeros(0, dtype=np.int8)
+        self.current_instruction_number = 0
+        self.fitness = 0.0 # Ocjena uspješnosti mozga
+        self.parent_instructions = None # Instrukcije mozga od kojeg je ovaj kloniran
+        self.pruned = False # Evaluacija prekinuta jer mozak ne može ući u selekciju (fitness je gornja granica)
+        self.won = False # Zadnja simulacija je došla do cilja (na paketu levela: na svakom levelu)
+        if randomize_instructions:
+            self.randomize(instruction_size)
+
+    @property
+    def instructions(self):
+        return ArrayInstructions(self.is_jump, self.hold_time, self.x_direction)
+
+    def randomize(self, size):
+        self.is_jump, self.hold_time, self.x_direction = _random_actions(size)
+
+    def get_next_action(self):
+        if self.current_instruction_number >= len(self.is_jump):
+            return None # Nema više instrukcija
+        action = self.instructions[self.current_instruction_number]
+        self.current_instruction_number += 1
+        return action
+
+    def reset_instructions(self):
+        self.current_instruction_number = 0
+
+    def clone(self, keep_parent=False):
+        clone = ArrayBrain(len(self.is_jump), randomize_instructions=False)
+        clone.is_jump = self.is_jump.copy()
+        clone.hold_time = self.hold_time.copy()
+        clone.x_direction = self.x_direction.copy()
+        clone.parent_instructions = self.instructions if keep_parent else None
+        return clone
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["parent_instructions"] = None # Kao Brain: roditelj se ne serijalizira
+        return state
+
+    def mutate(self, mutation_rate, chance_of_new_instruction):
+        _mutate_arrays(self.is_jump, self.hold_time, self.x_direction, mutation_rate, chance_of_new_instruction)
+
+    def increase_moves(self, num_additional_moves):
+        # Dodaje nove nasumične poteze na kraj postojećih
+        new_jump, new_hold, new_direction = _random_actions(num_additional_moves)
+        self.is_jump = np.concatenate([self.is_jump, new_jump])
+        self.hold_time = np.concatenate([self.hold_time, new_hold])
+        self.x_direction = np.concatenate([self.x_direction, new_direction])
+
+    def set_instructions(self, instructions_list):
+        """Postavlja instrukcije iz liste AIAction objekata."""
+        self.is_jump = np.array([bool(action.is_jump) for action in instructions_list], dtype=bool)
+        self.hold_time = np.array([action.hold_time for action in instructions_list], dtype=np.float64)
+        self.x_direction = np.array([action.x_direction for action in instructions_list], dtype=np.int8)
+        self.current_instruction_number = 0
+
+
+def breed_children(parents, count, mutation_rate, chance_of_new_instruction, keep_parents=False):
+    """Stvara count mutiranih klonova nasumično odabranih roditelja jednom operacijom nad blokom genoma.
+
+    keep_parents kao clone(keep_parent=True): djeca pamte instrukcije roditelja za PrefixCheckpointCache.
+    """
+    if count <= 0 or not parents:
+        return []
+    lengths = {len(parent.is_jump) for parent in parents}
+    if len(lengths) != 1: # Roditelji različitih duljina ne mogu u isti blok
+        children = []
+        for parent_idx in _rng.integers(0, len(parents), count):
+            child = parents[parent_idx].clone(keep_parents)
+            child.mutate(mutation_rate, chance_of_new_instruction)
+            children.append(child)
+        return children
+
+    parent_choice = _rng.integers(0, len(parents), count)
+    is_jump = np.stack([parent.is_jump for parent in parents])[parent_choice]
+    hold_time = np.stack([parent.hold_time for parent in parents])[parent_choice]
+    x_direction = np.stack([parent.x_direction for parent in parents])[parent_choice]
+    _mutate_arrays(is_jump, hold_time, x_direction, mutation_rate, chance_of_new_instruction)
+
+    children = []
+    for row, parent_idx in enumerate(parent_choice):
+        child = ArrayBrain(0, randomize_instructions=False)
+        child.is_jump = is_jump[row] # Redak bloka; clone i mutate djeteta ne diraju ostale retke
+        child.hold_time = hold_time[row]
+        child.x_direction = x_direction[row]
+        child.parent_instructions = parents[parent_idx].instructions if keep_parents else None
+        children.append(child)
+    return children
@@ -0,0 +1,238 @@
+try:
+    import numpy as np
+except ImportError: # numpy je neobavezan; bez njega se koristi obična headless simulacija
+    np = None
+
+from src.core import level
+from src.core.level_stream import StreamingLevel
+from .headless_simulation import (SCREEN_WIDTH, SCREEN_HEIGHT, GRAVITY, JUMP_STRENGTH, PLAYER_SPEED,
+                                  MAX_FALL_SPEED, PLAYER_SIZE, PLAYER_SCREEN_X, FALL_DEATH_Y,
+                                  STAGNATION_LIMIT_MAX_X, COLLISION_EPSILON,
+                                  EXIT_INSTRUCTIONS, EXIT_FALL, EXIT_STAGNATION, EXIT_WIN,
+                                  SimulationResult, quantize_instructions, compute_fitness,
+                                  simulate_brain, run_headless_simulation)
+
+# Sve jedinke populacije simuliraju se istovremeno, frame po frame; stanje svakog mozga je
+# jedan element NumPy polja. Rezultati su identični headless_simulation.simulate_actions.
+
+MAX_DENSE_COLLISION_PAIRS = 4096 # Do ovoliko parova (mozak, platforma) svaki mozak se provjerava sa svakom platformom
+
+_RUNNING = 0
+_EXIT_CODES = {1: EXIT_INSTRUCTIONS, 2: EXIT_FALL, 3: EXIT_STAGNATION, 4: EXIT_WIN}
+
+
+def is_available():
+    return np is not None
+
+
+def _genome_arrays(action_lists):
+    brain_count = len(action_lists)
+    lengths = np.array([len(actions) for actions in action_lists], dtype=np.int64)
+    width = max(1, int(lengths.max()) if brain_count else 1)
+    is_jump = np.zeros((brain_count, width), dtype=bool)
+    frames = np.zeros((brain_count, width), dtype=np.int64)
+    x_direction = np.zeros((brain_count, width), dtype=np.int64)
+    for brain_idx, actions in enumerate(action_lists):
+        if actions:
+            jumps, durations, directions = zip(*actions)
+            count = len(actions)
+            is_jump[brain_idx, :count] = jumps
+            frames[brain_idx, :count] = durations
+            x_direction[brain_idx, :count] = directions
+    return lengths, is_jump, frames, x_direction
+
+
+def _collision_pairs(plat, wx):
+    # Parovi (mozak, kandidat) čiji se x rasponi mogu preklapati; kandidati su poredani po x, pa svaki mozak
+    # dobiva samo kandidate iz svog prozora (binarno pretraživanje), a ne sve platforme raspona cijele populacije
+    brain_count = wx.size
+    if brain_count * len(plat) <= MAX_DENSE_COLLISION_PAIRS: # Mala populacija ili kratak raspon: svaki sa svakim
+        return np.repeat(np.arange(brain_count), len(plat)), np.tile(np.arange(len(plat)), brain_count)
+    by_x = np.argsort(plat[:, 0], kind="stable")
+    plat_x = plat[by_x, 0]
+    # trunc(x - wx) < PLAYER_SCREEN_X + PLAYER_SIZE povlači x < wx + PLAYER_SCREEN_X + PLAYER_SIZE, a preklapanje
+    # desnog ruba povlači x > wx + PLAYER_SCREEN_X - širina - 1
+    first = np.searchsorted(plat_x, wx + PLAYER_SCREEN_X - plat[:, 2].max() - 1, side="right")
+    last = np.searchsorted(plat_x, wx + PLAYER_SCREEN_X + PLAYER_SIZE, side="left")
+    counts = np.maximum(last - first, 0)
+    pair_brains = np.repeat(np.arange(brain_count), counts)
+    pair_offsets = np.arange(pair_brains.size) - np.repeat(np.cumsum(counts) - counts, counts)
+    return pair_brains, by_x[np.repeat(first, counts) + pair_offsets]
+
+
+def _resolve_collisions(group, plat, world_x, player_top, vel_y, on_ground):
+    # Sudari mozgova iz group s kandidatima plat (pravokutnici platformi rastućim redoslijedom ključeva)
+    pair_brains, pair_plats = _collision_pairs(plat, world_x[group])
+    if not pair_brains.size:
+        return
+    brains = group[pair_brains]
+    box = plat[pair_plats]
+    plat_left = np.trunc(box[:, 0] - world_x[brains]).astype(np.int64)
+    plat_top = box[:, 1]
+    plat_bottom = box[:, 1] + box[:, 3]
+    top = player_top[brains]
+    bottom = top + PLAYER_SIZE
+    vel = vel_y[brains]
+    step = np.trunc(vel).astype(np.int64)
+    overlap = ((PLAYER_SCREEN_X < plat_left + box[:, 2]) & (plat_left < PLAYER_SCREEN_X + PLAYER_SIZE) &
+               (top < plat_bottom) & (plat_top < bottom))
+    landing = overlap & (vel >= 0) & (bottom >= plat_top) & (bottom - step <= plat_top + COLLISION_EPSILON) & (bottom > plat_top)
+    head_hit = overlap & (vel < 0) & (top <= plat_bottom) & (top - step >= plat_bottom - COLLISION_EPSILON)
+    hits = np.flatnonzero(landing | head_hit)
+    if not hits.size:
+        return
+    # Za svaki mozak pogodak s najmanjim indeksom kandidata (prva platforma u izvornom redoslijedu)
+    hits = hits[np.lexsort((pair_plats[hits], pair_brains[hits]))]
+    hits = hits[np.flatnonzero(np.diff(pair_brains[hits], prepend=-1))]
+    hit_brains = brains[hits]
+    player_top[hit_brains] = np.where(landing[hits], plat_top[hits] - PLAYER_SIZE, plat_bottom[hits])
+    vel_y[hit_brains] = 0.0
+    on_ground[hit_brains] = True
+
+
+def simulate_actions_batch(action_lists, compiled_level):
+    """Vraća listu SimulationResult, jedan za svaku listu kvantiziranih instrukcija."""
+    brain_count = len(action_lists)
+    if brain_count == 0:
+        return []
+    lengths, genome_jump, genome_frames, genome_direction = _genome_arrays(action_lists)
+
+    if isinstance(compiled_level, StreamingLevel): # Polja platformi trebaju cijeli level odjednom
+        compiled_level = compiled_level.compile()
+    boxes = np.array(compiled_level.collision_boxes, dtype=np.int64).reshape(-1, 4)
+    platform_index = compiled_level.platform_index
+    goal = compiled_level.goal
+
+    player_top = np.full(brain_count, int(compiled_level.ground[1] - PLAYER_SIZE), dtype=np.int64)
+    vel_y = np.zeros(brain_count, dtype=np.float64)
+    on_ground = np.ones(brain_count, dtype=bool)
+    world_x = np.zeros(brain_count, dtype=np.float64)
+    max_world_x = np.zeros(brain_count, dtype=np.float64)
+    total_left_movement = np.zeros(brain_count, dtype=np.float64)
+    last_check_world_x = np.zeros(brain_count, dtype=np.float64)
+    stagnation_frames = np.zeros(brain_count, dtype=np.int64)
+    frames_survived = np.zeros(brain_count, dtype=np.int64)
+
+    instruction_idx = np.zeros(brain_count, dtype=np.int64)
+    is_jump = np.zeros(brain_count, dtype=bool)
+    x_direction = np.zeros(brain_count, dtype=np.int64)
+    action_frames_remaining = np.zeros(brain_count, dtype=np.int64)
+    jump_executed = np.zeros(brain_count, dtype=bool)
+    exit_code = np.full(brain_count, _RUNNING, dtype=np.int8)
+
+    active = np.arange(brain_count)
+    while active.size:
+        # Dohvat sljedeće instrukcije
+        needs_action = action_frames_remaining[active] <= 0
+        if needs_action.any():
+            fetching = active[needs_action]
+            exhausted = instruction_idx[fetching] >= lengths[fetching]
+            exit_code[fetching[exhausted]] = 1
+            fetching = fetching[~exhausted]
+            idx = instruction_idx[fetching]
+            is_jump[fetching] = genome_jump[fetching, idx]
+            action_frames_remaining[fetching] = genome_frames[fetching, idx]
+            x_direction[fetching] = genome_direction[fetching, idx]
+            instruction_idx[fetching] = idx + 1
+            jump_executed[fetching] = False
+            if exhausted.any():
+                active = active[exit_code[active] == _RUNNING]
+                if not active.size:
+                    break
+
+        # Player.jump
+        jumping = active[is_jump[active] & on_ground[active] & ~jump_executed[active]]
+        vel_y[jumping] = JUMP_STRENGTH
+        on_ground[jumping] = False
+        jump_executed[jumping] = True
+
+        # Player.apply_gravity
+        vel = np.minimum(vel_y[active] + GRAVITY, MAX_FALL_SPEED)
+        vel_y[active] = vel
+        top = player_top[active] + np.trunc(vel).astype(np.int64)
+        player_top[active] = top
+
+        fell = top > FALL_DEATH_Y
+        if fell.any():
+            exit_code[active[fell]] = 2
+            active = active[~fell]
+            if not active.size:
+                break
+
+        # Kretanje po x osi i stagnacija
+        direction = x_direction[active]
+        wx = world_x[active] + PLAYER_SPEED * (direction == 1) - PLAYER_SPEED * (direction == -1)
+        world_x[active] = wx
+        total_left_movement[active] += PLAYER_SPEED * (direction == -1)
+
+        moved_right = wx > max_world_x[active]
+        max_world_x[active] = np.where(moved_right, wx, max_world_x[active])
+        moved = np.abs(wx - last_check_world_x[active]) >= 1.0
+        stagnation = stagnation_frames[active]
+        stagnation = np.where(moved_right | moved, 0, stagnation + 1)
+        stagnation_frames[active] = stagnation
+        last_check_world_x[active] = wx
+
+        stagnated = stagnation > STAGNATION_LIMIT_MAX_X
+        if stagnated.any():
+            exit_code[active[stagnated]] = 3
+            active = active[~stagnated]
+            if not active.size:
+                break
+
+        # Sudari: za svaki mozak prva platforma (u izvornom redoslijedu) za koju bi collide_with_platform vratio True
+        on_ground[active] = False
+        wx = world_x[active]
+        candidates = platform_index.query(wx.min() + PLAYER_SCREEN_X, wx.max() + PLAYER_SCREEN_X + PLAYER_SIZE)
+        if len(candidates):
+            _resolve_collisions(active, boxes[np.array(candidates, dtype=np.int64)], world_x, player_top, vel_y, on_ground)
+
+        if goal:
+            goal_x, goal_y, goal_w, goal_h = goal
+            goal_left = np.trunc(goal_x - world_x[active]).astype(np.int64)
+            top = player_top[active]
+            won = ((PLAYER_SCREEN_X < goal_left + goal_w) & (goal_left < PLAYER_SCREEN_X + PLAYER_SIZE) &
+                   (top < goal_y + goal_h) & (goal_y < top + PLAYER_SIZE))
+            if goal_w and goal_h and won.any():
+                exit_code[active[won]] = 4
+                active = active[~won]
+
+        action_frames_remaining[active] -= 1
+        frames_survived[active] += 1
+
+    results = []
+    for brain_idx in range(brain_count):
+        result = SimulationResult()
+        result.exit_reason = _EXIT_CODES[int(exit_code[brain_idx])]
+        result.max_world_x = float(max_world_x[brain_idx])
+        result.total_left_movement = float(total_left_movement[brain_idx])
+        result.final_world_x = float(world_x[brain_idx])
+        result.frames_survived = int(frames_survived[brain_idx])
+        result.instructions_used = int(instruction_idx[brain_idx])
+        results.append(result)
+    return results
+
+
+def simulate_population_results(brains, level_filepath):
+    if np is None:
+        return [simulate_brain(brain, level_filepath) for brain in brains]
+    compiled_level = level.load_level(SCREEN_WIDTH, SCREEN_HEIGHT, level_filepath)
+    return simulate_actions_batch([quantize_instructions(brain.instructions) for brain in brains], compiled_level)
+
+
+def population_fitness(brains, level_filepath):
+    """Fitness svih mozgova izračunat jednim pozivom, bez mijenjanja samih mozgova."""
+    results = simulate_population_results(brains, level_filepath)
+    return [compute_fitness(result, len(brain.instructions), brain.fitness) for brain, result in zip(brains, results)]
+
+
+def simulate_population(brains, level_filepath):
+    """Evaluira cijelu populaciju jednim pozivom; postavlja brain.fitness i vraća listu fitnessa."""
+    if np is None:
+        return [run_headless_simulation(brain, level_filepath) for brain in brains]
+
+    results = simulate_population_results(brains, level_filepath)
+    for brain, result in zip(brains, results):
+        brain.current_instruction_number = result.instructions_used
+        brain.fitness = compute_fitness(result, len(brain.instructions), brain.fitness)
+    return [brain.fitness for brain in brains]
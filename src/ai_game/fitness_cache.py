@@ -0,0 +1,52 @@
+from collections import OrderedDict
+
+from .headless_simulation import quantize_instructions
+
+# Elite i djeca koja mutacija nije promijenila imaju isti genom kao već simulirani mozak.
+# Cache pamti ishod simulacije (SimulationResult) po genomu i levelu, pa se takvi mozgovi ne simuliraju ponovno.
+# Pamti se ishod, a ne sam fitness, jer formula fitnessa ovisi i o prethodnom brain.fitness.
+
+MAX_CACHED_RESULTS = 4096
+
+
+def genome_key(instructions, level_hash):
+    # Kanonski ključ: (skok, broj frameova, smjer) za svaku instrukciju, kako ih vidi simulacija
+    return (level_hash, tuple(quantize_instructions(instructions)))
+
+
+class FitnessCache:
+    def __init__(self, max_entries=MAX_CACHED_RESULTS):
+        self.max_entries = max_entries
+        self._results = OrderedDict()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "cached_results": len(self._results),
+        }
+
+    def clear(self):
+        self._results.clear()
+
+    def get(self, key):
+        result = self._results.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self._results.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def put(self, key, result):
+        self._results[key] = result
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_entries: # Izbacuje najdavnije korišteni ishod
+            self._results.popitem(last=False)
@@ -0,0 +1,55 @@
+import heapq
+
+# Rezanje beznadnih evaluacija: sljedeću generaciju stvaraju samo najboljih keep_count mozgova (elite i bazen
+# roditelja), pa mozak čiji fitness ne može premašiti keep_count-ti najbolji dosad viđeni fitness generacije
+# ne utječe na selekciju. Njegova simulacija se prekida, a fitness postaje gornja granica (vidi fitness_upper_bound).
+# Rezanje je egzaktno: sljedeća generacija je ista kao bez rezanja. Zato granica postoji tek kad je keep_count
+# mozgova generacije preživjelo; dok više od pola populacije pada (rane generacije, teški leveli), granica je
+# FALL_FITNESS, pali mozgovi su u bazenu roditelja i ništa se ne reže.
+
+
+class SelectionCutoff:
+    def __init__(self, keep_count):
+        self.keep_count = keep_count
+        self.reset()
+
+    def reset(self):
+        # Poziva se na početku svake generacije
+        self._best = [] # Min-heap keep_count najboljih fitnessa ove generacije
+        self.evaluated = 0
+        self.pruned = 0
+        self.frames_simulated = 0
+        self.frames_skipped = 0
+        self.seconds = 0.0
+
+    def cutoff(self):
+        """Granica selekcije ili None dok nije evaluirano dovoljno mozgova."""
+        if len(self._best) < self.keep_count:
+            return None
+        return self._best[0]
+
+    def add(self, fitness):
+        if len(self._best) < self.keep_count:
+            heapq.heappush(self._best, fitness)
+        elif fitness > self._best[0]:
+            heapq.heapreplace(self._best, fitness)
+
+    def record(self, result, seconds):
+        # Bilježi simulirani ishod i vrijeme njegove simulacije
+        self.evaluated += 1
+        self.frames_simulated += result.frames_survived
+        self.seconds += seconds
+        if result.pruned:
+            self.pruned += 1
+            self.frames_skipped += result.frames_skipped
+
+    def stats(self):
+        seconds_per_frame = self.seconds / self.frames_simulated if self.frames_simulated else 0.0
+        return {
+            "evaluated": self.evaluated,
+            "pruned": self.pruned,
+            "frames_simulated": self.frames_simulated,
+            "frames_skipped": self.frames_skipped,
+            "seconds": self.seconds,
+            "estimated_seconds_saved": self.frames_skipped * seconds_per_frame, # Procjena prema prosječnoj brzini simulacije
+        }
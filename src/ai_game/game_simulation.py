@@ -4,18 +4,17 @@ import sys
 
 from src.core.platforms import PlatformManager
 from src.core.player import Player
+from src.core import render_cache
+from src.core import assets
 from .ai_brain import Brain, AIAction
+from .headless_simulation import (SCREEN_WIDTH, SCREEN_HEIGHT, FPS, GRAVITY, JUMP_STRENGTH, PLAYER_SPEED,
+                                  MAX_ACTION_DURATION_FRAMES, run_headless_simulation)
 
 
-SCREEN_WIDTH, SCREEN_HEIGHT = 800, 600
-FPS = 60
-GRAVITY = 0.8
-JUMP_STRENGTH = -15
-PLAYER_SPEED = 5
+def run_simulation_for_brain(brain, level_filepath, render=False, current_generation=0, brain_idx=0, checkpoint_cache=None):
+    if not render: # Bez iscrtavanja koristi se čista simulacija fizike, bez pygame ekrana i slika
+        return run_headless_simulation(brain, level_filepath, checkpoint_cache)
 
-MAX_ACTION_DURATION_FRAMES = 30 # Koliko maksimalno frameova traje jedna AI akcija
-
-def run_simulation_for_brain(brain, level_filepath, render=False, current_generation=0, brain_idx=0):
     screen_for_simulation = None
     font = None
     background_image_sim = None
@@ -27,13 +26,11 @@ def run_simulation_for_brain(brain, level_filepath, render=False, current_genera
         screen_for_simulation = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption(f"Super Toni Bros - AI Gen: {current_generation} Brain: {brain_idx}")
 
-        base_path_sim = os.path.dirname(os.path.abspath(__file__))
-        background_path_sim = os.path.join(base_path_sim, "..", "..", "images", "Background.jpeg")
-        try:
-            background_image_sim = pygame.image.load(background_path_sim).convert()
-        except pygame.error as e:
+        background_image_sim = assets.get_image("Background.jpeg", alpha=False)
+        if background_image_sim is None:
             background_image_sim = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
             background_image_sim.fill((200, 200, 255))
+        background_strip_sim = render_cache.compose_scrolling_background(background_image_sim, SCREEN_WIDTH, SCREEN_HEIGHT)
 
         if not pygame.font.get_init():
             pygame.font.init()
@@ -47,13 +44,6 @@ def run_simulation_for_brain(brain, level_filepath, render=False, current_genera
                     font = None
         else:
             font = None
-    else: # Ako nema renderiranja, koristi dummy display da Pygame radi u pozadini
-        if not pygame.display.get_init():
-            try:
-                pygame.display.init()
-                screen_for_simulation = pygame.display.set_mode((1, 1), pygame.NOFRAME)
-            except pygame.error as e:
-                pass
 
 
     try:
@@ -167,13 +157,9 @@ def run_simulation_for_brain(brain, level_filepath, render=False, current_genera
             simulation_running = False; break
 
         player.on_ground = False
-        for plat_obj_original in platform_manager.platforms:
+        for plat_idx in platform_manager.collision_candidates(player.rect, view_offset_x):
+            plat_obj_original = platform_manager.platforms[plat_idx]
             # Preračunavanje pozicije platforme s obzirom na pomak kamere
-            temp_plat_rect = pygame.Rect(plat_obj_original.x - view_offset_x + player_start_x_on_screen,
-                                         plat_obj_original.y,
-                                         plat_obj_original.width,
-                                         plat_obj_original.height)
-
             collision_plat_rect = pygame.Rect(plat_obj_original.x - view_offset_x, # Stvarna pozicija platforme za koliziju
                                               plat_obj_original.y,
                                               plat_obj_original.width,
@@ -197,8 +183,7 @@ def run_simulation_for_brain(brain, level_filepath, render=False, current_genera
             if background_image_sim:
                 bg_width = background_image_sim.get_width()
                 render_x_bg = (-view_offset_x) % bg_width # Scrolling pozadine
-                screen_for_simulation.blit(background_image_sim, (render_x_bg - bg_width, 0))
-                screen_for_simulation.blit(background_image_sim, (render_x_bg, 0))
+                screen_for_simulation.blit(background_strip_sim, (render_x_bg - bg_width, 0)) # Traka prekriva cijeli ekran
             else:
                  screen_for_simulation.fill((200,200,255))
 
@@ -246,6 +231,7 @@ def run_simulation_for_brain(brain, level_filepath, render=False, current_genera
         pass
     else:
         brain.fitness = fitness
+    brain.won = game_won_by_ai
 
     if render and screen_for_simulation and pygame.display.get_init():
         pygame.display.quit() # Zatvara Pygame display ako je bio korišten za renderiranje
@@ -0,0 +1,185 @@
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+from collections import namedtuple
+
+from .ai_brain import AIAction
+
+# Binarna arhiva najboljih genoma ("hall of fame") sa zapisima fiksne veličine.
+# Datoteka se čita preko mmap-a, pa se pojedini genom ili stupac fitnessa mogu pročitati
+# bez deserijalizacije cijele datoteke i bez ovisnosti o rasporedu klasa (za razliku od pickle).
+#
+# Zaglavlje (64 B): magic, verzija, veličina zaglavlja, veličina zapisa, kapacitet instrukcija, broj zapisa.
+# Zapis: fitness (f64), generacija (i32), broj instrukcija (u32), hash levela (20 B SHA-1), 4 B rezerve,
+#        zatim polja hold_time (f64 x kapacitet), is_jump (u8 x kapacitet) i x_direction (i8 x kapacitet).
+
+MAGIC = b"STBGENOM"
+VERSION = 1
+DEFAULT_MAX_INSTRUCTIONS = 1024
+
+_HEADER = struct.Struct("<8sHHIIQ")
+HEADER_SIZE = 64
+_RECORD_HEADER = struct.Struct("<diI20s4x")
+_FITNESS = struct.Struct("<d")
+_COUNT_OFFSET = 20 # Pomak broja zapisa unutar zaglavlja
+
+ArchivedGenome = namedtuple("ArchivedGenome", ["fitness", "generation", "level_hash", "instructions"])
+
+
+def record_size(max_instructions):
+    return _RECORD_HEADER.size + max_instructions * (8 + 1 + 1)
+
+
+def _level_hash_bytes(level_hash):
+    if not level_hash:
+        return bytes(20)
+    return bytes.fromhex(level_hash)
+
+
+def create_archive(filepath, max_instructions=DEFAULT_MAX_INSTRUCTIONS):
+    header = _HEADER.pack(MAGIC, VERSION, HEADER_SIZE, record_size(max_instructions), max_instructions, 0)
+    with open(filepath, 'wb') as f:
+        f.write(header.ljust(HEADER_SIZE, b"\0"))
+
+
+def _grow_archive(filepath, max_instructions):
+    # Prepisuje arhivu sa zapisima veće fiksne veličine; nova datoteka atomarno zamjenjuje staru
+    with GenomeArchive(filepath) as archive:
+        genomes = [archive.read(idx) for idx in range(len(archive))]
+    directory = os.path.dirname(os.path.abspath(filepath))
+    fd, temp_filepath = tempfile.mkstemp(prefix=".genomes-", dir=directory)
+    os.close(fd)
+    try:
+        create_archive(temp_filepath, max_instructions)
+        for genome in genomes:
+            append_genome(temp_filepath, genome.instructions, genome.fitness, genome.generation, genome.level_hash)
+        os.replace(temp_filepath, filepath)
+    except BaseException:
+        try:
+            os.remove(temp_filepath)
+        except OSError:
+            pass
+        raise
+
+
+def append_genome(filepath, instructions, fitness, generation=0, level_hash=None, max_instructions=DEFAULT_MAX_INSTRUCTIONS):
+    """Dodaje genom na kraj arhive (i stvara arhivu ako ne postoji); vraća indeks zapisa.
+
+    Ako je genom dulji od kapaciteta zapisa, arhiva se prepisuje s (barem dvostruko) većim kapacitetom.
+    """
+    instructions = list(instructions)
+    if not os.path.exists(filepath):
+        create_archive(filepath, max(max_instructions, len(instructions)))
+    else:
+        with open(filepath, 'rb') as f:
+            capacity = _read_header(f.read(HEADER_SIZE))[4]
+        if len(instructions) > capacity:
+            _grow_archive(filepath, max(len(instructions), 2 * capacity))
+
+    with open(filepath, 'r+b') as f:
+        _, _, _, size, capacity, count = _read_header(f.read(HEADER_SIZE))
+
+        padding = capacity - len(instructions)
+        record = bytearray(_RECORD_HEADER.pack(float(fitness), int(generation), len(instructions), _level_hash_bytes(level_hash)))
+        record += struct.pack(f"<{capacity}d", *([action.hold_time for action in instructions] + [0.0] * padding))
+        record += bytes([1 if action.is_jump else 0 for action in instructions] + [0] * padding)
+        record += struct.pack(f"<{capacity}b", *([action.x_direction for action in instructions] + [0] * padding))
+
+        f.seek(HEADER_SIZE + count * size)
+        f.write(record)
+        f.flush()
+        # Broj zapisa se povećava tek nakon što je zapis upisan, pa čitatelji nikad ne vide nepotpun zapis
+        f.seek(_COUNT_OFFSET)
+        f.write(struct.pack("<Q", count + 1))
+    return count
+
+
+def _read_header(data):
+    if len(data) < _HEADER.size:
+        raise ValueError("Datoteka nije arhiva genoma")
+    magic, version, header_size, size, capacity, count = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Datoteka nije arhiva genoma")
+    if version != VERSION:
+        raise ValueError(f"Nepodržana verzija arhive genoma: {version}")
+    return magic, version, header_size, size, capacity, count
+
+
+class GenomeArchive:
+    """Arhiva otvorena za čitanje preko mmap-a."""
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self._file = open(filepath, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        _, self.version, self.header_size, self.record_size, self.max_instructions, count = _read_header(self._map[:_HEADER.size])
+        available = (len(self._map) - self.header_size) // self.record_size
+        self.count = min(count, available)
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def _offset(self, idx):
+        if not 0 <= idx < self.count:
+            raise IndexError(idx)
+        return self.header_size + idx * self.record_size
+
+    def fitness(self, idx):
+        return _FITNESS.unpack_from(self._map, self._offset(idx))[0]
+
+    def fitness_column(self):
+        # Čita samo prvih 8 bajtova svakog zapisa
+        return [_FITNESS.unpack_from(self._map, self.header_size + idx * self.record_size)[0] for idx in range(self.count)]
+
+    def best_index(self, level_hash=None):
+        """Indeks zapisa s najvećim fitnessom (po želji samo za zadani level); None ako takvog nema."""
+        wanted_hash = _level_hash_bytes(level_hash) if level_hash else None
+        best_idx = None
+        best_fitness = -float('inf')
+        for idx in range(self.count):
+            offset = self.header_size + idx * self.record_size
+            fitness, _, _, record_hash = _RECORD_HEADER.unpack_from(self._map, offset)
+            if wanted_hash is not None and record_hash != wanted_hash:
+                continue
+            if best_idx is None or fitness > best_fitness:
+                best_idx, best_fitness = idx, fitness
+        return best_idx
+
+    def read(self, idx):
+        offset = self._offset(idx)
+        fitness, generation, instruction_count, record_hash = _RECORD_HEADER.unpack_from(self._map, offset)
+        capacity = self.max_instructions
+        hold_offset = offset + _RECORD_HEADER.size
+        jump_offset = hold_offset + capacity * 8
+        direction_offset = jump_offset + capacity
+        hold_times = struct.unpack_from(f"<{instruction_count}d", self._map, hold_offset)
+        jumps = self._map[jump_offset:jump_offset + instruction_count]
+        directions = struct.unpack_from(f"<{instruction_count}b", self._map, direction_offset)
+        instructions = [AIAction(bool(jump), hold_time, direction) for jump, hold_time, direction in zip(jumps, hold_times, directions)]
+        level_hash = record_hash.hex() if any(record_hash) else None
+        return ArchivedGenome(fitness, generation, level_hash, instructions)
+
+
+def import_legacy_pickle(pickle_filepath, archive_filepath, fitness=0.0, generation=0, level_hash=None):
+    """Uvozi staru best_ai_path.pkl datoteku (pickle lista AIAction objekata) u arhivu; vraća indeks ili None."""
+    try:
+        with open(pickle_filepath, 'rb') as f:
+            instructions = pickle.load(f)
+    except Exception:
+        return None # Nepostojeća ili neispravna datoteka se preskače
+    if not instructions:
+        return None
+    return append_genome(archive_filepath, instructions, fitness, generation, level_hash,
+                         max_instructions=max(DEFAULT_MAX_INSTRUCTIONS, len(instructions)))
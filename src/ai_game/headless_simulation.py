@@ -0,0 +1,498 @@
+from bisect import bisect_left, bisect_right
+
+from src.core import level
+
+
+SCREEN_WIDTH, SCREEN_HEIGHT = 800, 600
+FPS = 60
+GRAVITY = 0.8
+JUMP_STRENGTH = -15
+PLAYER_SPEED = 5
+
+MAX_ACTION_DURATION_FRAMES = 30 # Koliko maksimalno frameova traje jedna AI akcija
+
+# Fizika igrača (Player) preslikana na obične brojeve - bez pygamea, ekrana i učitavanja slika
+MAX_FALL_SPEED = 15
+PLAYER_SIZE = int(50 * 1.5) # Player skalira 50x50 faktorom 1.5
+PLAYER_SCREEN_X = 100 # Igrač je u simulaciji uvijek na istoj x poziciji ekrana
+FALL_DEATH_Y = SCREEN_HEIGHT + 200 # Igrač je pao s ekrana kad mu je vrh ispod ove granice
+STAGNATION_LIMIT_MAX_X = 240 # Limit frameova stagnacije prije prekida simulacije
+COLLISION_EPSILON = 1
+
+FALL_FITNESS = -300000.0 # Velika kazna za pad
+
+EXIT_INSTRUCTIONS = "instructions" # Nema više instrukcija
+EXIT_FALL = "fall"
+EXIT_STAGNATION = "stagnation"
+EXIT_WIN = "win"
+EXIT_PRUNED = "pruned" # Prekinuto jer mozak više ne može doseći granicu selekcije
+
+PRUNE_MARGIN = 1.0 # Sigurnosna razlika pri usporedbi gornje granice fitnessa s granicom selekcije
+
+# Simulacija po događajima: frameovi u kojima se ne može dogoditi ništa osim gravitacije i pomaka po x osi
+# (nema preklapanja s platformom ili ciljem, pada, stagnacije ni nove instrukcije) preskaču se odjednom.
+# Daje točno iste rezultate kao simulacija frame po frame; frameovi s događajem se i dalje simuliraju pojedinačno.
+EVENT_STEPPING = True
+GRAVITY_TABLE_FRAMES = 128 # Najviše frameova leta preskočenih odjednom
+MAX_GRAVITY_TABLES = 4096
+
+
+class SimulationResult:
+    def __init__(self):
+        self.exit_reason = None
+        self.max_world_x = 0.0 # Najdalja dosegnuta x koordinata
+        self.total_left_movement = 0.0 # Ukupno kretanje ulijevo, koristi se za penalizaciju
+        self.final_world_x = 0.0
+        self.frames_survived = 0
+        self.instructions_used = 0 # Koliko je instrukcija mozak dohvatio (current_instruction_number)
+        self.fitness_bound = None # Gornja granica fitnessa prekinute simulacije
+        self.frames_skipped = 0 # Frameovi preostalih instrukcija u trenutku prekida
+
+    @property
+    def fell(self):
+        return self.exit_reason == EXIT_FALL
+
+    @property
+    def won(self):
+        return self.exit_reason == EXIT_WIN
+
+    @property
+    def pruned(self):
+        return self.exit_reason == EXIT_PRUNED
+
+
+def quantize_instructions(instructions):
+    # Simulacija koristi samo (skok, broj frameova, smjer) pa se instrukcije svode na te vrijednosti
+    if hasattr(instructions, "quantize"): # Genom spremljen u poljima (ArrayBrain)
+        return instructions.quantize(MAX_ACTION_DURATION_FRAMES)
+    return [(bool(action.is_jump), int(action.hold_time * MAX_ACTION_DURATION_FRAMES), action.x_direction)
+            for action in instructions]
+
+
+def _suffix_bounds(actions):
+    """Sažetak preostalih instrukcija od svake granice, za gornju granicu fitnessa.
+
+    Pomak po x osi ne ovisi o sudarima, pa je putanja world_x unaprijed poznata. Za svaku granicu idx računa se:
+    broj preostalih frameova, raspon položaja relativno na world_x na granici, te najveći doprinos fitnessu
+    (1.5 * relativni maksimum - 5 * kretanje ulijevo + 0.01 * frameovi) po svim mogućim trenucima završetka.
+    rest_gain je isti doprinos bez nagrade za udaljenost, za slučaj kad ostaje dosadašnji max_world_x.
+    """
+    count = len(actions)
+    total = [0] * (count + 1)
+    min_offset = [0] * (count + 1)
+    max_offset = [0] * (count + 1)
+    reach_gain = [0.0] * (count + 1)
+    rest_gain = [0.0] * (count + 1)
+    for idx in range(count - 1, -1, -1):
+        _, frames, x_direction = actions[idx]
+        frames = max(frames, 1) # Instrukcija traje barem jedan frame
+        shift = PLAYER_SPEED * x_direction * frames
+        left_penalty = 5.0 * PLAYER_SPEED * frames if x_direction == -1 else 0.0
+        survival = 0.01 * frames
+        total[idx] = total[idx + 1] + frames
+        min_offset[idx] = min(0, shift, shift + min_offset[idx + 1])
+        max_offset[idx] = max(0, shift, shift + max_offset[idx + 1])
+        # Unutar instrukcije doprinos je linearan, pa je najveći na jednom od njenih krajeva
+        if x_direction == 1:
+            own_reach_gain = 1.5 * shift + survival
+        elif x_direction == -1:
+            own_reach_gain = 0.0
+        else:
+            own_reach_gain = survival
+        own_rest_gain = 0.0 if x_direction == -1 else survival
+        rest_gain[idx] = max(own_rest_gain, survival - left_penalty + rest_gain[idx + 1])
+        reach_gain[idx] = max(own_reach_gain,
+                              1.5 * max(0, shift) + survival - left_penalty + rest_gain[idx + 1],
+                              1.5 * shift + survival - left_penalty + reach_gain[idx + 1])
+    return total, min_offset, max_offset, reach_gain, rest_gain
+
+
+def _win_range(goal):
+    # Raspon world_x u kojem se igrač po x osi može preklapati s ciljem (s rezervom od jednog piksela)
+    if not goal or not goal[2] or not goal[3]:
+        return None
+    goal_x, _, goal_w, _ = goal
+    return (goal_x - PLAYER_SCREEN_X - PLAYER_SIZE - 1, goal_x + goal_w - PLAYER_SCREEN_X + 1)
+
+
+def fitness_upper_bound(bounds, instruction_idx, world_x, max_world_x, total_left_movement, frames_survived, previous_fitness=0.0):
+    """Najveći fitness koji compute_fitness može dati ishodu bez pobjede od granice instruction_idx nadalje.
+
+    bounds je rezultat _suffix_bounds; pad i kazne samo smanjuju fitness, pa se zanemaruju.
+    """
+    if previous_fitness == FALL_FITNESS:
+        return FALL_FITNESS
+    _, _, _, reach_gain, rest_gain = bounds
+    gain = max(max_world_x * 1.5 + rest_gain[instruction_idx], world_x * 1.5 + reach_gain[instruction_idx])
+    return max(gain - total_left_movement * 5.0 + frames_survived * 0.01, FALL_FITNESS)
+
+
+_gravity_tables = {}
+
+
+def _gravity_table(vel_y):
+    """Brzine i ukupni pomaci po y osi za GRAVITY_TABLE_FRAMES frameova leta od brzine vel_y.
+
+    Vrijednosti nastaju istim zbrajanjem kao u simulaciji, pa su jednake i zaokruživanjem.
+    Pomak najprije pada (uspon), a zatim raste, pa se za pretraživanje dijeli na dva monotona dijela.
+    """
+    table = _gravity_tables.get(vel_y)
+    if table is not None:
+        return table
+    velocities = [vel_y]
+    offsets = [0]
+    velocity = vel_y
+    for _ in range(GRAVITY_TABLE_FRAMES):
+        velocity += GRAVITY
+        if velocity > MAX_FALL_SPEED:
+            velocity = MAX_FALL_SPEED
+        velocities.append(velocity)
+        offsets.append(offsets[-1] + int(velocity))
+    apex = sum(1 for velocity in velocities[1:] if int(velocity) < 0) # Zadnji frame uspona
+    rising = [-offset for offset in offsets[:apex + 1]] # Rastuće, za bisect
+    falling = offsets[apex:]
+    table = (velocities, offsets, apex, rising, falling)
+    if len(_gravity_tables) < MAX_GRAVITY_TABLES:
+        _gravity_tables[vel_y] = table
+    return table
+
+
+def _x_overlap_frames(box_x, box_w, world_x, x_direction):
+    # Raspon frameova j (od trenutnog stanja) u kojima se igrač po x osi preklapa s pravokutnikom
+    offset = int(box_x - world_x) # Lijevi rub pravokutnika na ekranu nakon j frameova: offset - PLAYER_SPEED * x_direction * j
+    low = PLAYER_SCREEN_X - box_w # Preklapanje: low < lijevi rub < high
+    high = PLAYER_SCREEN_X + PLAYER_SIZE
+    if x_direction == 0:
+        return (0, GRAVITY_TABLE_FRAMES) if low < offset < high else (1, 0)
+    if x_direction == 1:
+        return (offset - high) // PLAYER_SPEED + 1, -((low - offset) // PLAYER_SPEED) - 1
+    return (low - offset) // PLAYER_SPEED + 1, -((offset - high) // PLAYER_SPEED) - 1
+
+
+def _first_y_overlap(table, player_top, low, high, first, last):
+    # Prvi frame j iz [first, last] u kojem je low < vrh igrača < high, ili None
+    _, _, apex, rising, falling = table
+    low -= player_top
+    high -= player_top
+    if first <= apex: # Uspon: pomak pada s j
+        start = max(first, bisect_right(rising, -high))
+        if start <= min(last, apex, bisect_left(rising, -low) - 1):
+            return start
+    start = max(first, apex + bisect_right(falling, low)) # Pad: pomak raste s j
+    if start <= min(last, apex + bisect_left(falling, high) - 1):
+        return start
+    return None
+
+
+def _first_contact(table, player_top, box, first, last):
+    # Prvi frame iz [first, last] u kojem sudar s pravokutnikom postavlja igrača (dosjed ili udarac glavom), ili None
+    velocities, offsets, _, _, _ = table
+    _, box_y, _, box_h = box
+    box_bottom = box_y + box_h
+    frame = _first_y_overlap(table, player_top, box_y - PLAYER_SIZE, box_bottom, first, last)
+    if frame is None:
+        return None
+    for frame in range(frame, last + 1):
+        top = player_top + offsets[frame]
+        bottom = top + PLAYER_SIZE
+        if not (top < box_bottom and box_y < bottom):
+            continue # Bočno preklapanje, sudar ga preskače
+        vel_y = velocities[frame]
+        step_y = int(vel_y)
+        if vel_y >= 0 and bottom - step_y <= box_y + COLLISION_EPSILON:
+            return frame
+        if vel_y < 0 and top - step_y >= box_bottom - COLLISION_EPSILON:
+            return frame
+    return None
+
+
+def _free_flight_frames(table, player_top, world_x, x_direction, frame_limit, boxes, candidates, goal):
+    """Broj idućih frameova leta (najviše frame_limit) bez sudara s platformom, dodira cilja i pada."""
+    _, _, apex, _, falling = table
+    frame_limit = min(frame_limit, apex + bisect_right(falling, FALL_DEATH_Y - player_top) - 1)
+    obstacles = [(boxes[platform_idx], True) for platform_idx in candidates]
+    if goal and goal[2] and goal[3]:
+        obstacles.append((goal, False))
+    for box, is_platform in obstacles:
+        first, last = _x_overlap_frames(box[0], box[2], world_x, x_direction)
+        first = max(first, 1)
+        last = min(last, frame_limit)
+        if first > last:
+            continue
+        if is_platform:
+            frame = _first_contact(table, player_top, box, first, last)
+        else: # Cilj završava simulaciju čim se preklopi s igračem
+            frame = _first_y_overlap(table, player_top, box[1] - PLAYER_SIZE, box[1] + box[3], first, last)
+        if frame is not None:
+            frame_limit = frame - 1
+    return frame_limit
+
+
+def _walking_cycles(player_top, world_x, x_direction, cycle_limit, boxes, candidates, goal):
+    """Broj idućih ciklusa hoda po ravnom tlu (najviše cycle_limit).
+
+    Igrač koji stoji na platformi u prvom frameu ciklusa ne promijeni visinu (int(0.8) == 0) i ne dodiruje
+    platformu, a u drugom propadne jedan piksel i vrati se na nju. Ciklus vrijedi dok je u svakom drugom frameu
+    ispod igrača neka platforma iste visine i dok se igrač ne preklapa s ciljem ni s platformom piksel višom od tla.
+    Ostale platforme koje se preklapaju s igračem (bočno) sudar preskače, pa ne mijenjaju ishod.
+    """
+    ground_y = player_top + PLAYER_SIZE
+    frame_limit = 2 * cycle_limit
+    supports = []
+    obstacles = [(boxes[platform_idx], True) for platform_idx in candidates]
+    if goal and goal[2] and goal[3]:
+        obstacles.append((goal, False))
+    for (box_x, box_y, box_w, box_h), is_platform in obstacles:
+        first, last = _x_overlap_frames(box_x, box_w, world_x, x_direction)
+        first = max(first, 1)
+        last = min(last, frame_limit)
+        if first > last:
+            continue
+        if not is_platform:
+            if box_y - PLAYER_SIZE < player_top + 1 and player_top < box_y + box_h:
+                frame_limit = first - 1
+        elif box_y == ground_y:
+            supports.append((first, last))
+        elif box_y == ground_y - 1: # Jedina druga visina na koju sudar može postaviti igrača
+            frame_limit = first - 1
+    supports.sort()
+    covered = 0 # Zadnji drugi frame ciklusa do kojeg je igrač stalno poduprt
+    for first, last in supports:
+        if first > covered + 2:
+            break
+        if last >= covered + 2:
+            covered = max(covered, last - last % 2)
+    return min(covered, frame_limit) // 2
+
+
+def simulate_actions(actions, compiled_level, start_index=0, start_state=None, snapshots=None, trace=None,
+                     fitness_cutoff=None, previous_fitness=0.0, event_stepping=None):
+    """Simulira kvantizirane instrukcije frame po frame, jednako kao run_simulation_for_brain.
+
+    start_state je snapshot stanja na granici instrukcije start_index (nastavak simulacije);
+    ako je zadana lista snapshots, u nju se dodaje stanje na svakoj granici instrukcija.
+    Ako je zadana lista trace, u nju se za svaki iscrtani frame dodaje (world_x, player_top, x_direction, broj instrukcije).
+    Ako je zadan fitness_cutoff, simulacija se prekida (EXIT_PRUNED) čim ni najbolji mogući ishod
+    preostalih instrukcija ne može doseći tu granicu.
+    event_stepping (zadano EVENT_STEPPING) preskače frameove bez događaja; s listom trace se ne koristi.
+    """
+    result = SimulationResult()
+    platforms = compiled_level.platforms
+    boxes = compiled_level.collision_boxes
+    platform_index = compiled_level.platform_index
+    goal = compiled_level.goal
+
+    player_top = int(SCREEN_HEIGHT - PLAYER_SIZE - 70)
+    if platforms:
+        player_top = int(platforms[0][1] - PLAYER_SIZE)
+    player_left = PLAYER_SCREEN_X
+    player_right = player_left + PLAYER_SIZE
+    vel_y = 0
+    on_ground = bool(platforms)
+
+    world_x = 0.0
+    max_world_x = 0.0
+    total_left_movement = 0.0
+    last_check_world_x = world_x
+    stagnation_frames = 0
+    frames_survived = 0
+
+    if start_state is not None:
+        (player_top, vel_y, on_ground, world_x, max_world_x, total_left_movement,
+         last_check_world_x, stagnation_frames, frames_survived) = start_state
+
+    instruction_count = len(actions)
+    instruction_idx = start_index
+    is_jump = False
+    x_direction = 0
+    action_frames_remaining = 0
+    jump_executed = False
+
+    if fitness_cutoff is not None:
+        bounds = _suffix_bounds(actions)
+        win_range = _win_range(goal)
+    if event_stepping is None:
+        event_stepping = EVENT_STEPPING
+    event_stepping = event_stepping and trace is None # Trag treba svaki frame
+
+    while True:
+        if action_frames_remaining <= 0: # Vrijeme je za sljedeću AI akciju
+            if snapshots is not None: # Stanje na granici ovisi samo o dosad izvršenim instrukcijama
+                snapshots.append((player_top, vel_y, on_ground, world_x, max_world_x, total_left_movement,
+                                  last_check_world_x, stagnation_frames, frames_survived))
+            if instruction_idx >= instruction_count:
+                result.exit_reason = EXIT_INSTRUCTIONS
+                break
+            if fitness_cutoff is not None:
+                can_win = (win_range is not None and world_x + bounds[2][instruction_idx] >= win_range[0] and
+                           world_x + bounds[1][instruction_idx] <= win_range[1])
+                if not can_win:
+                    bound = fitness_upper_bound(bounds, instruction_idx, world_x, max_world_x,
+                                                total_left_movement, frames_survived, previous_fitness)
+                    if bound + PRUNE_MARGIN < fitness_cutoff:
+                        result.exit_reason = EXIT_PRUNED
+                        result.fitness_bound = bound
+                        result.frames_skipped = bounds[0][instruction_idx]
+                        break
+            is_jump, action_frames_remaining, x_direction = actions[instruction_idx]
+            instruction_idx += 1
+            jump_executed = False
+
+        if event_stepping and not (is_jump and on_ground and not jump_executed):
+            frame_limit = min(max(action_frames_remaining, 1), GRAVITY_TABLE_FRAMES)
+            if x_direction == 0:
+                frame_limit = min(frame_limit, STAGNATION_LIMIT_MAX_X - stagnation_frames)
+            sweep = PLAYER_SPEED * x_direction * frame_limit
+            sweep_left = world_x + min(sweep, 0) + PLAYER_SCREEN_X
+            candidates = platform_index.query(sweep_left, sweep_left + abs(sweep) + PLAYER_SIZE)
+            skipped = 0
+            if on_ground and vel_y == 0 and player_top + 1 <= FALL_DEATH_Y:
+                skipped = 2 * _walking_cycles(player_top, world_x, x_direction, frame_limit // 2, boxes, candidates, goal)
+            if not skipped:
+                table = _gravity_table(vel_y)
+                skipped = _free_flight_frames(table, player_top, world_x, x_direction, frame_limit, boxes, candidates, goal)
+                if skipped > 0:
+                    vel_y = table[0][skipped]
+                    player_top += table[1][skipped]
+                    on_ground = False
+            if skipped > 0:
+                world_x += PLAYER_SPEED * x_direction * skipped
+                if x_direction == -1:
+                    total_left_movement += PLAYER_SPEED * skipped
+                if world_x > max_world_x:
+                    max_world_x = world_x
+                stagnation_frames = stagnation_frames + skipped if x_direction == 0 else 0
+                last_check_world_x = world_x
+                action_frames_remaining -= skipped
+                frames_survived += skipped
+                if action_frames_remaining <= 0:
+                    continue
+
+        if is_jump and on_ground and not jump_executed:
+            vel_y = JUMP_STRENGTH
+            on_ground = False
+            jump_executed = True
+
+        # Player.apply_gravity
+        vel_y += GRAVITY
+        if vel_y > MAX_FALL_SPEED:
+            vel_y = MAX_FALL_SPEED
+        player_top += int(vel_y)
+
+        if player_top > FALL_DEATH_Y:
+            result.exit_reason = EXIT_FALL
+            break
+
+        if x_direction == 1:
+            world_x += PLAYER_SPEED
+        elif x_direction == -1:
+            world_x -= PLAYER_SPEED
+            total_left_movement += PLAYER_SPEED
+
+        if world_x > max_world_x:
+            max_world_x = world_x
+            stagnation_frames = 0
+        elif abs(world_x - last_check_world_x) < 1.0:
+            stagnation_frames += 1
+        if abs(world_x - last_check_world_x) >= 1.0:
+            stagnation_frames = 0
+        last_check_world_x = world_x
+
+        if stagnation_frames > STAGNATION_LIMIT_MAX_X:
+            result.exit_reason = EXIT_STAGNATION
+            break
+
+        # Player.collide_with_platform protiv platformi blizu igrača, do prvog uspješnog sudara
+        on_ground = False
+        player_bottom = player_top + PLAYER_SIZE
+        step_y = int(vel_y)
+        player_world_left = world_x + PLAYER_SCREEN_X
+        for platform_idx in platform_index.query(player_world_left, player_world_left + PLAYER_SIZE):
+            plat_x, plat_y, plat_w, plat_h = boxes[platform_idx]
+            left = int(plat_x - world_x)
+            plat_bottom = plat_y + plat_h
+            if not (player_left < left + plat_w and left < player_right and
+                    player_top < plat_bottom and plat_y < player_bottom):
+                continue
+            if vel_y >= 0 and player_bottom >= plat_y and player_bottom - step_y <= plat_y + COLLISION_EPSILON:
+                if player_bottom > plat_y:
+                    player_top = plat_y - PLAYER_SIZE
+                    vel_y = 0
+                    on_ground = True
+                    break
+            if vel_y < 0 and player_top <= plat_bottom and player_top - step_y >= plat_bottom - COLLISION_EPSILON:
+                player_top = plat_bottom
+                vel_y = 0
+                on_ground = True
+                break
+
+        if goal:
+            goal_x, goal_y, goal_w, goal_h = goal
+            goal_left = int(goal_x - world_x)
+            player_bottom = player_top + PLAYER_SIZE
+            if (goal_w and goal_h and player_left < goal_left + goal_w and goal_left < player_right and
+                    player_top < goal_y + goal_h and goal_y < player_bottom):
+                result.exit_reason = EXIT_WIN
+                break
+
+        if trace is not None: # Stanje koje bi run_simulation_for_brain iscrtao u ovom frame-u
+            trace.append((world_x, player_top, x_direction, instruction_idx))
+
+        action_frames_remaining -= 1
+        frames_survived += 1
+
+    result.max_world_x = max_world_x
+    result.total_left_movement = total_left_movement
+    result.final_world_x = world_x
+    result.frames_survived = frames_survived
+    result.instructions_used = instruction_idx
+    return result
+
+
+def compute_fitness(result, instruction_count, previous_fitness=0.0):
+    """Formula fitnessa s kraja run_simulation_for_brain; previous_fitness je brain.fitness prije simulacije."""
+    if result.pruned: # Gornja granica je ispod granice selekcije, pa sortiranje i odabir roditelja ostaju isti
+        return result.fitness_bound
+    if result.fell:
+        return FALL_FITNESS
+
+    fitness = result.max_world_x * 1.5 # Nagrada za udaljenost
+    penalty_factor_left_movement = 5.0
+    fitness -= result.total_left_movement * penalty_factor_left_movement # Kazna za kretanje ulijevo
+
+    if result.final_world_x < -100: # Dodatna kazna ako završi daleko lijevo od početka
+        fitness -= 20000
+
+    if result.won:
+        fitness += 2000000.0 # Velika nagrada za pobjedu
+        fitness += (instruction_count - result.instructions_used) * 200 # Bonus za preostale neiskorištene instrukcije (brzina)
+    else:
+        if result.max_world_x < 50: # Kazna ako nije prešao ni početak
+            fitness -= 50000
+        elif previous_fitness != FALL_FITNESS:
+            fitness += result.frames_survived * 0.01 # Mala nagrada za preživljavanje
+
+    if previous_fitness == FALL_FITNESS and not result.won: # Original zadržava staru kaznu za pad
+        return previous_fitness
+    return fitness
+
+
+def simulate_brain(brain, level_filepath, checkpoint_cache=None, fitness_cutoff=None):
+    # Simulira mozak bez mijenjanja njegovog stanja
+    compiled_level = level.load_level(SCREEN_WIDTH, SCREEN_HEIGHT, level_filepath)
+    actions = quantize_instructions(brain.instructions)
+    if checkpoint_cache is None:
+        return simulate_actions(actions, compiled_level, fitness_cutoff=fitness_cutoff, previous_fitness=brain.fitness)
+
+    parent_actions = None
+    if brain.parent_instructions is not None:
+        parent_actions = quantize_instructions(brain.parent_instructions)
+    return checkpoint_cache.simulate(actions, compiled_level, parent_actions, fitness_cutoff, brain.fitness)
+
+
+def run_headless_simulation(brain, level_filepath, checkpoint_cache=None):
+    result = simulate_brain(brain, level_filepath, checkpoint_cache)
+    brain.current_instruction_number = result.instructions_used
+    brain.fitness = compute_fitness(result, len(brain.instructions), brain.fitness)
+    brain.won = result.won
+    return brain.fitness
@@ -0,0 +1,214 @@
+import multiprocessing
+import queue
+import random
+import time
+import traceback
+
+from . import main_ai
+from . import array_brain
+from .ai_brain import Brain
+from .headless_simulation import SCREEN_WIDTH, SCREEN_HEIGHT, simulate_brain, compute_fitness
+from .fitness_cache import FitnessCache, genome_key
+from .multi_level import LevelSuite, AGGREGATION_MEAN
+from src.core import level
+
+# Model otoka: island_count nezavisnih populacija, svaka u svom procesu, s istim elitizmom, selekcijom i mutacijom
+# kao run_genetic_algorithm (main_ai.breed_next_generation). Svakih migration_interval generacija otok šalje kopije
+# svojih migration_count najboljih mozgova susjedima (prsten ili potpuno povezani otoci). Ni slanje ni primanje ne
+# čekaju: otok u sljedeću generaciju uključi migrante koji su do tada stigli, pa otoci nemaju zajedničku granicu
+# generacija. Prvi otok čiji mozak dođe do cilja (na paketu levela: na svakom levelu) postavlja zajednički događaj
+# i zaustavlja sve otoke.
+
+TOPOLOGY_RING = "ring" # Otok i šalje otoku i + 1
+TOPOLOGY_FULL = "full" # Svaki otok šalje svim ostalima
+TOPOLOGIES = (TOPOLOGY_RING, TOPOLOGY_FULL)
+
+MIGRATION_INTERVAL = 5 # Svakih koliko generacija otok šalje migrante
+MIGRATION_COUNT = 2 # Koliko najboljih mozgova otok šalje svakom susjedu
+RESULT_POLL_SECONDS = 0.5
+
+
+def neighbours(island_idx, island_count, topology):
+    # Otoci kojima otok island_idx šalje migrante
+    if topology == TOPOLOGY_FULL:
+        return [other for other in range(island_count) if other != island_idx]
+    return [(island_idx + 1) % island_count] if island_count > 1 else []
+
+
+def _migrant(brain):
+    migrant = brain.clone()
+    migrant.fitness = brain.fitness
+    migrant.won = brain.won
+    return migrant
+
+
+def _evolve_island(island_idx, config, inboxes, stop_event):
+    random.seed(config["seed"])
+    use_array_genomes = config["array_genomes"] and array_brain.is_available()
+    brain_class = array_brain.ArrayBrain if use_array_genomes else Brain
+    if use_array_genomes:
+        array_brain.seed(random.getrandbits(64))
+
+    inbox = inboxes[island_idx]
+    targets = [inboxes[other] for other in config["neighbours"]]
+    for target in targets:
+        target.cancel_join_thread() # Neisporučeni migranti ne smiju zadržati završetak procesa
+
+    level_suite = None
+    if config["level_filepaths"]:
+        level_suite = LevelSuite(config["level_filepaths"], config["level_aggregation"], config["level_weights"])
+        level_hash = level_suite.level_hash
+    else:
+        level_hash = level.load_level(SCREEN_WIDTH, SCREEN_HEIGHT, config["level_filepath"]).level_hash
+    fitness_cache = FitnessCache()
+
+    population_size = config["population_size"]
+    population = [brain_class(main_ai.INSTRUCTION_COUNT) for _ in range(population_size)]
+    report = {"island": island_idx, "generations": 0, "best_fitness": -float('inf'), "best_brain": None,
+              "won": False, "winner": None, "immigrants": 0, "stats": []}
+    start_time = time.perf_counter()
+
+    for gen_num in range(config["generations"]):
+        if stop_event.is_set(): # Drugi otok je pobijedio
+            break
+        evaluated = 0
+        for brain_agent in population:
+            if stop_event.is_set():
+                break
+            key = genome_key(brain_agent.instructions, level_hash)
+            result = fitness_cache.get(key)
+            if result is None:
+                if level_suite is not None:
+                    result = level_suite.simulate(brain_agent)
+                else:
+                    result = simulate_brain(brain_agent, config["level_filepath"])
+                fitness_cache.put(key, result)
+            brain_agent.current_instruction_number = result.instructions_used
+            if level_suite is not None:
+                brain_agent.fitness = level_suite.fitness(result, len(brain_agent.instructions), brain_agent.fitness)
+            else:
+                brain_agent.fitness = compute_fitness(result, len(brain_agent.instructions), brain_agent.fitness)
+            brain_agent.won = result.won
+            evaluated += 1
+            if brain_agent.won:
+                report["won"] = True
+                report["winner"] = _migrant(brain_agent)
+                stop_event.set()
+                break
+        if evaluated < len(population) and not report["won"]:
+            break # Prekinuta generacija se ne boduje
+
+        population.sort(key=lambda b: b.fitness, reverse=True)
+        report["generations"] = gen_num + 1
+        if population[0].fitness > report["best_fitness"]:
+            report["best_fitness"] = population[0].fitness
+            report["best_brain"] = _migrant(population[0])
+        report["stats"].append({
+            "island": island_idx,
+            "generation": gen_num + 1,
+            "best_fitness": population[0].fitness,
+            "avg_fitness": sum(b.fitness for b in population) / len(population),
+            "fitness_cache": fitness_cache.stats(),
+        })
+        fitness_cache.reset_stats()
+        if report["won"]:
+            break
+
+        if targets and (gen_num + 1) % config["migration_interval"] == 0:
+            emigrants = [_migrant(brain) for brain in population[:config["migration_count"]]]
+            for target in targets:
+                target.put(emigrants)
+
+        population = main_ai.breed_next_generation(population, brain_class, use_array_genomes, population_size)
+
+        immigrants = []
+        while True:
+            try:
+                immigrants.extend(inbox.get_nowait())
+            except queue.Empty:
+                break
+        immigrants = immigrants[:max(0, population_size - main_ai.ELITISM_COUNT)]
+        for immigrant in immigrants: # Fitness s tuđeg otoka ne smije utjecati na compute_fitness (prenesena kazna za pad)
+            immigrant.fitness = 0.0
+            immigrant.won = False
+        if immigrants: # Migranti zamjenjuju zadnju djecu, elite ostaju
+            population[len(population) - len(immigrants):] = immigrants
+            report["immigrants"] += len(immigrants)
+            report["stats"][-1]["immigrants"] = len(immigrants)
+
+    report["seconds"] = time.perf_counter() - start_time
+    return report
+
+
+def _island_worker(island_idx, config, inboxes, results_queue, stop_event):
+    try:
+        report = _evolve_island(island_idx, config, inboxes, stop_event)
+    except Exception as e:
+        report = {"island": island_idx, "generations": 0, "best_fitness": -float('inf'), "best_brain": None,
+                  "won": False, "winner": None, "immigrants": 0, "stats": [], "error": traceback.format_exc()}
+    results_queue.put(report)
+
+
+def run_islands(island_count, generations=None, migration_interval=MIGRATION_INTERVAL, migration_count=MIGRATION_COUNT,
+                topology=TOPOLOGY_RING, population_size=None, level_filepath=None, level_filepaths=None,
+                level_aggregation=AGGREGATION_MEAN, level_weights=None, array_genomes=False):
+    """Evoluira island_count populacija u zasebnim procesima; vraća izvještaje otoka, najbolji prvi.
+
+    Sjeme svakog otoka dolazi iz random modula, pa random.seed određuje početne populacije;
+    trenutak dolaska migranata ovisi o brzini procesa.
+    """
+    if topology not in TOPOLOGIES:
+        raise ValueError(f"Nepoznata topologija otoka: {topology}")
+    level_filepath = level_filepath or main_ai.LEVEL_FILEPATH
+    if level_filepaths: # Leveli se prevode prije stvaranja procesa, koji ih nasljeđuju
+        LevelSuite(level_filepaths, level_aggregation, level_weights).load()
+    else:
+        level.load_level(SCREEN_WIDTH, SCREEN_HEIGHT, level_filepath)
+
+    inboxes = [multiprocessing.Queue() for _ in range(island_count)]
+    results_queue = multiprocessing.Queue()
+    stop_event = multiprocessing.Event()
+    processes = []
+    for island_idx in range(island_count):
+        config = {
+            "seed": random.getrandbits(64),
+            "generations": main_ai.NUM_GENERATIONS if generations is None else generations,
+            "population_size": population_size or main_ai.POPULATION_SIZE,
+            "migration_interval": max(1, migration_interval),
+            "migration_count": migration_count,
+            "neighbours": neighbours(island_idx, island_count, topology),
+            "level_filepath": level_filepath,
+            "level_filepaths": level_filepaths,
+            "level_aggregation": level_aggregation,
+            "level_weights": level_weights,
+            "array_genomes": array_genomes,
+        }
+        process = multiprocessing.Process(target=_island_worker, args=(island_idx, config, inboxes, results_queue, stop_event),
+                                          daemon=True)
+        process.start()
+        processes.append(process)
+
+    reports = []
+    while len(reports) < island_count:
+        try:
+            reports.append(results_queue.get(timeout=RESULT_POLL_SECONDS))
+        except queue.Empty:
+            if not any(process.is_alive() for process in processes): # Otok bez izvještaja se srušio
+                try:
+                    while len(reports) < island_count:
+                        reports.append(results_queue.get(timeout=RESULT_POLL_SECONDS))
+                except queue.Empty:
+                    pass
+                break
+
+    stop_event.set()
+    for process in processes:
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+    for inbox in inboxes:
+        inbox.cancel_join_thread()
+        inbox.close()
+
+    reports.sort(key=lambda report: report["best_fitness"], reverse=True)
+    return reports
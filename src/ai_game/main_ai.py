@@ -1,11 +1,29 @@
-import pygame
 import os
 import random
 import sys
 import pickle
+import multiprocessing
+import threading
+import time
 
 from .ai_brain import Brain, AIAction
-from .game_simulation import run_simulation_for_brain
+from . import array_brain
+from src.core import level
+try:
+    from .game_simulation import run_simulation_for_brain
+except ImportError: # pygame treba samo za iscrtavanje; bez njega trening radi bez prikaza
+    run_simulation_for_brain = None
+from .headless_simulation import SCREEN_WIDTH, SCREEN_HEIGHT, simulate_brain, compute_fitness
+from .batch_simulation import simulate_population_results
+from .prefix_cache import PrefixCheckpointCache, MAX_CACHED_GENOMES
+from .fitness_cache import FitnessCache, genome_key
+from . import genome_archive
+from . import training_checkpoint
+from .spectator import SpectatorRenderer, record_replay
+from . import replay_file
+from .fitness_pruning import SelectionCutoff
+from .training_telemetry import GenerationTelemetry, JsonlTelemetrySink
+from .multi_level import LevelSuite, MultiLevelResult, AGGREGATION_MEAN
 
 
 POPULATION_SIZE = 80 # Broj jedinki (mozgova) u jednoj generaciji
@@ -14,6 +32,21 @@ MUTATION_RATE = 0.20 # Vjerojatnost mutacije pojedine instrukcije
 NEW_INSTRUCTION_CHANCE = 0.10 # Vjerojatnost da se instrukcija zamijeni potpuno novom
 ELITISM_COUNT = 12 # Broj najboljih jedinki koje direktno prelaze u sljedeću generaciju
 NUM_GENERATIONS = 1000 # Maksimalan broj generacija za treniranje
+WORKER_COUNT = 1 # Broj procesa za paralelnu evaluaciju (1 = serijski)
+BATCH_SIMULATION = False # Simulira cijelu generaciju odjednom (NumPy), umjesto mozak po mozak
+PREFIX_CHECKPOINTS = False # Djeca nastavljaju simulaciju iz snapshota roditelja (serijska evaluacija)
+FITNESS_CACHE = True # Mozgovi s već viđenim genomom ne simuliraju se ponovno
+ARRAY_GENOMES = False # Genomi u NumPy poljima (ArrayBrain) umjesto listi AIAction objekata
+CHECKPOINT_INTERVAL = 10 # Checkpoint treniranja se sprema svakih N generacija (0 = isključeno)
+SPECTATOR_RENDERING = True # Odabrani mozgovi prikazuju se u zasebnom procesu, trening uvijek radi bez iscrtavanja
+FITNESS_PRUNING = False # Prekida simulacije mozgova koji ne mogu ući u elite ni bazen roditelja (serijska evaluacija)
+TELEMETRY_FILEPATH = None # JSONL datoteka za telemetriju svake generacije (None = isključeno)
+LEVEL_FILEPATHS = None # Lista levela za evaluaciju na paketu levela (None = samo LEVEL_FILEPATH)
+LEVEL_AGGREGATION = AGGREGATION_MEAN # Kako se fitnessi po levelima spajaju u jedan: "mean", "min" ili "weighted"
+ISLAND_COUNT = 1 # Broj otoka (populacija u zasebnim procesima) s povremenom migracijom (1 = jedna populacija)
+ISLAND_TOPOLOGY = "ring" # Kome otoci šalju migrante: "ring" (sljedećem otoku) ili "full" (svima)
+STEADY_STATE = False # Evolucija bez granice generacija: svaka evaluacija odmah mijenja populaciju
+REPLAY_DIRECTORY = None # Mapa za datoteke snimki odabranih mozgova i najboljeg mozga (None = isključeno)
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 
@@ -23,11 +56,17 @@ LEVEL_FILEPATH = os.path.join(current_dir, "..", "core", LEVEL_FILENAME) #
 SAVED_BRAIN_FILENAME = "best_ai_path.pkl" 
 SAVED_BRAIN_FILEPATH = os.path.join(current_dir, SAVED_BRAIN_FILENAME)
 
+SAVED_ARCHIVE_FILENAME = "hall_of_fame.genomes" # Binarna arhiva svih pobjedničkih genoma
+SAVED_ARCHIVE_FILEPATH = os.path.join(current_dir, SAVED_ARCHIVE_FILENAME)
+
+CHECKPOINT_FILENAME = "training_checkpoint.pkl"
+CHECKPOINT_FILEPATH = os.path.join(current_dir, CHECKPOINT_FILENAME)
+
 
 def save_ai_instructions(instructions_list, filepath):
     try:
         with open(filepath, 'wb') as f:
-            pickle.dump(instructions_list, f) # Spremanje liste instrukcija pomoću pickle
+            pickle.dump(list(instructions_list), f) # Spremanje liste instrukcija pomoću pickle
     except Exception as e:
         pass # Greške pri spremanju se tiho ignoriraju
 
@@ -41,108 +80,555 @@ def load_ai_instructions(filepath):
     except Exception as e:
         return None # Ostale greške pri učitavanju također vraćaju None
 
+def archive_ai_instructions(instructions_list, fitness, generation, level_hash, filepath):
+    try:
+        genome_archive.append_genome(filepath, instructions_list, fitness, generation, level_hash)
+    except Exception as e: # Trening se nastavlja, ali izgubljeni pobjednik se ne smije prešutjeti
+        print(f"Pobjednički genom nije spremljen u arhivu {filepath}: {e}", file=sys.stderr)
+
+def load_archived_instructions(level_hash, archive_filepath, legacy_filepath):
+    # Najbolji genom iz arhive za zadani level; stara .pkl datoteka se pri prvom pokretanju uvozi u arhivu
+    if legacy_filepath and not os.path.exists(archive_filepath) and os.path.exists(legacy_filepath):
+        try:
+            genome_archive.import_legacy_pickle(legacy_filepath, archive_filepath, level_hash=level_hash)
+        except Exception as e:
+            pass
+    try:
+        with genome_archive.GenomeArchive(archive_filepath) as archive:
+            best_idx = archive.best_index(level_hash)
+            if best_idx is not None:
+                return archive.read(best_idx).instructions
+    except Exception as e:
+        pass # Arhiva ne postoji ili je neispravna
+    return load_ai_instructions(legacy_filepath) if legacy_filepath else None
+
+def save_training_checkpoint(state, filepath):
+    try:
+        training_checkpoint.save_checkpoint(state, filepath)
+    except Exception as e:
+        pass # Neuspjeli checkpoint ne prekida treniranje; prethodni ostaje netaknut
+
+def _publish_telemetry(telemetry, callbacks, record_args):
+    record = telemetry.to_record(*record_args)
+    for callback in callbacks:
+        try:
+            callback(record)
+        except Exception as e:
+            pass # Greška u callbacku ne prekida treniranje
+
+def _should_render_brain(gen_num, brain_idx):
+    if gen_num % 10 == 0 and brain_idx == 0: return True # Iscrtaj prvu jedinku svake 10. generacije
+    if gen_num < 5 and brain_idx < 3: return True # Iscrtaj prve 3 jedinke u prvih 5 generacija
+    return False
+
+def _can_render_in_process():
+    # pygame prozor smije otvarati samo glavna dretva; u pozadinskoj dretvi izbornika (start.py) prozor pripada izborniku
+    return threading.current_thread() is threading.main_thread()
+
+def _show_brain(brain, spectator, current_generation, brain_idx, level_filepath=None):
+    # Prikaz mozga u procesu promatrača ili, bez njega, iscrtanom simulacijom kao dosad
+    level_filepath = level_filepath or LEVEL_FILEPATH
+    if spectator is not None:
+        if spectator.is_alive(): # Ako je prozor promatrača zatvoren, snimka se ne radi
+            spectator.publish(record_replay(brain, level_filepath, current_generation, brain_idx))
+        return
+    if not _can_render_in_process(): # Bez promatrača se iz pozadinske dretve ništa ne prikazuje
+        return
+    run_simulation_for_brain(brain, level_filepath, render=True, current_generation=current_generation, brain_idx=brain_idx)
+
+def _save_replay(brain, replay_directory, filename, current_generation, brain_idx, level_filepath, level_hash):
+    # Snimka mozga za replay_viewer; ne iscrtava ništa, pa radi i u headless načinu
+    try:
+        replay = record_replay(brain, level_filepath, current_generation, brain_idx)
+        replay_file.write_replay(os.path.join(replay_directory, filename + replay_file.FILE_EXTENSION), replay, level_hash)
+    except Exception as e:
+        pass # Neuspjelo spremanje snimke ne prekida treniranje
+
+def _save_final_replay(best_brain_overall, replay_directory, level_filepath, level_hash):
+    if best_brain_overall and replay_directory:
+        _save_replay(best_brain_overall, replay_directory, "final_best", "FINALNI NAJBOLJI", 0, level_filepath, level_hash)
+
+def _show_final_brain(best_brain_overall, spectator, level_filepath):
+    if best_brain_overall:
+        # Prikaz najboljeg AI-a nakon završetka svih generacija (ili prijevremenog prekida zbog pobjede)
+        current_instructions_count = len(best_brain_overall.instructions)
+        target_instructions_display = int(INSTRUCTION_COUNT * 1.2) # Povećava broj instrukcija za prikaz, da AI ne stane prerano
+        if current_instructions_count < target_instructions_display :
+            needed_increase = target_instructions_display - current_instructions_count
+            if needed_increase > 0:
+                best_brain_overall.increase_moves(needed_increase)
+        _show_brain(best_brain_overall, spectator, "FINALNI NAJBOLJI", 0, level_filepath)
+    else:
+        # Ako nije pronađen nijedan zadovoljavajući AI (npr. ako NUM_GENERATIONS = 0)
+        pass
+
+def _run_island_model(island_count, island_topology, level_suite, level_hash, legacy_brain_filepath, array_genomes):
+    # Treniranje na otocima; vraća najbolji mozak svih otoka
+    global ai_has_won_session
+    from .island_model import run_islands # island_model koristi funkcije ovog modula
+    reports = run_islands(island_count, topology=island_topology, level_filepath=LEVEL_FILEPATH, array_genomes=array_genomes,
+                          level_filepaths=level_suite.level_filepaths if level_suite is not None else None,
+                          level_aggregation=level_suite.aggregation if level_suite is not None else LEVEL_AGGREGATION,
+                          level_weights=level_suite.weights if level_suite is not None else None)
+    errors = [f"otok {report['island']}:\n{report['error']}" for report in reports if report.get("error")]
+    if len(reports) < island_count:
+        errors.append(f"{island_count - len(reports)} otok(a) završilo je bez izvještaja")
+    for error in errors:
+        print(f"Greška u modelu otoka: {error}", file=sys.stderr)
+    if errors and all(report["best_brain"] is None for report in reports):
+        raise RuntimeError(f"Nijedan otok nije završio treniranje ({len(errors)} grešaka)")
+    for report in reports:
+        generation_stats.extend(report["stats"])
+    if not reports or reports[0]["best_brain"] is None:
+        return None
+    best_brain_overall = reports[0]["best_brain"]
+    winners = [report for report in reports if report["winner"] is not None]
+    if winners: # Pobjednik ima prednost pred većim agregiranim fitnessom mozga koji nije prošao sve levele
+        report = max(winners, key=lambda report: report["winner"].fitness)
+        best_brain_overall = report["winner"]
+        ai_has_won_session = True
+        if legacy_brain_filepath:
+            save_ai_instructions(best_brain_overall.instructions, legacy_brain_filepath) # Sprema pobjednički AI
+        archive_ai_instructions(best_brain_overall.instructions, best_brain_overall.fitness, report["generations"],
+                                level_hash, SAVED_ARCHIVE_FILEPATH)
+    return best_brain_overall
+
+def _run_steady_state(worker_count, level_suite, level_hash, legacy_brain_filepath, array_genomes,
+                      fitness_cache_enabled, telemetry_callbacks):
+    # Steady-state evolucija s istim brojem evaluacija kao NUM_GENERATIONS generacija; vraća najbolji mozak
+    global ai_has_won_session
+    from .steady_state import run_steady_state # steady_state koristi konstante ovog modula
+
+    def publish_progress(record):
+        generation_stats.append(record)
+        for callback in telemetry_callbacks:
+            try:
+                callback(record)
+            except Exception as e:
+                pass # Greška u callbacku ne prekida treniranje
+
+    ga = run_steady_state(NUM_GENERATIONS * POPULATION_SIZE, worker_count, level_filepath=LEVEL_FILEPATH,
+                          level_suite=level_suite, array_genomes=array_genomes,
+                          fitness_cache_enabled=fitness_cache_enabled, progress_callback=publish_progress)
+    if ga.won:
+        ai_has_won_session = True
+        if legacy_brain_filepath:
+            save_ai_instructions(ga.winner.instructions, legacy_brain_filepath) # Sprema pobjednički AI
+        archive_ai_instructions(ga.winner.instructions, ga.winner.fitness, ga.evaluations // POPULATION_SIZE + 1,
+                                level_hash, SAVED_ARCHIVE_FILEPATH)
+        return ga.winner
+    return ga.best_brain
+
+def _evaluate_brain_worker(task):
+    # Izvršava se u radnom procesu; vraća ishod simulacije jer se u proces šalje kopija mozga
+    brain, level_filepath = task
+    return simulate_brain(brain, level_filepath)
+
+def _evaluate_batch_worker(task):
+    brains, level_filepath = task
+    return simulate_population_results(brains, level_filepath)
+
+def _start_suite_evaluation(pool, brains, indices, worker_count, batch_simulation, level_suite):
+    # Evaluacija na paketu levela; parovi (mozak, level) raspoređuju se po procesima zajedno, bez čekanja level po level
+    level_count = len(level_suite)
+    if pool is None:
+        return lambda: dict(zip(indices, level_suite.simulate_population(brains)))
+
+    def group_results(level_results):
+        # level_results je lista ishoda po parovima, mozak po mozak
+        return dict(zip(indices, [MultiLevelResult(level_results[start:start + level_count])
+                                  for start in range(0, len(level_results), level_count)]))
+
+    if batch_simulation:
+        chunk_size = max(1, -(-len(brains) // worker_count))
+        chunks = [brains[start:start + chunk_size] for start in range(0, len(brains), chunk_size)]
+        tasks = [(chunk, filepath) for chunk in chunks for filepath in level_suite.level_filepaths]
+        async_result = pool.map_async(_evaluate_batch_worker, tasks)
+
+        def collect():
+            chunk_results = async_result.get()
+            level_results = []
+            for chunk_idx, chunk in enumerate(chunks):
+                per_level = chunk_results[chunk_idx * level_count:(chunk_idx + 1) * level_count]
+                for brain_results in zip(*per_level):
+                    level_results.extend(brain_results)
+            return group_results(level_results)
+        return collect
+
+    tasks = [(brain, filepath) for brain in brains for filepath in level_suite.level_filepaths]
+    chunksize = max(1, len(tasks) // (worker_count * 4))
+    async_result = pool.map_async(_evaluate_brain_worker, tasks, chunksize=chunksize)
+    return lambda: group_results(async_result.get())
+
+def _start_headless_evaluation(pool, population, indices, worker_count, batch_simulation, level_suite=None):
+    # Pokreće evaluaciju zadanih jedinki; vraća funkciju koja daje rječnik indeks -> SimulationResult
+    brains = [population[i] for i in indices]
+    if level_suite is not None:
+        return _start_suite_evaluation(pool, brains, indices, worker_count, batch_simulation, level_suite)
+
+    if pool is None: # Serijska evaluacija cijele generacije jednim pozivom
+        return lambda: dict(zip(indices, simulate_population_results(brains, LEVEL_FILEPATH)))
+
+    if batch_simulation: # Svaki proces dobiva svoj dio populacije i simulira ga odjednom
+        chunk_size = max(1, -(-len(brains) // worker_count))
+        tasks = [(brains[start:start + chunk_size], LEVEL_FILEPATH) for start in range(0, len(brains), chunk_size)]
+        async_result = pool.map_async(_evaluate_batch_worker, tasks)
+        return lambda: dict(zip(indices, [result for chunk in async_result.get() for result in chunk]))
+
+    tasks = [(brain, LEVEL_FILEPATH) for brain in brains]
+    chunksize = max(1, len(tasks) // (worker_count * 4))
+    async_result = pool.map_async(_evaluate_brain_worker, tasks, chunksize=chunksize)
+    return lambda: dict(zip(indices, async_result.get()))
+
+def breed_next_generation(population, brain_class, use_array_genomes, population_size=None, keep_parents=False):
+    # Elitizam, bazen roditelja i mutacija; population mora biti sortirana po fitnessu, najbolji prvi.
+    # keep_parents: djeca pamte instrukcije roditelja (samo za PrefixCheckpointCache)
+    population_size = population_size or POPULATION_SIZE
+    next_generation_brains = []
+    if population:
+        # Elitizam: Najbolje jedinke prelaze direktno
+        for i in range(ELITISM_COUNT):
+            if i < len(population):
+                next_generation_brains.append(population[i].clone(keep_parents))
+
+        num_to_generate = population_size - len(next_generation_brains) # Koliko novih jedinki treba stvoriti
+        parent_pool_size = population_size // 2 # Veličina bazena roditelja za križanje
+        parent_pool = population[:parent_pool_size] # Uzima se bolja polovica populacije kao roditelji
+        if not parent_pool: # Osigurava da bazen roditelja nije prazan
+            parent_pool = population[:max(1, ELITISM_COUNT if ELITISM_COUNT < len(population) else len(population))]
+
+
+        if use_array_genomes and parent_pool: # Sva djeca nastaju jednom operacijom nad blokom genoma
+            next_generation_brains.extend(array_brain.breed_children(parent_pool, num_to_generate, MUTATION_RATE, NEW_INSTRUCTION_CHANCE,
+                                                                     keep_parents))
+            num_to_generate = 0
+
+        for _ in range(num_to_generate): # Stvaranje novih jedinki križanjem i mutacijom
+            if parent_pool:
+                parent1 = random.choice(parent_pool) # Nasumični odabir roditelja
+                child = parent1.clone(keep_parents)
+                child.mutate(MUTATION_RATE, NEW_INSTRUCTION_CHANCE) # Mutacija djeteta
+                next_generation_brains.append(child)
+            else:
+                # Ako nema roditelja (npr. prva generacija ili greška), stvara nasumičnu jedinku
+                next_generation_brains.append(brain_class(INSTRUCTION_COUNT))
+        
+        population = next_generation_brains
+        while len(population) < population_size: # Dopunjava populaciju ako je manja od željene veličine
+            population.append(brain_class(INSTRUCTION_COUNT))
+    return population
+
 ai_has_won_session = False # Zastavica koja označava je li AI pobijedio u trenutnoj sesiji treniranja
+generation_stats = [] # Statistika cacheova za svaku generaciju zadnjeg treniranja
+
+def run_genetic_algorithm(worker_count=WORKER_COUNT, batch_simulation=BATCH_SIMULATION, prefix_checkpoints=PREFIX_CHECKPOINTS,
+                          fitness_cache_enabled=FITNESS_CACHE, array_genomes=ARRAY_GENOMES,
+                          checkpoint_interval=CHECKPOINT_INTERVAL, resume=False, spectator_rendering=SPECTATOR_RENDERING,
+                          fitness_pruning=FITNESS_PRUNING, telemetry_callback=None, telemetry_filepath=TELEMETRY_FILEPATH,
+                          level_filepaths=LEVEL_FILEPATHS, level_aggregation=LEVEL_AGGREGATION, level_weights=None,
+                          island_count=ISLAND_COUNT, island_topology=ISLAND_TOPOLOGY, steady_state=STEADY_STATE, headless=False,
+                          replay_directory=REPLAY_DIRECTORY, legacy_brain_filepath=SAVED_BRAIN_FILEPATH):
+    """Treniranje genetskim algoritmom; vraća najbolji pronađeni mozak (None ako se demonstrira spremljeni AI).
 
-def run_genetic_algorithm():
+    headless=True ništa ne iscrtava i ne otvara prozor, a spremljeni AI ne demonstrira nego uvijek trenira.
+    S replay_directory se snimke mozgova odabranih za prikaz (i u headless načinu) i najboljeg mozga spremaju
+    u datoteke za replay_viewer. Pobjednik se sprema u legacy_brain_filepath (None: samo u arhivu genoma).
+    """
     global ai_has_won_session
+    if resume and (island_count > 1 or steady_state): # Checkpoint sprema samo populaciju glavne petlje
+        raise ValueError("Nastavak iz checkpointa nije podržan za model otoka ni steady-state evoluciju")
     ai_has_won_session = False
+    del generation_stats[:]
+
+    checkpoint = training_checkpoint.load_checkpoint(CHECKPOINT_FILEPATH) if resume else None
+    if checkpoint is not None: # Nastavak treniranja koristi vrstu genoma iz checkpointa
+        array_genomes = checkpoint["array_genomes"]
+
+    use_array_genomes = array_genomes and array_brain.is_available()
+    brain_class = array_brain.ArrayBrain if use_array_genomes else Brain
+    if use_array_genomes: # NumPy generator se sije iz random modula, pa random.seed daje ponovljiv trening
+        array_brain.seed(random.getrandbits(64))
+
+    if run_simulation_for_brain is None: # Bez pygamea nema prikaza
+        headless = True
+    should_render_brain = _should_render_brain
+    if headless:
+        spectator_rendering = False
+        should_render_brain = lambda gen_num, brain_idx: False
+
+    spectator = None
+    if spectator_rendering:
+        spectator = SpectatorRenderer()
+        if not spectator.start(): # Ako se proces promatrača ne može pokrenuti, koristi se staro iscrtavanje
+            spectator = None
+    if spectator is None and not _can_render_in_process(): # Staro iscrtavanje samo iz glavne dretve
+        should_render_brain = lambda gen_num, brain_idx: False
+
+    level_suite = None # Paket levela; None znači jedan level (LEVEL_FILEPATH) kao dosad
+    display_level_filepath = LEVEL_FILEPATH
+    if level_filepaths:
+        level_suite = LevelSuite(level_filepaths, level_aggregation, level_weights)
+        display_level_filepath = level_suite.level_filepaths[0]
+        legacy_brain_filepath = None # Stara .pkl datoteka vrijedi samo za jedan level
 
     population = []
-    loaded_instructions = load_ai_instructions(SAVED_BRAIN_FILEPATH)
+    start_generation = 0
+    if level_suite is not None:
+        level_hash = level_suite.level_hash # Prevodi sve levele paketa prije stvaranja radnih procesa
+    else:
+        level_hash = level.load_level(SCREEN_WIDTH, SCREEN_HEIGHT, LEVEL_FILEPATH).level_hash
+    display_level_hash = level.load_level(SCREEN_WIDTH, SCREEN_HEIGHT, display_level_filepath).level_hash
+    if replay_directory:
+        try:
+            os.makedirs(replay_directory, exist_ok=True)
+        except OSError as e:
+            replay_directory = None # Bez mape za snimke trening radi normalno
+    loaded_instructions = None
+    if checkpoint is None and not headless: # Pri nastavku treniranja spremljeni AI se ne demonstrira
+        loaded_instructions = load_archived_instructions(level_hash, SAVED_ARCHIVE_FILEPATH, legacy_brain_filepath)
 
     if loaded_instructions:
         # Ako postoji spremljeni AI, pokreće se demonstracija
         best_loaded_brain = Brain(len(loaded_instructions), randomize_instructions=False)
         best_loaded_brain.set_instructions(loaded_instructions) #
-        run_simulation_for_brain(best_loaded_brain, LEVEL_FILEPATH, render=True, current_generation="SPREMLJENI AI", brain_idx=0)
+        _show_brain(best_loaded_brain, spectator, "SPREMLJENI AI", 0, display_level_filepath)
+        if spectator is not None:
+            spectator.close()
         ai_has_won_session = True # Postavlja zastavicu da je AI "pobijedio" (jer je učitan pobjednički)
         return # Prekida daljnje treniranje
+    elif checkpoint is not None:
+        # Nastavak prekinutog treniranja od generacije nakon zadnjeg checkpointa
+        population = checkpoint["population"]
+        start_generation = checkpoint["generation"]
+        generation_stats.extend(checkpoint["generation_stats"])
     else:
         # Ako nema spremljenog AI, stvara se nova populacija
-        population = [Brain(INSTRUCTION_COUNT) for _ in range(POPULATION_SIZE)]
+        population = [brain_class(INSTRUCTION_COUNT) for _ in range(POPULATION_SIZE)]
 
 
+    if island_count > 1: # Otoci evoluiraju u zasebnim procesima, bez checkpointa i telemetrije
+        best_brain_overall = _run_island_model(island_count, island_topology, level_suite, level_hash, legacy_brain_filepath,
+                                               use_array_genomes)
+        _save_final_replay(best_brain_overall, replay_directory, display_level_filepath, display_level_hash)
+        if not headless:
+            _show_final_brain(best_brain_overall, spectator, display_level_filepath)
+        if spectator is not None:
+            spectator.close()
+        return best_brain_overall
+
     best_fitness_overall = -float('inf') # Najbolji fitness postignut tijekom svih generacija
     best_brain_overall = None # Najbolji mozak pronađen
+    if checkpoint is not None:
+        best_fitness_overall = checkpoint["best_fitness_overall"]
+        best_brain_overall = checkpoint["best_brain_overall"]
+        random.setstate(checkpoint["random_state"]) # Nastavak daje iste generacije kao neprekinuto treniranje
+        if use_array_genomes:
+            array_brain.set_rng_state(checkpoint["array_rng_state"])
+
+    telemetry_callbacks = [] # Pozivaju se sa zapisom telemetrije na kraju svake generacije
+    telemetry_sink = None
+    if telemetry_callback is not None:
+        telemetry_callbacks.append(telemetry_callback)
+    if telemetry_filepath:
+        telemetry_sink = JsonlTelemetrySink(telemetry_filepath)
+        telemetry_callbacks.append(telemetry_sink)
+
+    if steady_state: # Zapisi napretka idu u telemetriju umjesto zapisa generacija
+        best_brain_overall = _run_steady_state(worker_count, level_suite, level_hash, legacy_brain_filepath, use_array_genomes,
+                                               fitness_cache_enabled, telemetry_callbacks)
+        if telemetry_sink is not None:
+            telemetry_sink.close()
+        _save_final_replay(best_brain_overall, replay_directory, display_level_filepath, display_level_hash)
+        if not headless:
+            _show_final_brain(best_brain_overall, spectator, display_level_filepath)
+        if spectator is not None:
+            spectator.close()
+        return best_brain_overall
 
-    for gen_num in range(NUM_GENERATIONS): # Glavna petlja genetskog algoritma
+    pool = None
+    if worker_count > 1: # Paralelna evaluacija; rezultati su identični serijskom načinu
+        pool = multiprocessing.Pool(processes=worker_count)
+
+    checkpoint_cache = None
+    if prefix_checkpoints: # Snapshotovi se čuvaju po levelu, pa paket levela treba veći cache
+        checkpoint_cache = PrefixCheckpointCache(MAX_CACHED_GENOMES * (len(level_suite) if level_suite is not None else 1))
+    fitness_cache = FitnessCache() if fitness_cache_enabled else None
+    selection_cutoff = None
+    if fitness_pruning and pool is None and not batch_simulation and level_suite is None: # Granica se mijenja nakon svakog mozga, pa samo serijski
+        selection_cutoff = SelectionCutoff(max(POPULATION_SIZE // 2, ELITISM_COUNT))
+
+    for gen_num in range(start_generation, NUM_GENERATIONS): # Glavna petlja genetskog algoritma
         if ai_has_won_session: # Ako je AI pobijedio, prekida se treniranje
             break
 
         generation_has_winner_this_gen = False # Je li u ovoj generaciji pronađen pobjednik
+        if checkpoint_cache is not None:
+            checkpoint_cache.reset_stats()
+        if fitness_cache is not None:
+            fitness_cache.reset_stats()
+        if selection_cutoff is not None:
+            selection_cutoff.reset()
+        telemetry = GenerationTelemetry(gen_num + 1) if telemetry_callbacks else None
+
+        evaluation_start_time = time.perf_counter()
+        genome_keys = {} # indeks -> ključ genoma za cache fitnessa
+        cached_results = {} # indeks -> ishod pronađen u cacheu
+        get_headless_results = None
+        headless_results = None
+        if pool is not None or batch_simulation:
+            pending_indices = []
+            for i, brain_agent in enumerate(population):
+                if spectator is None and level_suite is None and should_render_brain(gen_num, i):
+                    continue
+                if fitness_cache is not None:
+                    genome_keys[i] = genome_key(brain_agent.instructions, level_hash)
+                    cached_result = fitness_cache.get(genome_keys[i])
+                    if cached_result is not None:
+                        cached_results[i] = cached_result
+                        continue
+                pending_indices.append(i)
+            get_headless_results = _start_headless_evaluation(pool, population, pending_indices, worker_count, batch_simulation, level_suite)
 
         for i, brain_agent in enumerate(population):
-            render_this_brain = False # Određuje hoće li se trenutna simulacija iscrtavati
-            if gen_num % 10 == 0 and i == 0: render_this_brain = True # Iscrtaj prvu jedinku svake 10. generacije
-            elif gen_num < 5 and i < 3: render_this_brain = True # Iscrtaj prve 3 jedinke u prvih 5 generacija
-            
-            fitness = run_simulation_for_brain(brain_agent, LEVEL_FILEPATH, render=render_this_brain, current_generation=gen_num+1, brain_idx=i)
+            render_this_brain = spectator is None and level_suite is None and should_render_brain(gen_num, i) # Određuje hoće li se trenutna simulacija iscrtavati
+            brain_agent.pruned = False
+
+            if render_this_brain:
+                render_start_time = time.perf_counter()
+                fitness = run_simulation_for_brain(brain_agent, LEVEL_FILEPATH, render=True, current_generation=gen_num+1, brain_idx=i)
+                if telemetry is not None:
+                    telemetry.add_time("rendering", time.perf_counter() - render_start_time)
+                    telemetry.record_rendered(brain_agent.won)
+            else:
+                result = cached_results.get(i)
+                if result is None and fitness_cache is not None and get_headless_results is None:
+                    genome_keys[i] = genome_key(brain_agent.instructions, level_hash)
+                    result = fitness_cache.get(genome_keys[i])
+                simulated = result is None
+                if result is None:
+                    if get_headless_results is not None:
+                        if headless_results is None: # Na rezultate se čeka tek kad zatreba prvi neiscrtani mozak
+                            headless_results = get_headless_results()
+                        result = headless_results[i]
+                    elif selection_cutoff is not None:
+                        start_time = time.perf_counter()
+                        result = simulate_brain(brain_agent, LEVEL_FILEPATH, checkpoint_cache, selection_cutoff.cutoff())
+                        selection_cutoff.record(result, time.perf_counter() - start_time)
+                    elif level_suite is not None:
+                        result = level_suite.simulate(brain_agent, checkpoint_cache)
+                    else:
+                        result = simulate_brain(brain_agent, LEVEL_FILEPATH, checkpoint_cache)
+                    if fitness_cache is not None and not result.pruned: # Prekinuti ishod nije pravi fitness genoma
+                        fitness_cache.put(genome_keys[i], result)
+                brain_agent.pruned = result.pruned
+                brain_agent.won = result.won
+                brain_agent.current_instruction_number = result.instructions_used
+                if level_suite is not None:
+                    brain_agent.fitness = level_suite.fitness(result, len(brain_agent.instructions), brain_agent.fitness)
+                else:
+                    brain_agent.fitness = compute_fitness(result, len(brain_agent.instructions), brain_agent.fitness)
+                if telemetry is not None:
+                    telemetry.record_result(result, simulated)
+                if (spectator is not None or level_suite is not None) and should_render_brain(gen_num, i):
+                    render_start_time = time.perf_counter()
+                    # Iscrtana simulacija bez promatrača mijenja fitness mozga, pa se na paketu levela iscrtava kopija
+                    _show_brain(brain_agent if spectator is not None else brain_agent.clone(), spectator, gen_num + 1, i, display_level_filepath)
+                    if telemetry is not None:
+                        telemetry.add_time("rendering", time.perf_counter() - render_start_time)
+
+            if replay_directory and _should_render_brain(gen_num, i): # Isti odabir mozgova kao za prikaz
+                _save_replay(brain_agent, replay_directory, f"gen_{gen_num + 1}_brain_{i}", gen_num + 1, i,
+                             display_level_filepath, display_level_hash)
+
+            if selection_cutoff is not None:
+                selection_cutoff.add(brain_agent.fitness)
 
-            if brain_agent.fitness >= 1500000: # Arbitrarna granica fitnessa koja označava pobjedu
+            if brain_agent.won: # Pobjeda je cilj dosegnut na svakom levelu, a ne visok (agregirani) fitness
                 generation_has_winner_this_gen = True
-                ai_has_won_session = True # Postavlja globalnu zastavicu o pobjedi
-                if brain_agent.fitness > best_fitness_overall:
+                # Prvi pobjednik zamjenjuje i najbolji mozak većeg agregiranog fitnessa koji nije pobijedio
+                if not ai_has_won_session or brain_agent.fitness > best_fitness_overall:
                     best_fitness_overall = brain_agent.fitness
                     best_brain_overall = brain_agent.clone()
-                    save_ai_instructions(best_brain_overall.instructions, SAVED_BRAIN_FILEPATH) # Sprema pobjednički AI
+                    best_brain_overall.won = True
+                    if legacy_brain_filepath:
+                        save_ai_instructions(best_brain_overall.instructions, legacy_brain_filepath) # Sprema pobjednički AI
+                    archive_ai_instructions(best_brain_overall.instructions, best_fitness_overall, gen_num + 1, level_hash, SAVED_ARCHIVE_FILEPATH)
+                ai_has_won_session = True # Postavlja globalnu zastavicu o pobjedi
             
             if ai_has_won_session and generation_has_winner_this_gen: # Ako je pobjednik nađen, prekida se evaluacija ostalih u generaciji
                 break
 
 
+        if telemetry is not None:
+            telemetry.add_time("evaluation", time.perf_counter() - evaluation_start_time - telemetry.timings["rendering"])
+
         population.sort(key=lambda b: b.fitness, reverse=True) # Sortira populaciju po fitnessu, najbolji prvi
 
-        if population and population[0].fitness > best_fitness_overall:
+        if population and population[0].fitness > best_fitness_overall and not ai_has_won_session: # Pobjednik ostaje najbolji mozak
             best_fitness_overall = population[0].fitness
             best_brain_overall = population[0].clone()
-            if best_fitness_overall >= 1500000 and not ai_has_won_session: # Još jedna provjera za spremanje ako je pobjeda ostvarena
+            best_brain_overall.won = population[0].won
+            if best_brain_overall.won: # Još jedna provjera za spremanje ako je pobjeda ostvarena
                 ai_has_won_session = True
-                save_ai_instructions(best_brain_overall.instructions, SAVED_BRAIN_FILEPATH) #
+                if legacy_brain_filepath:
+                    save_ai_instructions(best_brain_overall.instructions, legacy_brain_filepath) #
+                archive_ai_instructions(best_brain_overall.instructions, best_fitness_overall, gen_num + 1, level_hash, SAVED_ARCHIVE_FILEPATH)
 
 
         avg_fitness = sum(b.fitness for b in population) / POPULATION_SIZE if population else 0
 
+        current_generation_stats = {"generation": gen_num + 1}
+        if checkpoint_cache is not None:
+            current_generation_stats["prefix_checkpoints"] = checkpoint_cache.stats()
+        if fitness_cache is not None:
+            current_generation_stats["fitness_cache"] = fitness_cache.stats()
+        if selection_cutoff is not None:
+            current_generation_stats["pruning"] = selection_cutoff.stats()
+        generation_stats.append(current_generation_stats)
+        if telemetry is not None:
+            cache_stats = {name: value for name, value in current_generation_stats.items() if name != "generation"}
+            telemetry_record_args = (population, avg_fitness, best_fitness_overall, cache_stats)
+
         if ai_has_won_session: # Ponovna provjera za prekid vanjske petlje
+            if telemetry is not None:
+                _publish_telemetry(telemetry, telemetry_callbacks, telemetry_record_args)
             break
 
         # Stvaranje sljedeće generacije
-        next_generation_brains = []
-        if population:
-            # Elitizam: Najbolje jedinke prelaze direktno
-            for i in range(ELITISM_COUNT):
-                if i < len(population):
-                    next_generation_brains.append(population[i].clone())
-
-            num_to_generate = POPULATION_SIZE - len(next_generation_brains) # Koliko novih jedinki treba stvoriti
-            parent_pool_size = POPULATION_SIZE // 2 # Veličina bazena roditelja za križanje
-            parent_pool = population[:parent_pool_size] # Uzima se bolja polovica populacije kao roditelji
-            if not parent_pool: # Osigurava da bazen roditelja nije prazan
-                parent_pool = population[:max(1, ELITISM_COUNT if ELITISM_COUNT < len(population) else len(population))]
-
-
-            for _ in range(num_to_generate): # Stvaranje novih jedinki križanjem i mutacijom
-                if parent_pool:
-                    parent1 = random.choice(parent_pool) # Nasumični odabir roditelja
-                    child = parent1.clone()
-                    child.mutate(MUTATION_RATE, NEW_INSTRUCTION_CHANCE) # Mutacija djeteta
-                    next_generation_brains.append(child)
-                else:
-                    # Ako nema roditelja (npr. prva generacija ili greška), stvara nasumičnu jedinku
-                    next_generation_brains.append(Brain(INSTRUCTION_COUNT))
-            
-            population = next_generation_brains
-            while len(population) < POPULATION_SIZE: # Dopunjava populaciju ako je manja od željene veličine
-                population.append(Brain(INSTRUCTION_COUNT))
+        breeding_start_time = time.perf_counter()
+        population = breed_next_generation(population, brain_class, use_array_genomes, keep_parents=checkpoint_cache is not None)
+        if telemetry is not None:
+            telemetry.add_time("breeding", time.perf_counter() - breeding_start_time)
 
-    if best_brain_overall:
-        # Prikaz najboljeg AI-a nakon završetka svih generacija (ili prijevremenog prekida zbog pobjede)
-        current_instructions_count = len(best_brain_overall.instructions)
-        target_instructions_display = int(INSTRUCTION_COUNT * 1.2) # Povećava broj instrukcija za prikaz, da AI ne stane prerano
-        if current_instructions_count < target_instructions_display :
-            needed_increase = target_instructions_display - current_instructions_count
-            if needed_increase > 0:
-                best_brain_overall.increase_moves(needed_increase)
-        run_simulation_for_brain(best_brain_overall, LEVEL_FILEPATH, render=True, current_generation="FINALNI NAJBOLJI", brain_idx=0)
-    else:
-        # Ako nije pronađen nijedan zadovoljavajući AI (npr. ako NUM_GENERATIONS = 0)
-        pass
\ No newline at end of file
+        if checkpoint_interval > 0 and (gen_num + 1) % checkpoint_interval == 0:
+            checkpoint_start_time = time.perf_counter()
+            save_training_checkpoint({
+                "generation": gen_num + 1, # Prva generacija koja se evaluira nakon nastavka
+                "population": population,
+                "best_fitness_overall": best_fitness_overall,
+                "best_brain_overall": best_brain_overall,
+                "random_state": random.getstate(),
+                "array_genomes": use_array_genomes,
+                "array_rng_state": array_brain.get_rng_state() if use_array_genomes else None,
+                "generation_stats": list(generation_stats),
+            }, CHECKPOINT_FILEPATH)
+            if telemetry is not None:
+                telemetry.add_time("checkpoint", time.perf_counter() - checkpoint_start_time)
+
+        if telemetry is not None:
+            _publish_telemetry(telemetry, telemetry_callbacks, telemetry_record_args)
+
+    if pool is not None:
+        pool.close()
+        pool.join()
+    if telemetry_sink is not None:
+        telemetry_sink.close()
+
+    _save_final_replay(best_brain_overall, replay_directory, display_level_filepath, display_level_hash)
+    if not headless:
+        _show_final_brain(best_brain_overall, spectator, display_level_filepath)
+    if spectator is not None: # Promatrač prikazuje preostale snimke i sam se zatvara
+        spectator.close()
+    if best_brain_overall is not None: # Klon ne nosi fitness, a pozivatelj ga treba uz mozak
+        best_brain_overall.fitness = best_fitness_overall
+    return best_brain_overall
@@ -0,0 +1,90 @@
+import hashlib
+
+from src.core import level
+from .headless_simulation import SCREEN_WIDTH, SCREEN_HEIGHT, simulate_brain, compute_fitness
+from .batch_simulation import simulate_population_results
+
+# Evaluacija na paketu levela: svaki mozak se simulira na svim levelima, a fitness je agregat fitnessa po levelima
+# (prosjek, minimum ili težinski prosjek), pa se mozgovi ne prilagođavaju samo jednom rasporedu platformi.
+# Leveli se prevode jednom po procesu (cache u level.load_level); main_ai ih prevodi prije stvaranja procesa,
+# pa ih radni procesi nasljeđuju umjesto da ih ponovno učitavaju za svaki par (mozak, level).
+
+AGGREGATION_MEAN = "mean"
+AGGREGATION_MIN = "min" # Fitness najgoreg levela, mozak mora proći sve
+AGGREGATION_WEIGHTED = "weighted"
+AGGREGATIONS = (AGGREGATION_MEAN, AGGREGATION_MIN, AGGREGATION_WEIGHTED)
+
+
+class MultiLevelResult:
+    # Ishodi simulacije jednog mozga, istim redoslijedom kao level_filepaths paketa
+    def __init__(self, level_results):
+        self.level_results = list(level_results)
+
+    @property
+    def pruned(self):
+        return False # Paket levela se ne reže granicom selekcije
+
+    @property
+    def won(self):
+        return all(result.won for result in self.level_results)
+
+    @property
+    def instructions_used(self):
+        return max((result.instructions_used for result in self.level_results), default=0)
+
+    @property
+    def frames_survived(self):
+        return sum(result.frames_survived for result in self.level_results)
+
+
+class LevelSuite:
+    def __init__(self, level_filepaths, aggregation=AGGREGATION_MEAN, weights=None):
+        self.level_filepaths = list(level_filepaths)
+        if not self.level_filepaths:
+            raise ValueError("Paket levela mora imati barem jedan level")
+        if aggregation not in AGGREGATIONS:
+            raise ValueError(f"Nepoznata agregacija fitnessa: {aggregation}")
+        if weights is None:
+            weights = [1.0] * len(self.level_filepaths)
+        weights = [float(weight) for weight in weights]
+        if len(weights) != len(self.level_filepaths):
+            raise ValueError(f"Paket ima {len(self.level_filepaths)} levela, a {len(weights)} težina")
+        if aggregation == AGGREGATION_WEIGHTED and sum(weights) <= 0:
+            raise ValueError("Zbroj težina levela mora biti pozitivan")
+        self.aggregation = aggregation
+        self.weights = weights
+
+    def __len__(self):
+        return len(self.level_filepaths)
+
+    def load(self):
+        # Prevedeni leveli paketa; ponovni pozivi vraćaju iste objekte iz cachea
+        return [level.load_level(SCREEN_WIDTH, SCREEN_HEIGHT, filepath) for filepath in self.level_filepaths]
+
+    @property
+    def level_hash(self):
+        # Identitet paketa za cache fitnessa i arhivu: sadržaj levela, agregacija i težine.
+        # SHA-1 kao i hash jednog levela, jer ga arhiva genoma sprema u 20 bajtova.
+        level_hashes = [compiled_level.level_hash for compiled_level in self.load()]
+        key = repr(("suite", level_hashes, self.aggregation, self.weights if self.aggregation == AGGREGATION_WEIGHTED else None))
+        return hashlib.sha1(key.encode("ascii")).hexdigest()
+
+    def aggregate(self, fitnesses):
+        if self.aggregation == AGGREGATION_MIN:
+            return min(fitnesses)
+        if self.aggregation == AGGREGATION_WEIGHTED:
+            return sum(weight * fitness for weight, fitness in zip(self.weights, fitnesses)) / sum(self.weights)
+        return sum(fitnesses) / len(fitnesses)
+
+    def fitness(self, result, instruction_count, previous_fitness=0.0):
+        """Agregirani fitness; svaki level koristi compute_fitness s istim prethodnim fitnessom mozga."""
+        return self.aggregate([compute_fitness(level_result, instruction_count, previous_fitness)
+                               for level_result in result.level_results])
+
+    def simulate(self, brain, checkpoint_cache=None):
+        return MultiLevelResult(simulate_brain(brain, filepath, checkpoint_cache) for filepath in self.level_filepaths)
+
+    def simulate_population(self, brains):
+        # Cijela populacija level po level (NumPy simulacija kad je dostupna)
+        per_level = [simulate_population_results(brains, filepath) for filepath in self.level_filepaths]
+        return [MultiLevelResult(level_results) for level_results in zip(*per_level)]
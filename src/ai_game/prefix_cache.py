@@ -0,0 +1,81 @@
+from collections import OrderedDict
+
+from .headless_simulation import simulate_actions
+
+# Djeca u genetskom algoritmu su klonovi roditelja s nekoliko promijenjenih instrukcija. Fizika je
+# deterministička, pa dijete do prve promijenjene instrukcije prolazi točno istu putanju kao roditelj.
+# Cache čuva snapshotove stanja na granicama instrukcija i dijete nastavlja od zadnjeg zajedničkog.
+
+MAX_CACHED_GENOMES = 1024
+
+
+def first_difference(actions, other_actions):
+    # Indeks prve instrukcije po kojoj se dvije kvantizirane liste razlikuju
+    common_length = min(len(actions), len(other_actions))
+    for idx in range(common_length):
+        if actions[idx] != other_actions[idx]:
+            return idx
+    return common_length
+
+
+class PrefixCheckpointCache:
+    def __init__(self, max_genomes=MAX_CACHED_GENOMES):
+        self.max_genomes = max_genomes
+        self._snapshots = OrderedDict() # (level_hash, instrukcije) -> lista snapshotova po granicama instrukcija
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.lookups = 0
+        self.hits = 0 # Simulacije nastavljene iz snapshota roditelja
+        self.frames_saved = 0 # Frameovi koje nije trebalo ponovno simulirati
+        self.frames_simulated = 0
+
+    def stats(self):
+        return {
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+            "frames_saved": self.frames_saved,
+            "frames_simulated": self.frames_simulated,
+            "cached_genomes": len(self._snapshots),
+        }
+
+    def clear(self):
+        self._snapshots.clear()
+
+    def _get(self, key):
+        snapshots = self._snapshots.get(key)
+        if snapshots is not None:
+            self._snapshots.move_to_end(key)
+        return snapshots
+
+    def _store(self, key, snapshots):
+        self._snapshots[key] = snapshots
+        self._snapshots.move_to_end(key)
+        while len(self._snapshots) > self.max_genomes: # Izbacuje najdavnije korištene genome
+            self._snapshots.popitem(last=False)
+
+    def simulate(self, actions, compiled_level, parent_actions=None, fitness_cutoff=None, previous_fitness=0.0):
+        """Simulira instrukcije; ako postoje snapshotovi roditelja, kreće od prve promijenjene instrukcije."""
+        actions = tuple(actions)
+        self.lookups += 1
+
+        start_index = 0
+        start_state = None
+        snapshots = []
+        parent_snapshots = None
+        if parent_actions is not None:
+            parent_snapshots = self._get((compiled_level.level_hash, tuple(parent_actions)))
+        if parent_snapshots:
+            start_index = min(first_difference(actions, parent_actions), len(parent_snapshots) - 1)
+            if start_index > 0:
+                start_state = parent_snapshots[start_index]
+                snapshots = parent_snapshots[:start_index] # Snapshot na start_index dodaje sama simulacija
+                self.hits += 1
+                self.frames_saved += start_state[-1]
+
+        result = simulate_actions(actions, compiled_level, start_index, start_state, snapshots,
+                                  fitness_cutoff=fitness_cutoff, previous_fitness=previous_fitness)
+        self.frames_simulated += result.frames_survived - (start_state[-1] if start_state else 0)
+        self._store((compiled_level.level_hash, actions), snapshots)
+        return result
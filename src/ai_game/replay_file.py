@@ -0,0 +1,189 @@
+import mmap
+import os
+import struct
+import tempfile
+
+from .headless_simulation import PLAYER_SPEED
+
+# Datoteka snimke (.stbr): stanje igrača u svakom frame-u, za preglednik snimki bez ponovne simulacije fizike.
+#
+# Zaglavlje (64 B): magic, verzija, veličina zaglavlja, razmak keyframeova, broj frameova, broj keyframeova,
+#                   indeks mozga, duljina oznake generacije, duljina putanje levela, hash levela (20 B SHA-1).
+# Zatim oznaka generacije i putanja levela (UTF-8), tablica keyframeova i delte frameova.
+# Keyframe (16 B) je potpuno stanje prvog frame-a svakog bloka od keyframe_interval frameova:
+#     world_x (i32), player_top (i32), broj instrukcije (u32), x_direction (i8).
+# Delta (2 B) je promjena u odnosu na prethodni frame: pomak player_top (i8) i zastavice
+#     (bitovi 0-1 pomak world_x za 0, +PLAYER_SPEED ili -PLAYER_SPEED, bitovi 2-3 x_direction, bit 4 nova instrukcija).
+# Keyframe i delta svakog frame-a su na poznatom pomaku, pa se frame čita u vremenu ograničenom s keyframe_interval
+# (konstantno), neovisno o duljini snimke. Dvije snimke se uspoređuju blok po blok usporedbom bajtova.
+
+MAGIC = b"STBRPLAY"
+VERSION = 1
+FILE_EXTENSION = ".stbr"
+KEYFRAME_INTERVAL = 32 # Najviše toliko delti se primjenjuje za čitanje jednog frame-a
+
+_HEADER = struct.Struct("<8sHHIIIiHH20s")
+HEADER_SIZE = 64
+_KEYFRAME = struct.Struct("<iiIb3x")
+_DELTA = struct.Struct("<bB")
+
+_DIRECTION_CODES = {0: 0, 1: 1, -1: 2}
+_DIRECTIONS = (0, 1, -1, 0)
+_STEPS = (0, PLAYER_SPEED, -PLAYER_SPEED, 0)
+_NEW_INSTRUCTION = 0x10
+
+
+def _level_hash_bytes(level_hash):
+    return bytes.fromhex(level_hash) if level_hash else bytes(20)
+
+
+def encode_frames(frames, keyframe_interval=KEYFRAME_INTERVAL):
+    """Keyframeovi i delte za listu (world_x, player_top, x_direction, broj instrukcije); vraća (keyframes, deltas)."""
+    keyframes = bytearray()
+    deltas = bytearray()
+    previous = None
+    for frame_idx, (world_x, player_top, x_direction, instruction_number) in enumerate(frames):
+        world_x = int(world_x)
+        if frame_idx % keyframe_interval == 0:
+            keyframes += _KEYFRAME.pack(world_x, player_top, instruction_number, x_direction)
+        if previous is None: # Prvi frame nema prethodnika; delta postoji samo da pomaci ostanu poznati
+            deltas += _DELTA.pack(0, _DIRECTION_CODES[x_direction] << 2)
+        else:
+            step = world_x - previous[0]
+            instruction_step = instruction_number - previous[3]
+            dy = player_top - previous[1]
+            if step not in (0, PLAYER_SPEED, -PLAYER_SPEED) or instruction_step not in (0, 1) or not -128 <= dy <= 127:
+                raise ValueError(f"Frame {frame_idx} se ne može zapisati kao delta prethodnog frame-a")
+            flags = _STEPS.index(step) | _DIRECTION_CODES[x_direction] << 2 | (_NEW_INSTRUCTION if instruction_step else 0)
+            deltas += _DELTA.pack(dy, flags)
+        previous = (world_x, player_top, x_direction, instruction_number)
+    return bytes(keyframes), bytes(deltas)
+
+
+def write_replay(filepath, replay, level_hash=None, keyframe_interval=KEYFRAME_INTERVAL):
+    """Sprema spectator.Replay u datoteku; piše se u privremenu datoteku pa atomarno preimenuje."""
+    keyframes, deltas = encode_frames(replay.frames, keyframe_interval)
+    label = str(replay.generation).encode("utf-8")
+    level_filepath = os.path.abspath(replay.level_filepath).encode("utf-8")
+    header = _HEADER.pack(MAGIC, VERSION, HEADER_SIZE, keyframe_interval, len(replay.frames),
+                          len(keyframes) // _KEYFRAME.size, int(replay.brain_idx), len(label), len(level_filepath),
+                          _level_hash_bytes(level_hash))
+
+    directory = os.path.dirname(os.path.abspath(filepath))
+    fd, temp_filepath = tempfile.mkstemp(prefix=".replay-", dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(header.ljust(HEADER_SIZE, b"\0"))
+            f.write(label)
+            f.write(level_filepath)
+            f.write(keyframes)
+            f.write(deltas)
+        os.replace(temp_filepath, filepath)
+    except BaseException:
+        try:
+            os.remove(temp_filepath)
+        except OSError:
+            pass
+        raise
+
+
+class ReplayFile:
+    """Snimka otvorena preko mmap-a; replay[i] vraća (world_x, player_top, x_direction, broj instrukcije)."""
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        with open(filepath, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            (magic, version, header_size, self.keyframe_interval, self.frame_count, keyframe_count, self.brain_idx,
+             label_size, path_size, level_hash) = _HEADER.unpack_from(self._mm, 0)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{filepath} nije snimka verzije {VERSION}")
+            offset = header_size
+            self.generation = self._mm[offset:offset + label_size].decode("utf-8")
+            offset += label_size
+            self.level_filepath = self._mm[offset:offset + path_size].decode("utf-8")
+            offset += path_size
+            self.level_hash = level_hash.hex() if any(level_hash) else None
+            self._keyframes_offset = offset
+            self._deltas_offset = offset + keyframe_count * _KEYFRAME.size
+            if len(self._mm) < self._deltas_offset + self.frame_count * _DELTA.size:
+                raise ValueError(f"Snimka {filepath} je skraćena")
+        except BaseException:
+            self._mm.close()
+            raise
+
+    def __len__(self):
+        return self.frame_count
+
+    def __getitem__(self, frame_idx):
+        if frame_idx < 0:
+            frame_idx += self.frame_count
+        if not 0 <= frame_idx < self.frame_count:
+            raise IndexError(frame_idx)
+        block_idx, block_offset = divmod(frame_idx, self.keyframe_interval)
+        world_x, player_top, instruction_number, x_direction = _KEYFRAME.unpack_from(
+            self._mm, self._keyframes_offset + block_idx * _KEYFRAME.size)
+        start = self._deltas_offset + (frame_idx - block_offset + 1) * _DELTA.size
+        for dy, flags in _DELTA.iter_unpack(self._mm[start:start + block_offset * _DELTA.size]):
+            world_x += _STEPS[flags & 0x3]
+            player_top += dy
+            x_direction = _DIRECTIONS[flags >> 2 & 0x3]
+            if flags & _NEW_INSTRUCTION:
+                instruction_number += 1
+        return (world_x, player_top, x_direction, instruction_number)
+
+    def frames(self, start=0, stop=None):
+        # Uzastopni frameovi od start, bez ponovnog čitanja keyframea za svaki frame
+        stop = self.frame_count if stop is None else min(stop, self.frame_count)
+        if start >= stop:
+            return
+        world_x, player_top, x_direction, instruction_number = self[start]
+        yield (world_x, player_top, x_direction, instruction_number)
+        begin = self._deltas_offset + (start + 1) * _DELTA.size
+        for dy, flags in _DELTA.iter_unpack(self._mm[begin:self._deltas_offset + stop * _DELTA.size]):
+            world_x += _STEPS[flags & 0x3]
+            player_top += dy
+            x_direction = _DIRECTIONS[flags >> 2 & 0x3]
+            if flags & _NEW_INSTRUCTION:
+                instruction_number += 1
+            yield (world_x, player_top, x_direction, instruction_number)
+
+    def _block_bytes(self, block_idx):
+        # Keyframe i delte bloka; jednaki bajtovi znače jednake frameove cijelog bloka
+        keyframe_start = self._keyframes_offset + block_idx * _KEYFRAME.size
+        first = block_idx * self.keyframe_interval
+        last = min(first + self.keyframe_interval, self.frame_count)
+        deltas = self._mm[self._deltas_offset + (first + 1) * _DELTA.size:self._deltas_offset + last * _DELTA.size]
+        return self._mm[keyframe_start:keyframe_start + _KEYFRAME.size], deltas
+
+    def close(self):
+        self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def first_divergence(replay_a, replay_b):
+    """Prvi frame u kojem se dvije snimke razlikuju (ili kraj kraće snimke); None ako su jednake.
+
+    Blokovi se uspoređuju kao bajtovi, a dekodira se samo prvi različiti blok.
+    """
+    common = min(len(replay_a), len(replay_b))
+    if replay_a.keyframe_interval == replay_b.keyframe_interval:
+        interval = replay_a.keyframe_interval
+        block_idx = 0
+        while block_idx * interval < common and replay_a._block_bytes(block_idx) == replay_b._block_bytes(block_idx):
+            block_idx += 1
+        start = block_idx * interval
+    else:
+        start = 0
+    for frame_idx, (frame_a, frame_b) in enumerate(zip(replay_a.frames(start, common), replay_b.frames(start, common)), start):
+        if frame_a != frame_b:
+            return frame_idx
+    if len(replay_a) == len(replay_b):
+        return None
+    return common
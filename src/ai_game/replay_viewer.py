@@ -0,0 +1,162 @@
+import os
+import sys
+
+import pygame
+
+from src.core import assets
+from src.core import render_cache
+from src.core.platforms import PlatformManager
+from src.core.player import Player
+from .headless_simulation import SCREEN_WIDTH, SCREEN_HEIGHT, FPS, PLAYER_SCREEN_X
+from .replay_file import ReplayFile, first_divergence
+
+# Preglednik snimki: python -m src.ai_game.replay_viewer snimka.stbr [druga_snimka.stbr]
+# Frameovi se čitaju iz datoteke snimke, bez ponovne simulacije, pa je skok na bilo koji frame trenutan.
+# Druga snimka (npr. isti level u kasnijoj generaciji) prikazuje se kao prozirni igrač, a na traci vremena
+# je označen prvi frame u kojem se putanje razlikuju.
+#
+# Tipke: razmak pauza, strelice lijevo/desno skok 1 s, zarez/točka jedan frame, strelice gore/dolje brzina x2 / :2,
+#        Home/End početak/kraj. Klik na traku vremena skače na taj frame.
+
+MIN_SPEED = 1 / 16
+MAX_SPEED = 64
+GHOST_ALPHA = 110
+TIMELINE_HEIGHT = 12
+TIMELINE_COLOR = (60, 60, 60)
+TIMELINE_PROGRESS_COLOR = (0, 120, 255)
+DIVERGENCE_COLOR = (220, 0, 0)
+
+
+def _ghost_images(player):
+    # Kopije, jer su slike igrača zajedničke (assets) i ne smiju se mijenjati
+    ghost_right = player.image_right.copy()
+    ghost_left = player.image_left.copy()
+    ghost_right.set_alpha(GHOST_ALPHA)
+    ghost_left.set_alpha(GHOST_ALPHA)
+    return ghost_right, ghost_left
+
+
+def _timeline_rect():
+    return pygame.Rect(10, SCREEN_HEIGHT - TIMELINE_HEIGHT - 10, SCREEN_WIDTH - 20, TIMELINE_HEIGHT)
+
+
+def run_viewer(replay_filepath, compare_filepath=None):
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+
+    replay = ReplayFile(replay_filepath)
+    compare = ReplayFile(compare_filepath) if compare_filepath else None
+    divergence = first_divergence(replay, compare) if compare is not None else None
+    pygame.display.set_caption(f"Super Toni Bros - snimka Gen: {replay.generation} Brain: {replay.brain_idx}")
+
+    background_image = assets.get_image("Background.jpeg", alpha=False)
+    if background_image is None:
+        background_image = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        background_image.fill((200, 200, 255))
+    background_strip = render_cache.compose_scrolling_background(background_image, SCREEN_WIDTH, SCREEN_HEIGHT)
+    bg_width = background_image.get_width()
+
+    try:
+        font = pygame.font.SysFont(None, 30)
+    except Exception as e:
+        font = None
+
+    platform_manager = PlatformManager(SCREEN_WIDTH, SCREEN_HEIGHT, replay.level_filepath)
+    platform_manager.generate_platforms()
+    player = Player(PLAYER_SCREEN_X, 0, 50, 50)
+    ghost_right, ghost_left = _ghost_images(player)
+    clock = pygame.time.Clock()
+
+    last_frame = max(len(replay), len(compare) if compare is not None else 0) - 1
+    position = 0.0 # Trenutni frame; brzina manja od 1 napreduje kroz više prikaza istog frame-a
+    speed = 1.0
+    paused = False
+    running = len(replay) > 0
+
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE:
+                    paused = not paused
+                elif event.key == pygame.K_RIGHT:
+                    position += FPS
+                elif event.key == pygame.K_LEFT:
+                    position -= FPS
+                elif event.key == pygame.K_PERIOD:
+                    position = int(position) + 1
+                elif event.key == pygame.K_COMMA:
+                    position = int(position) - 1
+                elif event.key == pygame.K_UP:
+                    speed = min(speed * 2, MAX_SPEED)
+                elif event.key == pygame.K_DOWN:
+                    speed = max(speed / 2, MIN_SPEED)
+                elif event.key == pygame.K_HOME:
+                    position = 0
+                elif event.key == pygame.K_END:
+                    position = last_frame
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                timeline = _timeline_rect()
+                if timeline.inflate(0, 10).collidepoint(event.pos):
+                    position = (event.pos[0] - timeline.x) / timeline.width * last_frame
+        position = min(max(position, 0), last_frame)
+        frame_idx = int(position)
+
+        # Na kraju kraće snimke igrač ostaje u zadnjem frame-u
+        world_x, player_top, x_direction, instruction_number = replay[min(frame_idx, len(replay) - 1)]
+        if x_direction == 1:
+            player.facing_left = False
+        elif x_direction == -1:
+            player.facing_left = True
+        player.rect.y = player_top
+
+        # Isti prikaz kao spectator
+        render_x_bg = (-world_x) % bg_width # Scrolling pozadine
+        screen.blit(background_strip, (render_x_bg - bg_width, 0))
+        platform_manager.draw_with_offset(screen, world_x)
+        if compare is not None and len(compare):
+            compare_x, compare_top, compare_direction, _ = compare[min(frame_idx, len(compare) - 1)]
+            ghost = ghost_left if compare_direction == -1 else ghost_right
+            screen.blit(ghost, (PLAYER_SCREEN_X + compare_x - world_x, compare_top))
+        player.draw(screen)
+
+        timeline = _timeline_rect()
+        pygame.draw.rect(screen, TIMELINE_COLOR, timeline)
+        if last_frame > 0:
+            progress = timeline.copy()
+            progress.width = int(timeline.width * frame_idx / last_frame)
+            pygame.draw.rect(screen, TIMELINE_PROGRESS_COLOR, progress)
+            if divergence is not None:
+                marker_x = timeline.x + int(timeline.width * divergence / last_frame)
+                pygame.draw.line(screen, DIVERGENCE_COLOR, (marker_x, timeline.top - 4), (marker_x, timeline.bottom + 4), 3)
+
+        if font:
+            texts = [
+                f"Generacija: {replay.generation}",
+                f"Potez AI: {instruction_number}",
+                f"Frame: {frame_idx} / {last_frame} ({frame_idx / FPS:.2f} s)",
+                f"Brzina: {speed:g}x" + (" (pauza)" if paused else ""),
+            ]
+            if compare is not None:
+                texts.append(f"Usporedba: Gen {compare.generation}, razlika od frame-a "
+                             f"{divergence if divergence is not None else '-'}")
+            for i, text_content in enumerate(texts):
+                screen.blit(font.render(text_content, True, (0, 0, 0)), (10, 10 + i * 30))
+
+        pygame.display.update()
+        clock.tick(FPS)
+        if not paused:
+            position += speed
+
+    replay.close()
+    if compare is not None:
+        compare.close()
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Upotreba: python -m src.ai_game.replay_viewer snimka.stbr [druga_snimka.stbr]")
+        sys.exit(1)
+    run_viewer(os.path.abspath(sys.argv[1]), os.path.abspath(sys.argv[2]) if len(sys.argv) > 2 else None)
@@ -0,0 +1,190 @@
+import os
+import pickle
+import subprocess
+import sys
+import threading
+from collections import deque, namedtuple
+
+from src.core import level
+from .headless_simulation import SCREEN_WIDTH, SCREEN_HEIGHT, FPS, PLAYER_SCREEN_X, quantize_instructions, simulate_actions
+
+# Promatrač treninga: trening simulira sve mozgove bez iscrtavanja, a za odabrane mozgove šalje snimku
+# (stanje igrača u svakom frame-u) zasebnom procesu koji je reproducira brzinom od 60 FPS.
+# Proces promatrača pokreće se kao "python -m src.ai_game.spectator" i snimke čita sa standardnog ulaza,
+# pa trening nikad ne čeka na iscrtavanje.
+
+MAX_PENDING_REPLAYS = 8 # Ako prikaz kasni, odbacuju se najstarije snimke na čekanju
+
+project_root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+
+Replay = namedtuple("Replay", ["level_filepath", "generation", "brain_idx", "frames"])
+
+
+def record_replay(brain, level_filepath, generation, brain_idx):
+    """Snimka simulacije mozga; frames je lista (world_x, player_top, x_direction, broj instrukcije)."""
+    compiled_level = level.load_level(SCREEN_WIDTH, SCREEN_HEIGHT, level_filepath)
+    frames = []
+    simulate_actions(quantize_instructions(brain.instructions), compiled_level, trace=frames)
+    return Replay(level_filepath, generation, brain_idx, frames)
+
+
+class SpectatorRenderer:
+    """Strana treninga: pokreće proces promatrača i šalje mu snimke bez blokiranja."""
+
+    def __init__(self, max_pending=MAX_PENDING_REPLAYS):
+        self._pending = deque(maxlen=max_pending)
+        self._condition = threading.Condition()
+        self._closed = False
+        self._process = None
+        self._sender = None
+
+    def start(self):
+        try:
+            self._process = subprocess.Popen([sys.executable, "-m", "src.ai_game.spectator"],
+                                             stdin=subprocess.PIPE, cwd=os.path.abspath(project_root))
+        except OSError as e:
+            self._process = None # Bez promatrača trening radi normalno, samo se ništa ne prikazuje
+            return False
+        self._sender = threading.Thread(target=self._send_loop, daemon=True)
+        self._sender.start()
+        return True
+
+    def is_alive(self):
+        return self._process is not None and self._process.poll() is None
+
+    def publish(self, replay):
+        with self._condition:
+            if self._closed or self._process is None:
+                return
+            self._pending.append(replay)
+            self._condition.notify()
+
+    def _send_loop(self):
+        stream = self._process.stdin
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                if not self._pending: # Zatvoren i sve snimke su poslane
+                    break
+                replay = self._pending.popleft()
+            try:
+                pickle.dump(tuple(replay), stream, protocol=pickle.HIGHEST_PROTOCOL)
+                stream.flush()
+            except (OSError, ValueError) as e:
+                break # Prozor promatrača je zatvoren
+        try:
+            stream.close() # Promatrač prikazuje preostale snimke i završava
+        except OSError as e:
+            pass
+
+    def close(self, timeout=5.0):
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        if self._sender is not None:
+            self._sender.join(timeout)
+
+
+def _read_replays(stream, pending, state):
+    # Dretva procesa promatrača: čita snimke dok trening ne zatvori ulaz
+    try:
+        while True:
+            replay = Replay(*pickle.load(stream))
+            with state["lock"]:
+                pending.append(replay)
+    except (EOFError, OSError, pickle.UnpicklingError) as e:
+        pass
+    with state["lock"]:
+        state["finished"] = True
+
+
+def run_spectator(stream):
+    import pygame
+    from src.core import render_cache
+    from src.core import assets
+    from src.core.platforms import PlatformManager
+    from src.core.player import Player
+
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("Super Toni Bros - AI promatrač")
+
+    background_image = assets.get_image("Background.jpeg", alpha=False)
+    if background_image is None:
+        background_image = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        background_image.fill((200, 200, 255))
+    background_strip = render_cache.compose_scrolling_background(background_image, SCREEN_WIDTH, SCREEN_HEIGHT)
+    bg_width = background_image.get_width()
+
+    try:
+        font = pygame.font.SysFont(None, 30)
+    except Exception as e:
+        font = None
+
+    pending = deque(maxlen=MAX_PENDING_REPLAYS)
+    state = {"lock": threading.Lock(), "finished": False}
+    threading.Thread(target=_read_replays, args=(stream, pending, state), daemon=True).start()
+
+    platform_managers = {} # putanja levela -> PlatformManager
+    player = Player(PLAYER_SCREEN_X, 0, 50, 50)
+    clock = pygame.time.Clock()
+    replay = None
+    frame_idx = 0
+
+    while True:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                return
+
+        if replay is None or frame_idx >= len(replay.frames):
+            with state["lock"]:
+                replay = pending.popleft() if pending else None
+                finished = state["finished"]
+            if replay is None:
+                if finished:
+                    break
+                clock.tick(FPS) # Čeka se sljedeća snimka
+                continue
+            frame_idx = 0
+            player.facing_left = False
+            pygame.display.set_caption(f"Super Toni Bros - AI Gen: {replay.generation} Brain: {replay.brain_idx}")
+            if replay.level_filepath not in platform_managers:
+                platform_manager = PlatformManager(SCREEN_WIDTH, SCREEN_HEIGHT, replay.level_filepath)
+                platform_manager.generate_platforms()
+                platform_managers[replay.level_filepath] = platform_manager
+            if not replay.frames:
+                continue
+
+        world_x, player_top, x_direction, instruction_number = replay.frames[frame_idx]
+        if x_direction == 1:
+            player.facing_left = False
+        elif x_direction == -1:
+            player.facing_left = True
+        player.rect.y = player_top
+
+        # Isti prikaz kao run_simulation_for_brain
+        render_x_bg = (-world_x) % bg_width # Scrolling pozadine
+        screen.blit(background_strip, (render_x_bg - bg_width, 0))
+        platform_managers[replay.level_filepath].draw_with_offset(screen, world_x)
+        player.draw(screen)
+
+        if font:
+            texts = [
+                f"Generacija: {replay.generation}",
+                f"Potez AI: {instruction_number}",
+                f"Vrijeme: {frame_idx / FPS:.2f} s"
+            ]
+            for i, text_content in enumerate(texts):
+                screen.blit(font.render(text_content, True, (0, 0, 0)), (10, 10 + i * 30))
+
+        pygame.display.update()
+        clock.tick(FPS)
+        frame_idx += 1
+
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    run_spectator(sys.stdin.buffer)
@@ -0,0 +1,161 @@
+import multiprocessing
+import queue
+import random
+import time
+
+from . import main_ai
+from . import array_brain
+from .ai_brain import Brain
+from .headless_simulation import SCREEN_WIDTH, SCREEN_HEIGHT, quantize_instructions, simulate_actions, compute_fitness
+from .fitness_cache import FitnessCache
+from .multi_level import MultiLevelResult
+from src.core import level
+
+# Steady-state evolucija bez granice generacija: čim je jedan mozak evaluiran, ulazi u populaciju umjesto
+# najslabijeg (ako nije slabiji od njega), a iz bolje polovice trenutne populacije odmah nastaje novo dijete
+# i šalje se na evaluaciju. Radni procesi uvijek imaju IN_FLIGHT_PER_WORKER zadataka, pa ne čekaju najsporiju
+# simulaciju generacije. Napredak se mjeri u evaluacijama u sekundi.
+
+IN_FLIGHT_PER_WORKER = 2 # Zadaci koji čekaju u redu svakog procesa, da proces ne miruje između rezultata
+
+
+def _evaluate_worker(task):
+    # Procesu se šalju samo kvantizirane instrukcije, koje se serijaliziraju puno brže od mozga
+    actions, level_filepaths, is_suite = task
+    results = [simulate_actions(actions, level.load_level(SCREEN_WIDTH, SCREEN_HEIGHT, filepath)) for filepath in level_filepaths]
+    return MultiLevelResult(results) if is_suite else results[0]
+
+
+class SteadyStateGA:
+    def __init__(self, brain_class, population_size=None, level_suite=None):
+        self.brain_class = brain_class
+        self.population_size = population_size or main_ai.POPULATION_SIZE
+        self.level_suite = level_suite
+        self.population = [] # Evaluirani mozgovi, najbolji prvi
+        self.issued = 0 # Mozgovi poslani na evaluaciju
+        self.evaluations = 0
+        self.replacements = 0 # Koliko je puta novi mozak zamijenio najslabijeg
+        self.best_fitness = -float('inf')
+        self.best_brain = None
+        self.winner = None # Prvi mozak koji je došao do cilja (na paketu levela: na svakom levelu)
+
+    @property
+    def won(self):
+        return self.winner is not None
+
+    def next_child(self):
+        # Nasumičan mozak dok se početna populacija ne pošalje, zatim mutirana kopija roditelja iz bolje polovice
+        self.issued += 1
+        if self.issued <= self.population_size or not self.population:
+            return self.brain_class(main_ai.INSTRUCTION_COUNT)
+        parent_pool = self.population[:max(1, self.population_size // 2)]
+        child = random.choice(parent_pool).clone()
+        child.mutate(main_ai.MUTATION_RATE, main_ai.NEW_INSTRUCTION_CHANCE)
+        return child
+
+    def insert(self, brain, result):
+        """Boduje evaluirani mozak i, ako je dovoljno dobar, stavlja ga u populaciju umjesto najslabijeg."""
+        self.evaluations += 1
+        brain.current_instruction_number = result.instructions_used
+        if self.level_suite is not None:
+            brain.fitness = self.level_suite.fitness(result, len(brain.instructions), brain.fitness)
+        else:
+            brain.fitness = compute_fitness(result, len(brain.instructions), brain.fitness)
+        brain.won = result.won
+        if brain.won and self.winner is None:
+            self.winner = brain.clone()
+            self.winner.fitness = brain.fitness
+            self.winner.won = True
+
+        if len(self.population) < self.population_size:
+            self.population.append(brain)
+        elif brain.fitness >= self.population[-1].fitness:
+            self.population[-1] = brain
+            self.replacements += 1
+        else:
+            return
+        self.population.sort(key=lambda b: b.fitness, reverse=True)
+        if brain.fitness > self.best_fitness:
+            self.best_fitness = brain.fitness
+            self.best_brain = brain.clone()
+            self.best_brain.fitness = brain.fitness
+
+    def progress(self, seconds, fitness_cache=None):
+        return {
+            "evaluations": self.evaluations,
+            "seconds": seconds,
+            "evaluations_per_sec": self.evaluations / seconds if seconds else 0.0,
+            "best_fitness": self.best_fitness,
+            "avg_fitness": sum(b.fitness for b in self.population) / len(self.population) if self.population else 0.0,
+            "replacements": self.replacements,
+            "fitness_cache": fitness_cache.stats() if fitness_cache is not None else {},
+        }
+
+
+def run_steady_state(evaluations, worker_count=1, population_size=None, level_filepath=None, level_suite=None,
+                     array_genomes=False, fitness_cache_enabled=True, progress_callback=None, report_interval=None):
+    """Steady-state evolucija do zadanog broja evaluacija ili pobjede; vraća SteadyStateGA.
+
+    progress_callback dobiva zapis napretka svakih report_interval evaluacija (zadano veličina populacije) i na kraju.
+    """
+    use_array_genomes = array_genomes and array_brain.is_available()
+    brain_class = array_brain.ArrayBrain if use_array_genomes else Brain
+    if use_array_genomes:
+        array_brain.seed(random.getrandbits(64))
+    level_filepath = level_filepath or main_ai.LEVEL_FILEPATH
+    if level_suite is not None: # Leveli se prevode prije stvaranja procesa, koji ih nasljeđuju
+        level_hash = level_suite.level_hash
+    else:
+        level_hash = level.load_level(SCREEN_WIDTH, SCREEN_HEIGHT, level_filepath).level_hash
+
+    ga = SteadyStateGA(brain_class, population_size, level_suite)
+    report_interval = report_interval or ga.population_size
+    fitness_cache = FitnessCache() if fitness_cache_enabled else None
+    pool = multiprocessing.Pool(processes=worker_count) if worker_count > 1 else None
+    max_in_flight = worker_count * IN_FLIGHT_PER_WORKER if pool is not None else 1
+    completed = queue.Queue() # (mozak, ishod ili None ako je evaluacija pala)
+    in_flight = 0
+    start_time = time.perf_counter()
+
+    level_filepaths = level_suite.level_filepaths if level_suite is not None else [level_filepath]
+
+    def submit():
+        brain = ga.next_child()
+        actions = tuple(quantize_instructions(brain.instructions))
+        key = (level_hash, actions) # Isti ključ kao genome_key
+        result = fitness_cache.get(key) if fitness_cache is not None else None
+        task = (actions, level_filepaths, level_suite is not None)
+        if result is not None:
+            completed.put((brain, key, result))
+        elif pool is None:
+            completed.put((brain, key, _evaluate_worker(task)))
+        else:
+            pool.apply_async(_evaluate_worker, (task,),
+                             callback=lambda result, brain=brain, key=key: completed.put((brain, key, result)),
+                             error_callback=lambda error, brain=brain, key=key: completed.put((brain, key, None)))
+
+    try:
+        while ga.evaluations < evaluations and not ga.won:
+            while in_flight < max_in_flight and ga.issued < evaluations:
+                submit()
+                in_flight += 1
+            if not in_flight:
+                break
+            brain, key, result = completed.get()
+            in_flight -= 1
+            if result is None:
+                ga.evaluations += 1 # Neuspjela evaluacija troši evaluaciju, ali mozak ne ulazi u populaciju
+                continue
+            if fitness_cache is not None:
+                fitness_cache.put(key, result)
+            ga.insert(brain, result)
+            if progress_callback is not None and ga.evaluations % report_interval == 0:
+                progress_callback(ga.progress(time.perf_counter() - start_time, fitness_cache))
+    finally:
+        if pool is not None: # Evaluacije koje su još u tijeku više ne trebaju
+            pool.terminate()
+            pool.join()
+
+    if progress_callback is not None and ga.evaluations % report_interval != 0:
+        progress_callback(ga.progress(time.perf_counter() - start_time, fitness_cache))
+    return ga
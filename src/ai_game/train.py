@@ -0,0 +1,110 @@
+import argparse
+import json
+import os
+import random
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # Treniranje nikad ne otvara prozor, ni ako se pygame uveze
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+from . import main_ai
+from . import island_model
+
+# Treniranje bez izbornika i prozora, za pokretanje na poslužiteljima bez ekrana:
+#     python -m src.ai_game.train --level src/core/level.txt --generations 500 --seed 1 --workers 8 --output best.pkl
+# Konstante genetskog algoritma iz main_ai postavljaju se iz argumenata. Najbolji mozak se na kraju sprema u
+# --output (isti format kao best_ai_path.pkl), a pobjednici i u arhivu genoma. Spremljeni AI se ne demonstrira.
+# best_ai_path.pkl paketa se nikad ne mijenja. Arhiva i checkpoint su zadano uz --output (npr. best_headless.genomes
+# i best_headless.checkpoint.pkl), pa istovremeni poslovi s različitim --output ne dijele datoteke.
+
+DEFAULT_OUTPUT_FILEPATH = "best_headless.pkl" # U trenutnom direktoriju
+ARCHIVE_EXTENSION = ".genomes"
+CHECKPOINT_EXTENSION = ".checkpoint.pkl"
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Treniranje AI-a za Super Toni Bros bez prozora")
+    parser.add_argument("--level", default=main_ai.LEVEL_FILEPATH, help="Datoteka levela")
+    parser.add_argument("--levels", nargs="+", help="Paket levela; fitness se agregira po --aggregation")
+    parser.add_argument("--aggregation", default=main_ai.LEVEL_AGGREGATION, choices=("mean", "min", "weighted"))
+    parser.add_argument("--weights", nargs="+", type=float, help="Težine levela za --aggregation weighted")
+    parser.add_argument("--population", type=int, default=main_ai.POPULATION_SIZE)
+    parser.add_argument("--instructions", type=int, default=main_ai.INSTRUCTION_COUNT)
+    parser.add_argument("--mutation-rate", type=float, default=main_ai.MUTATION_RATE)
+    parser.add_argument("--new-instruction-chance", type=float, default=main_ai.NEW_INSTRUCTION_CHANCE)
+    parser.add_argument("--generations", type=int, default=main_ai.NUM_GENERATIONS)
+    parser.add_argument("--elitism", type=int, default=main_ai.ELITISM_COUNT)
+    parser.add_argument("--seed", type=int, help="Sjeme generatora slučajnih brojeva (zadano: nasumično)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_FILEPATH, help="Datoteka za instrukcije najboljeg mozga")
+    parser.add_argument("--archive", help="Arhiva genoma za pobjednike (zadano: uz --output, nastavak .genomes)")
+    parser.add_argument("--workers", type=int, default=main_ai.WORKER_COUNT, help="Broj procesa za evaluaciju")
+    parser.add_argument("--batch", action="store_true", help="Simulira cijelu generaciju odjednom (NumPy)")
+    parser.add_argument("--prefix-checkpoints", action="store_true")
+    parser.add_argument("--array-genomes", action="store_true")
+    parser.add_argument("--pruning", action="store_true", help="Rezanje evaluacija ispod granice selekcije")
+    parser.add_argument("--islands", type=int, default=main_ai.ISLAND_COUNT, help="Broj otoka (procesa s vlastitom populacijom)")
+    parser.add_argument("--topology", default=island_model.TOPOLOGY_RING, choices=island_model.TOPOLOGIES)
+    parser.add_argument("--steady-state", action="store_true", help="Evolucija bez granice generacija")
+    parser.add_argument("--checkpoint", help="Datoteka checkpointa treniranja (zadano: uz --output, nastavak .checkpoint.pkl)")
+    parser.add_argument("--checkpoint-interval", type=int, default=main_ai.CHECKPOINT_INTERVAL)
+    parser.add_argument("--resume", action="store_true", help="Nastavlja treniranje iz --checkpoint")
+    parser.add_argument("--telemetry", help="JSONL datoteka za telemetriju svake generacije")
+    parser.add_argument("--replays", help="Mapa za snimke odabranih mozgova i najboljeg mozga (replay_viewer)")
+    parser.add_argument("--quiet", action="store_true", help="Bez ispisa napretka")
+    return parser
+
+
+def _print_progress(record):
+    if "generation" in record:
+        print(f"generacija {record['generation']}: najbolji {record['best_fitness']}, prosjek {record['avg_fitness']:.2f}",
+              flush=True)
+    else: # Steady-state zapis napretka
+        print(f"evaluacija {record['evaluations']}: najbolji {record['best_fitness']}, "
+              f"{record['evaluations_per_sec']:.1f} evaluacija/s", flush=True)
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.resume and (args.islands > 1 or args.steady_state):
+        parser.error("--resume nije podržan s --islands ni --steady-state")
+
+    main_ai.LEVEL_FILEPATH = os.path.abspath(args.level)
+    main_ai.POPULATION_SIZE = args.population
+    main_ai.INSTRUCTION_COUNT = args.instructions
+    main_ai.MUTATION_RATE = args.mutation_rate
+    main_ai.NEW_INSTRUCTION_CHANCE = args.new_instruction_chance
+    main_ai.NUM_GENERATIONS = args.generations
+    main_ai.ELITISM_COUNT = args.elitism
+    output_filepath = os.path.abspath(args.output)
+    output_stem = os.path.splitext(output_filepath)[0]
+    main_ai.SAVED_ARCHIVE_FILEPATH = os.path.abspath(args.archive) if args.archive else output_stem + ARCHIVE_EXTENSION
+    main_ai.CHECKPOINT_FILEPATH = os.path.abspath(args.checkpoint) if args.checkpoint else output_stem + CHECKPOINT_EXTENSION
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    best_brain = main_ai.run_genetic_algorithm(
+        worker_count=args.workers, batch_simulation=args.batch, prefix_checkpoints=args.prefix_checkpoints,
+        array_genomes=args.array_genomes, checkpoint_interval=args.checkpoint_interval, resume=args.resume,
+        fitness_pruning=args.pruning, telemetry_callback=None if args.quiet else _print_progress,
+        telemetry_filepath=args.telemetry, level_filepaths=[os.path.abspath(path) for path in args.levels or ()],
+        level_aggregation=args.aggregation, level_weights=args.weights, island_count=args.islands,
+        island_topology=args.topology, steady_state=args.steady_state, headless=True,
+        replay_directory=os.path.abspath(args.replays) if args.replays else None, legacy_brain_filepath=None)
+
+    if os.path.abspath(main_ai.SAVED_BRAIN_FILEPATH) == output_filepath and not main_ai.ai_has_won_session:
+        output_filepath = None # Mozak koji nije pobijedio ne smije zamijeniti spremljeni pobjednički AI
+    if best_brain is not None and output_filepath is not None:
+        main_ai.save_ai_instructions(best_brain.instructions, output_filepath)
+    summary = {
+        "won": main_ai.ai_has_won_session,
+        "best_fitness": best_brain.fitness if best_brain is not None else None,
+        "output": output_filepath if best_brain is not None else None,
+        "records": len(main_ai.generation_stats),
+    }
+    print(json.dumps(summary), flush=True)
+    return 0 if best_brain is not None else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
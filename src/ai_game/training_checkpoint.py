@@ -0,0 +1,40 @@
+import os
+import pickle
+import tempfile
+
+# Checkpoint treniranja: cijela populacija, stanje generatora slučajnih brojeva, broj generacije i najbolji mozak.
+# Datoteka se piše u privremenu datoteku u istom direktoriju pa atomarno preimenuje (os.replace),
+# tako da prekid procesa usred pisanja nikad ne ostavi nepotpun checkpoint.
+
+CHECKPOINT_VERSION = 1
+
+
+def save_checkpoint(state, filepath):
+    directory = os.path.dirname(os.path.abspath(filepath))
+    fd, temp_filepath = tempfile.mkstemp(prefix=".checkpoint-", dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(dict(state, version=CHECKPOINT_VERSION), f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno()) # Podaci moraju biti na disku prije preimenovanja
+        os.replace(temp_filepath, filepath)
+    except BaseException:
+        try:
+            os.remove(temp_filepath)
+        except OSError:
+            pass
+        raise
+
+
+def load_checkpoint(filepath):
+    """Vraća spremljeno stanje ili None ako checkpoint ne postoji ili je nečitljiv."""
+    try:
+        with open(filepath, 'rb') as f:
+            state = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        return None # Oštećen checkpoint se ignorira, kao i spremljeni AI
+    if not isinstance(state, dict) or state.get("version") != CHECKPOINT_VERSION:
+        return None
+    return state
@@ -0,0 +1,108 @@
+import json
+import math
+import time
+
+from .headless_simulation import EXIT_INSTRUCTIONS, EXIT_FALL, EXIT_STAGNATION, EXIT_WIN, EXIT_PRUNED
+
+# Telemetrija treniranja: na kraju svake generacije nastaje jedan zapis (rječnik koji se može spremiti kao JSON)
+# s fitnessom, razlozima završetka simulacija, brojem frameova i vremenima faza (evaluacija, iscrtavanje,
+# stvaranje sljedeće generacije). Zapis se predaje callbacku i/ili dodaje u JSONL datoteku.
+# Kad telemetrija nije uključena, main_ai ne stvara GenerationTelemetry i ništa se ne mjeri.
+
+EXIT_REASONS = (EXIT_FALL, EXIT_STAGNATION, EXIT_INSTRUCTIONS, EXIT_WIN, EXIT_PRUNED)
+
+
+class GenerationTelemetry:
+    def __init__(self, generation):
+        self.generation = generation
+        self.exits = dict.fromkeys(EXIT_REASONS, 0) # Razlog završetka simulacije -> broj mozgova
+        self.evaluated = 0
+        self.rendered = 0 # Mozgovi evaluirani iscrtanom simulacijom (bez poznatog razloga završetka)
+        self.frames_simulated = 0 # Frameovi stvarno simuliranih mozgova (bez ishoda iz cachea fitnessa)
+        self.timings = {"evaluation": 0.0, "rendering": 0.0, "breeding": 0.0, "checkpoint": 0.0}
+        self.start_time = time.perf_counter()
+
+    def record_result(self, result, simulated=True):
+        self.evaluated += 1
+        for level_result in getattr(result, "level_results", (result,)): # Na paketu levela broji se ishod svakog levela
+            self.exits[level_result.exit_reason] = self.exits.get(level_result.exit_reason, 0) + 1
+        if simulated:
+            self.frames_simulated += result.frames_survived
+
+    def record_rendered(self, won):
+        self.evaluated += 1
+        self.rendered += 1
+        if won:
+            self.exits[EXIT_WIN] += 1
+
+    def add_time(self, phase, seconds):
+        self.timings[phase] += seconds
+
+    def to_record(self, population, avg_fitness, best_fitness_overall, cache_stats=None):
+        timings = dict(self.timings)
+        timings["total"] = time.perf_counter() - self.start_time
+        return {
+            "generation": self.generation,
+            "timestamp": time.time(),
+            "population": len(population),
+            "evaluated": self.evaluated,
+            "rendered": self.rendered,
+            "best_fitness": max((brain.fitness for brain in population), default=None),
+            "avg_fitness": avg_fitness,
+            "best_fitness_overall": best_fitness_overall,
+            "frames_simulated": self.frames_simulated,
+            "exits": dict(self.exits),
+            "timings": timings,
+            "caches": dict(cache_stats or {}),
+        }
+
+
+def _finite_json(value):
+    # JSON nema Infinity ni NaN (npr. početni fitness -inf), pa takve vrijednosti postaju null
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, dict):
+        return {key: _finite_json(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite_json(item) for item in value]
+    return value
+
+
+class JsonlTelemetrySink:
+    """Callback telemetrije koji svaki zapis dodaje kao jedan JSON redak na kraj datoteke."""
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self._file = None
+
+    def __call__(self, record):
+        try:
+            if self._file is None:
+                self._file = open(self.filepath, "a")
+            self._file.write(json.dumps(_finite_json(record), allow_nan=False) + "\n")
+            self._file.flush() # Zapis preživi i prekid treniranja
+        except Exception as e:
+            pass # Greška pri pisanju telemetrije ne prekida treniranje
+
+    def close(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            except Exception as e:
+                pass
+            self._file = None
+
+
+def read_telemetry(filepath):
+    """Zapisi iz JSONL datoteke telemetrije; nedovršeni zadnji redak (prekid pisanja) se preskače."""
+    records = []
+    try:
+        with open(filepath, "r") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return records
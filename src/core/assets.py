@@ -0,0 +1,46 @@
+import os
+
+import pygame
+
+# Zajedničke slike igre za cijeli proces: svaka datoteka iz images/ učitava se i pretvara u format ekrana tek kad
+# je prvi put zatraži Player, PlatformManager ili neki ekran, a njene skalirane i zrcaljene varijante pamte se po
+# veličini i smjeru. Novi Player ili PlatformManager za svaki prikazani mozak tako ne čita disk ni ne skalira slike.
+# Headless simulacija ovaj modul nikad ne uvozi, pa treniranje bez prikaza ne učitava nijednu sliku.
+
+IMAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "images")
+
+_images = {} # (ime datoteke, alpha, veličina ili None, zrcaljeno) -> Surface
+
+
+def _load(name, alpha):
+    # convert treba postavljen video mod, pa se bez ekrana slika ne učitava (ni ne pamti)
+    image = pygame.image.load(os.path.join(IMAGES_DIR, name))
+    return image.convert_alpha() if alpha else image.convert()
+
+
+def get_image(name, size=None, flip_x=False, alpha=True):
+    """Slika iz images/ skalirana na size (širina, visina) i po potrebi zrcaljena; None ako se ne može učitati.
+
+    Vraćena slika je zajednička svim pozivateljima i ne smije se mijenjati.
+    """
+    size = tuple(size) if size is not None else None
+    key = (name, alpha, size, flip_x)
+    image = _images.get(key)
+    if image is not None:
+        return image
+    try:
+        if flip_x:
+            image = pygame.transform.flip(get_image(name, size, False, alpha), True, False)
+        elif size is not None:
+            image = pygame.transform.scale(get_image(name, None, False, alpha), size)
+        else:
+            image = _load(name, alpha)
+    except Exception as e: # Neuspjeh se ne pamti, pa se slika može učitati kad postane dostupna
+        return None
+    _images[key] = image
+    return image
+
+
+def clear():
+    # Zaboravlja sve učitane slike, npr. nakon promjene datoteka u images/
+    _images.clear()
@@ -0,0 +1,138 @@
+import hashlib
+import os
+from collections import namedtuple
+
+from src.core.spatial_index import PlatformIndex
+
+FIXED_PLATFORM_HEIGHT = 30 # Sve platforme iz datoteke imaju fiksnu visinu
+
+GOAL_WIDTH = 160
+GOAL_HEIGHT = 160
+
+STREAMING_MIN_FILE_SIZE = 1 << 20 # Veće datoteke (stotine tisuća platformi) učitavaju se po dijelovima (level_stream)
+
+# Geometrija levela bez ovisnosti o pygameu; pravokutnici su (x, y, širina, visina) torke
+
+
+def parse_platform_line(line):
+    # Platforma (x, y, širina, visina) iz jednog retka datoteke levela ili None
+    line = line.strip()
+    if not line or line.startswith('#'): # Ignorira prazne linije i komentare
+        return None
+    parts = line.split(',')
+    if len(parts) not in (3, 4): # Format: x,y,širina (stariji format ima i visinu koja se ignorira)
+        return None
+    try:
+        x = int(parts[0])
+        y = int(parts[1])
+        width = int(parts[2])
+    except ValueError:
+        return None # Ignorira linije s neispravnim brojevima
+    return (x, y, width, FIXED_PLATFORM_HEIGHT)
+
+
+def parse_level_file(level_filepath):
+    loaded_platforms = []
+    try:
+        with open(level_filepath, 'r') as f:
+            for line in f:
+                platform = parse_platform_line(line)
+                if platform is not None:
+                    loaded_platforms.append(platform)
+    except FileNotFoundError:
+        pass # Ako datoteka levela ne postoji, vraća praznu listu
+    return loaded_platforms
+
+
+def build_starting_ground(screen_height):
+    start_ground_initial_x = -200 # Počinje malo izvan ekrana lijevo
+    start_ground_visible_width = 300
+    start_ground_width = start_ground_visible_width + abs(start_ground_initial_x)
+    return (start_ground_initial_x, screen_height - 50, start_ground_width, 50)
+
+
+def build_left_wall(screen_height):
+    # Lijevi "zid" da igrač ne može otići previše ulijevo izvan mape
+    left_wall_width = 10
+    left_wall_x = build_starting_ground(screen_height)[0] - left_wall_width
+    return (left_wall_x, 0, left_wall_width, screen_height)
+
+
+def build_goal(target_platform):
+    # Zastavica se centrira iznad zadnje platforme iz datoteke
+    x, y, width, _ = target_platform
+    return (x + (width - GOAL_WIDTH) // 2, y - GOAL_HEIGHT, GOAL_WIDTH, GOAL_HEIGHT)
+
+
+class CompiledLevel(namedtuple("CompiledLevel", ["filepath", "platforms", "goal", "collision_boxes", "platform_index", "level_hash"])):
+    """Nepromjenjiva geometrija levela; prve dvije platforme su uvijek tlo i lijevi zid."""
+    __slots__ = ()
+
+    @property
+    def ground(self):
+        return self.platforms[0]
+
+    @property
+    def left_wall(self):
+        return self.platforms[1]
+
+    @property
+    def file_platforms(self):
+        return self.platforms[2:]
+
+
+def _collision_box(platform):
+    # pygame.Rect normalizira negativnu širinu/visinu pri provjeri preklapanja
+    x, y, width, height = platform
+    if width < 0:
+        x, width = x + width, -width
+    if height < 0:
+        y, height = y + height, -height
+    return (x, y, width, height)
+
+
+def compile_level(screen_width, screen_height, level_filepath):
+    platforms_from_file = parse_level_file(level_filepath)
+    platforms = [build_starting_ground(screen_height), build_left_wall(screen_height)]
+    platforms.extend(platforms_from_file)
+    goal = build_goal(platforms_from_file[-1]) if platforms_from_file else None
+
+    collision_boxes = tuple(_collision_box(platform) for platform in platforms)
+    level_hash = hashlib.sha1(repr((platforms, goal)).encode("ascii")).hexdigest() # Identitet levela neovisan o putanji
+    return CompiledLevel(level_filepath, tuple(platforms), goal, collision_boxes,
+                         PlatformIndex(collision_boxes), level_hash)
+
+
+_compiled_levels = {} # (apsolutna putanja, širina, visina ekrana) -> ((mtime, veličina), CompiledLevel)
+
+
+def _file_signature(level_filepath):
+    try:
+        stat = os.stat(level_filepath)
+    except OSError:
+        return None # Nepostojeća datoteka daje level bez platformi iz datoteke
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def load_level(screen_width, screen_height, level_filepath):
+    """Vraća zajednički CompiledLevel; datoteka se ponovno parsira samo kad joj se promijeni mtime ili veličina.
+
+    Za datoteke od barem STREAMING_MIN_FILE_SIZE bajtova vraća StreamingLevel s istim sučeljem.
+    """
+    cache_key = (os.path.abspath(level_filepath), screen_width, screen_height)
+    signature = _file_signature(level_filepath)
+    cached = _compiled_levels.get(cache_key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    if signature is not None and signature[1] >= STREAMING_MIN_FILE_SIZE:
+        from src.core.level_stream import StreamingLevel # level_stream koristi ovaj modul
+        compiled = StreamingLevel(screen_width, screen_height, level_filepath)
+    else:
+        compiled = compile_level(screen_width, screen_height, level_filepath)
+    _compiled_levels[cache_key] = (signature, compiled)
+    return compiled
+
+
+def clear_level_cache():
+    _compiled_levels.clear()
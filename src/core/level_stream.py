@@ -0,0 +1,313 @@
+import hashlib
+import math
+import os
+from array import array
+from collections import OrderedDict
+
+from src.core import level
+
+# Streaming učitavanje vrlo dugih levela. Datoteka se ne parsira odjednom: platforme se čitaju po dijelovima
+# (chunkovima) širine CHUNK_WIDTH u koordinatama svijeta, tek kad ih kamera ili simulirani igrač zatraži preko
+# platform_index.query. Indeks chunkova pamti samo bajt pomake redaka (8 bajtova po platformi), a u memoriji je
+# najviše MAX_LOADED_CHUNKS učitanih chunkova; najdavnije korišteni (oni daleko iza igrača) se izbacuju.
+#
+# Ključ platforme iz datoteke je FIRST_FILE_KEY + bajt pomak njenog retka, pa su ključevi rastući redoslijedom
+# datoteke, kao indeksi u CompiledLevel, i petlje sudara daju isti rezultat. Tlo i lijevi zid imaju ključeve 0 i 1.
+#
+# Generirani leveli pišu platforme slijeva nadesno, pa se datoteka indeksira samo malo dalje od x koji je
+# zatražen (SCAN_AHEAD_CHUNKS). Je li datoteka poredana provjerava se uzorkovanjem SORT_SAMPLES redaka pri prvom
+# upitu; neporedana datoteka indeksira se cijela, jednom. Platforma koja se pojavi nakon što je njen x raspon već
+# poslužen nedostajala je ranijim upitima, pa bi ishod simulacija ovisio o redoslijedu upita; tada se podiže
+# UnsortedLevelError (datoteku treba poredati po x). Cilj se čita s kraja datoteke, pa je učitavanje levela trenutno.
+
+CHUNK_WIDTH = 2048
+MAX_LOADED_CHUNKS = 32
+MAX_CHUNKS_PER_PLATFORM = 64 # Šire platforme se vraćaju uz svaki upit, kao u PlatformIndex
+FIRST_FILE_KEY = 2
+TAIL_BLOCK_SIZE = 4096
+SCAN_AHEAD_CHUNKS = 1 # Lokalni nered u redoslijedu platformi unutar ovoliko chunkova ne utječe na rezultat
+SORT_SAMPLES = 64
+
+
+class UnsortedLevelError(ValueError):
+    """Platforma iz datoteke leži u x rasponu koji je već poslužen upitima (datoteka nije poredana po x)."""
+
+
+class _PlatformView:
+    # Pogled na učitane platforme po ključu; column 0 su platforme iz datoteke, 1 pravokutnici za sudare.
+    # len i iteracija (redom ključeva) obuhvaćaju iste platforme: tlo, zid i platforme trenutno učitanih chunkova.
+    def __init__(self, streaming_level, column):
+        self._level = streaming_level
+        self._column = column
+
+    def __getitem__(self, key):
+        return self._level._entries[key][self._column]
+
+    def __len__(self):
+        return len(self._level._entries)
+
+    def __iter__(self):
+        entries = self._level._entries
+        return iter([entries[key][self._column] for key in sorted(entries)])
+
+    def __bool__(self):
+        return True # Tlo i lijevi zid postoje uvijek
+
+
+class StreamingLevel:
+    """Level s istim sučeljem kao CompiledLevel, čije se platforme čitaju iz datoteke po potrebi."""
+
+    def __init__(self, screen_width, screen_height, level_filepath, chunk_width=CHUNK_WIDTH, max_loaded_chunks=MAX_LOADED_CHUNKS):
+        self.filepath = level_filepath
+        self.screen_width = screen_width
+        self.screen_height = screen_height
+        self.chunk_width = chunk_width
+        self.max_loaded_chunks = max_loaded_chunks
+        self.platform_index = self # Upiti idu izravno levelu, koji po potrebi učitava chunkove
+        self.platforms = _PlatformView(self, 0)
+        self.collision_boxes = _PlatformView(self, 1)
+
+        self._fixed_keys = []
+        self._entries = {} # ključ -> (platforma, pravokutnik za sudare) za tlo, zid i učitane chunkove
+        self._entry_refs = {} # ključ -> broj učitanih chunkova koji sadrže platformu
+        for key, platform in enumerate((level.build_starting_ground(screen_height), level.build_left_wall(screen_height))):
+            box = level._collision_box(platform)
+            self._entries[key] = (platform, box)
+            if box[2] > 0 and box[3] > 0:
+                self._fixed_keys.append((key, box))
+
+        self._chunk_offsets = {} # indeks chunka -> array pomaka redaka platformi koje ga prekrivaju
+        self._wide_offsets = array('q')
+        self._wide_keys = None # Široke platforme se učitavaju jednom i ne izbacuju
+        self._loaded = OrderedDict() # indeks chunka -> lista ključeva, najdavnije korišten prvi
+        self._query_cache = {}
+        self._file = None
+        self._file_pid = None
+        self._scan_offset = 0
+        self._scanned_x = -math.inf # Najveći lijevi rub dosad pročitanih platformi
+        self._scan_done = False
+        self._served_x = -math.inf # Upiti su posluženi za sve x lijevo od ove granice
+        self._level_hash = None
+        self.is_sorted = None # Jesu li platforme u datoteci poredane po x (None dok se ne provjeri)
+        self.platform_count = 0
+        self.chunk_loads = 0
+        self.chunk_evictions = 0
+
+        last_platform = self._read_last_platform()
+        self.goal = level.build_goal(last_platform) if last_platform else None
+
+    @property
+    def ground(self):
+        return self._entries[0][0]
+
+    @property
+    def left_wall(self):
+        return self._entries[1][0]
+
+    @property
+    def file_platforms(self):
+        # Sve platforme iz datoteke; čita cijelu datoteku pa služi samo za alate, ne za igru
+        return tuple(level.parse_level_file(self.filepath))
+
+    @property
+    def level_hash(self):
+        # Sažetak sadržaja datoteke, računa se tek kad zatreba (npr. za cache fitnessa)
+        if self._level_hash is None:
+            digest = hashlib.sha1(f"stream:{self.screen_height}:".encode("ascii"))
+            try:
+                with open(self.filepath, 'rb') as f:
+                    for block in iter(lambda: f.read(1 << 20), b""):
+                        digest.update(block)
+            except OSError as e:
+                pass
+            self._level_hash = digest.hexdigest()
+        return self._level_hash
+
+    def compile(self):
+        """Cijeli level kao CompiledLevel, za načine rada kojima trebaju sve platforme odjednom."""
+        return level.compile_level(self.screen_width, self.screen_height, self.filepath)
+
+    def _open(self):
+        # Nakon forka procesi ne smiju dijeliti pomak iste otvorene datoteke
+        if self._file is None or self._file_pid != os.getpid():
+            self._file = open(self.filepath, 'rb')
+            self._file_pid = os.getpid()
+        return self._file
+
+    def close(self):
+        if self._file is not None and self._file_pid == os.getpid():
+            self._file.close()
+        self._file = None
+
+    def _read_last_platform(self):
+        # Zadnja ispravna platforma datoteke, čitanjem sve većih blokova s kraja
+        try:
+            with open(self.filepath, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                end = f.tell()
+                block_size = TAIL_BLOCK_SIZE
+                while True:
+                    start = max(0, end - block_size)
+                    f.seek(start)
+                    lines = f.read(end - start).split(b"\n")
+                    if start > 0:
+                        lines = lines[1:] # Prvi redak bloka može biti odrezan
+                    for line in reversed(lines):
+                        platform = level.parse_platform_line(line.decode("utf-8", "replace"))
+                        if platform is not None:
+                            return platform
+                    if start == 0:
+                        return None
+                    block_size *= 2
+        except OSError as e:
+            return None
+
+    def _chunk_range(self, box):
+        x, _, width, _ = box
+        return x // self.chunk_width, (x + width - 1) // self.chunk_width
+
+    def _looks_sorted(self, f):
+        # Lijevi rubovi platformi na jednoliko raspoređenim mjestima u datoteci moraju biti neopadajući
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        previous_x = -math.inf
+        for sample in range(1, SORT_SAMPLES + 1):
+            f.seek(size * sample // (SORT_SAMPLES + 1))
+            f.readline() # Ostatak odrezanog retka
+            for _ in range(8):
+                line = f.readline()
+                if not line:
+                    break
+                platform = level.parse_platform_line(line.decode("utf-8", "replace"))
+                if platform is not None:
+                    x = level._collision_box(platform)[0]
+                    if x < previous_x:
+                        return False
+                    previous_x = x
+                    break
+        return True
+
+    def _scan(self, x_limit):
+        # Indeksira retke od zadnjeg pročitanog dok se ne pročita platforma dovoljno desno od x_limit
+        if self._scan_done:
+            return
+        try:
+            f = self._open()
+        except OSError as e:
+            self._scan_done = True # Nepostojeća datoteka daje level bez platformi iz datoteke
+            return
+        if self.is_sorted is None:
+            self.is_sorted = self._looks_sorted(f)
+        scan_limit = x_limit + SCAN_AHEAD_CHUNKS * self.chunk_width
+        f.seek(self._scan_offset)
+        while True:
+            offset = f.tell()
+            line = f.readline()
+            if not line:
+                self._scan_done = True
+                break
+            platform = level.parse_platform_line(line.decode("utf-8", "replace"))
+            if platform is None:
+                continue
+            self.platform_count += 1
+            box = level._collision_box(platform)
+            if box[0] < self._scanned_x:
+                self.is_sorted = False # Od sada se indeksira do kraja datoteke
+            if box[0] < self._served_x:
+                self._scan_offset = offset # Svaki sljedeći upit ponovno nailazi na istu platformu
+                raise UnsortedLevelError(f"{self.filepath}: platforma na x={box[0]} je u retku nakon platformi desno "
+                                         f"od x={self._served_x}; poredajte level po x")
+            self._scanned_x = max(self._scanned_x, box[0])
+            if box[2] > 0 and box[3] > 0:
+                first_chunk, last_chunk = self._chunk_range(box)
+                if last_chunk - first_chunk >= MAX_CHUNKS_PER_PLATFORM:
+                    self._wide_offsets.append(offset)
+                    self._unload_wide()
+                else:
+                    for chunk in range(first_chunk, last_chunk + 1):
+                        self._chunk_offsets.setdefault(chunk, array('q')).append(offset)
+                        self._unload_chunk(chunk) # Učitani chunk bez ove platforme (neporedana datoteka) više ne vrijedi
+            if self.is_sorted and box[0] > scan_limit:
+                self._scan_offset = f.tell()
+                return
+        self._scan_offset = f.tell()
+
+    def _read_entries(self, offsets):
+        f = self._open()
+        keys = []
+        for offset in offsets:
+            key = FIRST_FILE_KEY + offset
+            keys.append(key)
+            if key in self._entry_refs:
+                self._entry_refs[key] += 1
+                continue
+            f.seek(offset)
+            platform = level.parse_platform_line(f.readline().decode("utf-8", "replace"))
+            self._entries[key] = (platform, level._collision_box(platform))
+            self._entry_refs[key] = 1
+        return keys
+
+    def _release_entries(self, keys):
+        for key in keys:
+            self._entry_refs[key] -= 1
+            if not self._entry_refs[key]:
+                del self._entry_refs[key]
+                del self._entries[key]
+
+    def _load_chunk(self, chunk):
+        keys = self._loaded.get(chunk)
+        if keys is not None:
+            self._loaded.move_to_end(chunk)
+            return keys
+        keys = self._read_entries(self._chunk_offsets.get(chunk, ()))
+        self._loaded[chunk] = keys
+        self.chunk_loads += 1
+        return keys
+
+    def _unload_chunk(self, chunk):
+        keys = self._loaded.pop(chunk, None)
+        if keys is not None:
+            self._release_entries(keys)
+            self._query_cache.clear()
+
+    def _unload_wide(self):
+        if self._wide_keys is not None:
+            self._release_entries(self._wide_keys)
+            self._wide_keys = None
+            self._query_cache.clear()
+
+    def _evict(self, keep_count):
+        # Izbacuje najdavnije korištene chunkove; chunkovi trenutnog upita su zadnji u redu i ostaju
+        while len(self._loaded) > max(self.max_loaded_chunks, keep_count):
+            _, keys = self._loaded.popitem(last=False)
+            self._release_entries(keys)
+            self.chunk_evictions += 1
+            self._query_cache.clear()
+
+    def query(self, left, right):
+        """Ključevi platformi koje mogu preklapati x raspon [left, right), rastućim redoslijedom (kao PlatformIndex)."""
+        first_chunk = int(math.floor(left / self.chunk_width))
+        last_chunk = int(math.floor(right / self.chunk_width))
+        cache_key = (first_chunk, last_chunk)
+        candidates = self._query_cache.get(cache_key)
+        if candidates is not None:
+            for chunk in range(first_chunk, last_chunk + 1):
+                self._loaded.move_to_end(chunk)
+            return candidates
+
+        self._scan((last_chunk + 1) * self.chunk_width)
+        self._served_x = max(self._served_x, (last_chunk + 1) * self.chunk_width)
+        if self._wide_keys is None:
+            self._wide_keys = self._read_entries(self._wide_offsets)
+        found = set(self._wide_keys)
+        for key, box in self._fixed_keys:
+            box_first, box_last = self._chunk_range(box)
+            if box_first <= last_chunk and box_last >= first_chunk:
+                found.add(key)
+        for chunk in range(first_chunk, last_chunk + 1):
+            found.update(self._load_chunk(chunk))
+        self._evict(last_chunk - first_chunk + 1)
+
+        candidates = sorted(found)
+        self._query_cache[cache_key] = candidates
+        return candidates
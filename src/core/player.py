@@ -1,5 +1,6 @@
 import pygame
-import os
+
+from src.core import assets
 
 class Player:
     def __init__(self, x, y, width, height):
@@ -12,16 +13,11 @@ class Player:
         self.on_ground = False
         self.facing_left = False
 
-        base_path = os.path.dirname(os.path.abspath(__file__)) 
-        image_path = os.path.join(base_path, "..", "..", "images", "Player.png")
-
-
-        try:
-            self.image_right = pygame.image.load(image_path).convert_alpha()
-            self.image_right = pygame.transform.scale(self.image_right, (original_width, original_height))
-            self.image_left = pygame.transform.flip(self.image_right, True, False)
-            self.image = self.image_right
-        except pygame.error as e:
+        # Slike su zajedničke svim igračima iste veličine i učitavaju se jednom po procesu
+        self.image_right = assets.get_image("Player.png", (original_width, original_height))
+        self.image_left = assets.get_image("Player.png", (original_width, original_height), flip_x=True)
+        self.image = self.image_right
+        if self.image_right is None or self.image_left is None:
             self.image = pygame.Surface((original_width, original_height))
             self.image.fill((255,0,0))
             self.image_right = self.image
@@ -0,0 +1,159 @@
+import math
+from collections import OrderedDict
+
+import pygame
+
+# Cache za iscrtavanje levela: svaka slika se skalira samo jednom po veličini, a statični dio levela
+# (tlo, platforme i zastavica) se unaprijed iscrtava u pločice fiksne širine u koordinatama svijeta.
+# Iscrtavanje frame-a je tada nekoliko blitova pločica koje pokrivaju ekran.
+
+TILE_WIDTH = 512
+MAX_CACHED_TILES = 16 # Pločice se iscrtavaju tek kad zatrebaju, pa i dugi leveli zauzimaju ograničenu memoriju
+MAX_SCALED_IMAGES = 256
+
+GROUND_COLOR = (0, 150, 0) # Boje kad se slika ne može skalirati, kao u PlatformManager
+PLATFORM_COLOR = (100, 100, 100)
+GOAL_COLOR = (255, 200, 0)
+
+
+class ScaledImageCache:
+    def __init__(self, max_entries=MAX_SCALED_IMAGES):
+        self.max_entries = max_entries
+        self._images = OrderedDict() # (id slike, širina, visina) -> (slika, skalirana slika)
+
+    def get(self, image, width, height):
+        key = (id(image), width, height)
+        cached = self._images.get(key)
+        if cached is not None and cached[0] is image: # Provjera identiteta štiti od ponovno iskorištenog id-a
+            self._images.move_to_end(key)
+            return cached[1]
+        scaled = pygame.transform.scale(image, (width, height))
+        self._images[key] = (image, scaled)
+        if len(self._images) > self.max_entries:
+            self._images.popitem(last=False)
+        return scaled
+
+    def clear(self):
+        self._images.clear()
+
+
+def blit_scaled(screen, scaled_images, image, rect, dest, fallback_color):
+    try:
+        screen.blit(scaled_images.get(image, rect[2], rect[3]), dest)
+    except Exception as e: # Fallback ako slika ne radi
+        pygame.draw.rect(screen, fallback_color, (dest[0], dest[1], rect[2], rect[3]))
+
+
+class LevelTileAtlas:
+    """Statični level unaprijed iscrtan u pločice širine TILE_WIDTH."""
+
+    def __init__(self, compiled_level, screen_height, scaled_images, ground_image, platform_image, flag_image, tile_width=TILE_WIDTH):
+        self.compiled_level = compiled_level
+        self.screen_height = screen_height
+        self.scaled_images = scaled_images
+        self.ground_image = ground_image
+        self.platform_image = platform_image
+        self.flag_image = flag_image
+        self.tile_width = tile_width
+        self._tiles = OrderedDict() # indeks pločice -> (Surface, x, y) unutar pločice (None za praznu pločicu)
+
+    def _bake_tile(self, tile_idx):
+        tile_left = tile_idx * self.tile_width
+        tile_right = tile_left + self.tile_width
+        compiled_level = self.compiled_level
+        tile = pygame.Surface((self.tile_width, self.screen_height), pygame.SRCALPHA)
+
+        # Isti redoslijed kao PlatformManager.draw: tlo, platforme iz datoteke (bez lijevog zida), zastavica
+        for platform_idx in compiled_level.platform_index.query(tile_left, tile_right):
+            if platform_idx == 1:
+                continue
+            image = self.ground_image if platform_idx == 0 else self.platform_image
+            if not image:
+                continue
+            x, y, width, height = compiled_level.platforms[platform_idx]
+            if x < tile_right and x + width > tile_left:
+                blit_scaled(tile, self.scaled_images, image, (x, y, width, height), (x - tile_left, y),
+                            GROUND_COLOR if platform_idx == 0 else PLATFORM_COLOR)
+
+        goal = compiled_level.goal
+        if goal and self.flag_image and goal[0] < tile_right and goal[0] + goal[2] > tile_left:
+            try:
+                tile.blit(self.flag_image, (goal[0] - tile_left, goal[1]))
+            except Exception as e:
+                pygame.draw.rect(tile, GOAL_COLOR, (goal[0] - tile_left, goal[1], goal[2], goal[3]))
+
+        # Pločica se obrezuje na neprozirni dio, a RLE kodiranje preskače prozirne piksele pri blitu
+        bounding_rect = tile.get_bounding_rect()
+        if not bounding_rect.width or not bounding_rect.height:
+            return None
+        tile = tile.subsurface(bounding_rect).copy()
+        tile.set_alpha(255, pygame.RLEACCEL)
+        return (tile, bounding_rect.x, bounding_rect.y)
+
+    def _get_tile(self, tile_idx):
+        if tile_idx in self._tiles:
+            self._tiles.move_to_end(tile_idx)
+            return self._tiles[tile_idx]
+        tile = self._bake_tile(tile_idx)
+        self._tiles[tile_idx] = tile
+        if len(self._tiles) > MAX_CACHED_TILES:
+            self._tiles.popitem(last=False)
+        return tile
+
+    def _visible_tiles(self, screen_width, world_left):
+        screen_offset = math.floor(-world_left) # Isto zaokruživanje kao blit platforme na poziciju x - world_left
+        first_tile = (-screen_offset) // self.tile_width
+        last_tile = (screen_width - 1 - screen_offset) // self.tile_width
+        for tile_idx in range(first_tile, last_tile + 1):
+            tile = self._get_tile(tile_idx)
+            if tile is not None:
+                surface, x, y = tile
+                yield surface, (tile_idx * self.tile_width + screen_offset + x, y)
+
+    def draw(self, screen, world_left):
+        # world_left je x koordinata svijeta na lijevom rubu ekrana (može biti decimalna)
+        for surface, position in self._visible_tiles(screen.get_width(), world_left):
+            screen.blit(surface, position)
+
+    def visible_rects(self, screen_width, world_left):
+        """Pravokutnici ekrana koje bi draw prekrio, bez iscrtavanja."""
+        return [pygame.Rect(position, surface.get_size()) for surface, position in self._visible_tiles(screen_width, world_left)]
+
+    def clear(self):
+        self._tiles.clear()
+
+
+
+def compose_background(image, width, height, fill_color=(200, 200, 255)):
+    """Pozadina popločana slikom, složena jednom umjesto blitanja pločica u svakom frame-u."""
+    background = pygame.Surface((width, height)).convert()
+    if image is None or image.get_width() <= 0 or image.get_height() <= 0:
+        background.fill(fill_color)
+        return background
+    for x in range(0, width, image.get_width()):
+        for y in range(0, height, image.get_height()):
+            background.blit(image, (x, y))
+    return background
+
+
+def compose_scrolling_background(image, screen_width, screen_height):
+    # Traka dovoljno široka da pri svakom pomaku od 0 do širine slike prekrije cijeli ekran
+    image_width = image.get_width()
+    return compose_background(image, screen_width + image_width, screen_height)
+
+
+def merge_dirty_rects(rects):
+    """Spaja pravokutnike koji se preklapaju, tako da se nijedan piksel ne iscrtava dvaput."""
+    merged = [pygame.Rect(rect) for rect in rects if rect.width > 0 and rect.height > 0]
+    changed = True
+    while changed:
+        changed = False
+        for i in range(len(merged)):
+            for j in range(i + 1, len(merged)):
+                if merged[i].colliderect(merged[j]):
+                    merged[i] = merged[i].union(merged.pop(j))
+                    changed = True
+                    break
+            if changed:
+                break
+    return merged
@@ -0,0 +1,47 @@
+import math
+
+# Široka faza provjere sudara: platforme se po x osi raspoređuju u ćelije jednake širine.
+# Upit vraća indekse platformi (u izvornom redoslijedu) koje se mogu preklapati s danim x rasponom,
+# pa petlje sudara daju isti rezultat kao linearni prolaz kroz sve platforme.
+
+CELL_WIDTH = 256
+MAX_CELLS_PER_PLATFORM = 64 # Šire platforme (npr. dugo tlo) provjeravaju se uvijek
+MAX_CACHED_QUERIES = 4096
+
+
+class PlatformIndex:
+    def __init__(self, boxes, cell_width=CELL_WIDTH):
+        self.cell_width = cell_width
+        self.cells = {} # indeks ćelije -> lista indeksa platformi
+        self.wide_platforms = [] # Platforme koje pokrivaju previše ćelija
+        self._query_cache = {}
+
+        for platform_idx, (x, y, width, height) in enumerate(boxes):
+            if width <= 0 or height <= 0:
+                continue # Prazni pravokutnici se nikad ne sudaraju
+            first_cell = x // cell_width
+            last_cell = (x + width - 1) // cell_width
+            if last_cell - first_cell >= MAX_CELLS_PER_PLATFORM:
+                self.wide_platforms.append(platform_idx)
+                continue
+            for cell in range(first_cell, last_cell + 1):
+                self.cells.setdefault(cell, []).append(platform_idx)
+
+    def query(self, left, right):
+        """Indeksi platformi koje mogu preklapati x raspon [left, right), rastućim redoslijedom."""
+        first_cell = int(math.floor(left / self.cell_width))
+        last_cell = int(math.floor(right / self.cell_width))
+        cache_key = (first_cell, last_cell)
+        candidates = self._query_cache.get(cache_key)
+        if candidates is not None:
+            return candidates
+
+        found = set(self.wide_platforms)
+        for cell in range(first_cell, last_cell + 1):
+            found.update(self.cells.get(cell, ()))
+        candidates = sorted(found)
+
+        if len(self._query_cache) >= MAX_CACHED_QUERIES:
+            self._query_cache.clear()
+        self._query_cache[cache_key] = candidates
+        return candidates
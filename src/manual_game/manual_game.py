@@ -4,6 +4,10 @@ import os
 
 from src.core.platforms import PlatformManager
 from src.core.player import Player
+from src.core import render_cache
+from src.core import assets
+
+DIRTY_RECT_RENDERING = True # Osvježavaju se samo promijenjeni dijelovi ekrana (igrač, vrijeme, pomaknute platforme)
 
 
 def run_game(level_filepath): 
@@ -13,20 +17,16 @@ def run_game(level_filepath):
     screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
     pygame.display.set_caption("Super Toni Bros - Ručna Igra")
 
-    base_path = os.path.dirname(os.path.abspath(__file__)) 
-    background_path = os.path.join(base_path, "..", "..", "images", "Background.jpeg")
-    try:
-        background_image = pygame.image.load(background_path).convert()
-    except pygame.error as e:
+    background_image = assets.get_image("Background.jpeg", alpha=False)
+    if background_image is None:
         background_image = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
         background_image.fill((200, 200, 255)) 
+    background_surface = render_cache.compose_background(background_image, SCREEN_WIDTH, SCREEN_HEIGHT) # Pozadina se slaže samo jednom
+    screen_rect = screen.get_rect()
 
 
-    win_image_path = os.path.join(base_path, "..", "..", "images", "Winner's_scene.png")
-    try:
-        win_image = pygame.image.load(win_image_path).convert()
-        win_image = pygame.transform.scale(win_image, (SCREEN_WIDTH, SCREEN_HEIGHT))
-    except pygame.error as e:
+    win_image = assets.get_image("Winner's_scene.png", (SCREEN_WIDTH, SCREEN_HEIGHT), alpha=False)
+    if win_image is None:
         win_image = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
         win_image.fill((0,255,0)) 
 
@@ -53,12 +53,13 @@ def run_game(level_filepath):
         player.rect.y = SCREEN_HEIGHT - player.rect.height - 50 
         player.on_ground = True 
         
+    view_offset_x = 0 # Pomak kamere; platforme ostaju u koordinatama svijeta
+
     start_time = pygame.time.get_ticks()
 
     def reset_game():
-        nonlocal player, platform_manager 
-        platform_manager = PlatformManager(SCREEN_WIDTH, SCREEN_HEIGHT, level_filepath)
-        platform_manager.generate_platforms()
+        nonlocal player, view_offset_x
+        view_offset_x = 0 # Level se ne učitava ponovno, samo se kamera vraća na početak
         if platform_manager.platforms:
             first_platform_rect_reset = platform_manager.platforms[0]
             player_initial_y_reset = first_platform_rect_reset.top - player.rect.height
@@ -95,6 +96,10 @@ def run_game(level_filepath):
     game_won = False
     victory_elapsed_time = 0
     frame_counter = 0
+    full_redraw = True # Prvi frame i frame nakon prekrivanja prozora iscrtavaju cijeli ekran
+    previous_player_rect = previous_timer_rect = None
+    previous_platform_rects = []
+    drawn_view_offset_x = view_offset_x
 
     while running:
         frame_counter += 1
@@ -104,14 +109,6 @@ def run_game(level_filepath):
             current_ticks = pygame.time.get_ticks()
             elapsed_time = (current_ticks - start_time) / 1000
 
-        if background_image.get_width() > 0 and background_image.get_height() > 0 : 
-            for x_bg in range(0, SCREEN_WIDTH, background_image.get_width()):
-                for y_bg in range(0, SCREEN_HEIGHT, background_image.get_height()):
-                    screen.blit(background_image, (x_bg, y_bg))
-        else:
-            screen.fill((200,200,255)) 
-
-
         keys = pygame.key.get_pressed()
 
         if keys[pygame.K_SPACE] and player.on_ground:
@@ -135,43 +132,69 @@ def run_game(level_filepath):
         
         if requested_scroll_offset < 0: 
             if len(platform_manager.platforms) > 1: 
-                left_wall = platform_manager.platforms[1] 
-                if (player.rect.left) < (left_wall.right - requested_scroll_offset) :
-                     actual_scroll_offset = (left_wall.right - player.rect.left)
+                left_wall_right = platform_manager.platforms[1].right - view_offset_x # Desni rub lijevog zida na ekranu
+                if (player.rect.left) < (left_wall_right - requested_scroll_offset) :
+                     actual_scroll_offset = (left_wall_right - player.rect.left)
                      actual_scroll_offset = min(0, actual_scroll_offset) if requested_scroll_offset < 0 else max(0, actual_scroll_offset)
 
-        platform_manager.update_platforms(actual_scroll_offset)
+        view_offset_x += actual_scroll_offset # Kamera se pomiče umjesto svih platformi
 
         player.on_ground = False
-        for plat_idx, plat in enumerate(platform_manager.platforms):
+        for plat_idx in platform_manager.collision_candidates(player.rect, view_offset_x):
             if plat_idx == 1: 
                 continue
+            plat = platform_manager.platforms[plat_idx].move(-view_offset_x, 0) # Pozicija platforme na ekranu
 
             if player.collide_with_platform(plat):
                 player.on_ground = True
                 break
 
-        if not game_won and platform_manager.goal and player.rect.colliderect(platform_manager.goal):
+        if not game_won and platform_manager.goal and player.rect.colliderect(platform_manager.goal.move(-view_offset_x, 0)):
             game_won = True
             victory_elapsed_time = elapsed_time
             if show_victory_screen(victory_elapsed_time):
                 running = False 
+            full_redraw = True
         
         if not running:
             break 
 
-        player.draw(screen)
-        platform_manager.draw(screen)
-
         timer_display_value = victory_elapsed_time if game_won else elapsed_time
         timer_text = timer_font.render(f"Time: {timer_display_value:.2f} s", True, (0, 0, 0))
-        screen.blit(timer_text, (10, 10))
+        player_rect = player.rect.copy()
+        timer_rect = timer_text.get_rect(topleft=(10, 10))
+        platform_rects = platform_manager.visible_rects(view_offset_x)
+
+        if DIRTY_RECT_RENDERING and not full_redraw:
+            dirty_rects = [previous_player_rect, player_rect, previous_timer_rect, timer_rect]
+            if view_offset_x != drawn_view_offset_x: # Platforme su se pomaknule: brišu se stare i crtaju nove pozicije
+                dirty_rects += previous_platform_rects + platform_rects
+            dirty_rects = render_cache.merge_dirty_rects([rect.clip(screen_rect) for rect in dirty_rects])
+            for dirty_rect in dirty_rects: # Svaki dio se iscrtava istim redoslijedom kao cijeli ekran
+                screen.set_clip(dirty_rect)
+                screen.blit(background_surface, (0, 0))
+                player.draw(screen)
+                platform_manager.draw_with_offset(screen, view_offset_x) # Iscrtavaju se samo pločice unutar ekrana
+            screen.set_clip(None)
+            screen.blit(timer_text, (10, 10))
+            pygame.display.update(dirty_rects)
+        else:
+            screen.blit(background_surface, (0, 0))
+            player.draw(screen)
+            platform_manager.draw_with_offset(screen, view_offset_x) # Iscrtavaju se samo pločice unutar ekrana
+            screen.blit(timer_text, (10, 10))
+            pygame.display.update()
+            full_redraw = False
 
-        pygame.display.update()
+        previous_player_rect, previous_timer_rect = player_rect, timer_rect
+        previous_platform_rects = platform_rects
+        drawn_view_offset_x = view_offset_x
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
+            if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED): # Sadržaj prozora je izgubljen
+                full_redraw = True
             if game_won and (event.type == pygame.KEYDOWN or event.type == pygame.MOUSEBUTTONDOWN):
                  if not running: 
                      pass
@@ -1,5 +1,6 @@
 import os
 import sys
+import threading
 import pygame
 
 pygame.init()
@@ -14,6 +15,7 @@ if project_root not in sys.path:
 try:
     from src.manual_game import manual_game as main_module
     from src.ai_game import main_ai as main_ga_module
+    from src.core import assets
 
     run_manual_game = main_module.run_game
     run_genetic_algorithm = main_ga_module.run_genetic_algorithm
@@ -68,14 +70,7 @@ def main_menu():
 
     level_filepath_menu = os.path.join(project_root, "src", "core", "level.txt")
 
-    background_image = None
-    try:
-        background_path_menu = os.path.join(project_root, "images", "Background.jpeg")
-        if os.path.exists(background_path_menu):
-            background_image = pygame.image.load(background_path_menu).convert()
-            background_image = pygame.transform.scale(background_image, (SCREEN_WIDTH, SCREEN_HEIGHT))
-    except pygame.error as e:
-        pass
+    background_image = assets.get_image("Background.jpeg", (SCREEN_WIDTH, SCREEN_HEIGHT), alpha=False) # None ako slika ne postoji
 
     button_width = 300
     button_height = 70
@@ -84,6 +79,8 @@ def main_menu():
     ai_play_button_rect = pygame.Rect((SCREEN_WIDTH - button_width) // 2, SCREEN_HEIGHT // 2 + spacing // 2, button_width, button_height)
     exit_button_rect = pygame.Rect((SCREEN_WIDTH - button_width) // 2, SCREEN_HEIGHT // 2 + button_height + spacing * 1.5, button_width, button_height)
 
+    ai_thread = None # Trening uz promatrača radi u pozadini, pa izbornik ostaje aktivan
+
     running = True
     while running:
         is_manual_hover = manual_play_button_rect.collidepoint(pygame.mouse.get_pos())
@@ -102,9 +99,14 @@ def main_menu():
                         screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
                         pygame.display.set_caption("Super Toni Bros - Izbornik")
                     elif is_ai_hover:
-                        run_genetic_algorithm()
-                        screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-                        pygame.display.set_caption("Super Toni Bros - Izbornik")
+                        if main_ga_module.SPECTATOR_RENDERING:
+                            if ai_thread is None or not ai_thread.is_alive():
+                                ai_thread = threading.Thread(target=run_genetic_algorithm, daemon=True)
+                                ai_thread.start()
+                        else:
+                            run_genetic_algorithm()
+                            screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+                            pygame.display.set_caption("Super Toni Bros - Izbornik")
                     elif is_exit_hover:
                         running = False
         
@@ -118,7 +120,8 @@ def main_menu():
 
         draw_text("Super Toni Bros", title_font, WHITE, screen, SCREEN_WIDTH // 2, SCREEN_HEIGHT // 4)
         draw_button(screen, manual_play_button_rect, "Igraj Ručno", WHITE, BUTTON_COLOR, BUTTON_HOVER_COLOR)
-        draw_button(screen, ai_play_button_rect, "Pokreni AI", WHITE, BUTTON_COLOR, BUTTON_HOVER_COLOR)
+        ai_button_text = "AI trenira..." if ai_thread is not None and ai_thread.is_alive() else "Pokreni AI"
+        draw_button(screen, ai_play_button_rect, ai_button_text, WHITE, BUTTON_COLOR, BUTTON_HOVER_COLOR)
         draw_button(screen, exit_button_rect, "Izlaz", WHITE, BUTTON_COLOR, BUTTON_HOVER_COLOR)
 
         pygame.display.update()
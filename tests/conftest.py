@@ -0,0 +1,67 @@
+import os
+import random
+import sys
+
+import pytest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+SHIPPED_LEVEL = os.path.join(PROJECT_ROOT, "src", "core", "level.txt")
+
+
+def _random_level_lines(rng, platform_count):
+    # Platforme slijeva nadesno s razmacima za pad, stepenicama i niskim platformama za udarac glavom
+    lines = []
+    x = 300
+    for _ in range(platform_count):
+        x += rng.randint(80, 320)
+        y = rng.choice([rng.randint(250, 520), rng.randint(380, 470)])
+        lines.append(f"{x},{y},{rng.randint(60, 300)}")
+    return lines
+
+
+@pytest.fixture(scope="session")
+def level_files(tmp_path_factory):
+    """Putanje levela: isporučeni level, nasumični leveli, lako prohodan level i level s dugim tlom."""
+    directory = tmp_path_factory.mktemp("levels")
+    rng = random.Random(2024)
+    levels = {"shipped": SHIPPED_LEVEL}
+    for idx in range(4):
+        levels[f"random_{idx}"] = _random_level_lines(rng, rng.randint(6, 30))
+    levels["easy"] = ["300,500,300"] # Cilj se dohvati hodanjem udesno
+    levels["long_ground"] = ["300,500,6000", "4000,420,100", "4300,380,100", "9000,300,100"]
+    levels["head_bump"] = ["300,500,900", "450,390,200", "800,360,150", "1300,480,200"]
+    for name, lines in levels.items():
+        if isinstance(lines, list):
+            path = directory / f"{name}.txt"
+            path.write_text("# x,y,sirina\n" + "\n".join(lines) + "\n")
+            levels[name] = str(path)
+    return levels
+
+
+def _genomes(seed, count):
+    rng = random.Random(seed)
+    genomes = [
+        [(False, 30, 1)] * 40, # Hodanje udesno (pobjeda na lakom levelu)
+        [(False, 30, -1)] * 10, # Hodanje ulijevo do zida
+        [(False, 30, 0)] * 12, # Stajanje (stagnacija)
+        [(True, 30, 1)] * 30, # Stalno skakanje udesno (pad u razmak)
+        [(True, 5, 1), (False, 0, 1)] * 10, # Kratke i prazne instrukcije
+        [(False, 3, 1)] * 3, # Premalo instrukcija
+    ]
+    for _ in range(count):
+        length = rng.choice([5, 20, 60, 120])
+        genomes.append([(rng.random() < 0.35, rng.randint(0, 30), rng.choice([-1, 0, 1, 1, 1, 1]))
+                        for _ in range(length)])
+    return genomes
+
+
+@pytest.fixture(scope="session")
+def genomes():
+    """Kvantizirani genomi (skok, broj frameova, smjer): ručno složeni za svaki izlaz simulacije i nasumični."""
+    return _genomes(7, 40)
@@ -0,0 +1,16 @@
+import pytest
+
+from src.ai_game import batch_simulation
+from src.ai_game import headless_simulation as hs
+from src.core import level
+
+pytestmark = pytest.mark.skipif(not batch_simulation.is_available(), reason="NumPy nije instaliran")
+
+
+def test_batch_simulation_matches_per_brain(level_files, genomes):
+    for path in level_files.values():
+        compiled_level = level.load_level(hs.SCREEN_WIDTH, hs.SCREEN_HEIGHT, path)
+        results = batch_simulation.simulate_actions_batch(genomes, compiled_level)
+        for actions, result in zip(genomes, results):
+            expected = hs.simulate_actions(actions, compiled_level, event_stepping=False)
+            assert vars(result) == vars(expected), (path, actions)
@@ -0,0 +1,29 @@
+from src.ai_game import headless_simulation as hs
+from src.core import level
+from src.core.level_stream import StreamingLevel
+
+
+def test_event_stepping_matches_frame_stepping(level_files, genomes):
+    for path in level_files.values():
+        compiled_level = level.load_level(hs.SCREEN_WIDTH, hs.SCREEN_HEIGHT, path)
+        for actions in genomes:
+            frame_snapshots, event_snapshots = [], []
+            expected = hs.simulate_actions(actions, compiled_level, snapshots=frame_snapshots, event_stepping=False)
+            result = hs.simulate_actions(actions, compiled_level, snapshots=event_snapshots, event_stepping=True)
+            assert vars(result) == vars(expected), (path, actions)
+            assert event_snapshots == frame_snapshots
+            for start_index in (1, len(frame_snapshots) // 2):
+                if 0 < start_index < len(frame_snapshots):
+                    result = hs.simulate_actions(actions, compiled_level, start_index=start_index,
+                                                 start_state=frame_snapshots[start_index], event_stepping=True)
+                    assert vars(result) == vars(expected), (path, actions, start_index)
+
+
+def test_event_stepping_on_streaming_level(level_files, genomes):
+    for path in level_files.values():
+        compiled_level = level.compile_level(hs.SCREEN_WIDTH, hs.SCREEN_HEIGHT, path)
+        streaming_level = StreamingLevel(hs.SCREEN_WIDTH, hs.SCREEN_HEIGHT, path, chunk_width=256, max_loaded_chunks=2)
+        for actions in genomes:
+            expected = hs.simulate_actions(actions, compiled_level, event_stepping=False)
+            result = hs.simulate_actions(actions, streaming_level, event_stepping=True)
+            assert vars(result) == vars(expected), (path, actions)
@@ -0,0 +1,55 @@
+import random
+
+from src.ai_game import main_ai
+from src.ai_game.fitness_pruning import SelectionCutoff
+from src.ai_game.headless_simulation import FALL_FITNESS, quantize_instructions
+
+
+def test_cutoff_is_the_keep_count_best_fitness():
+    cutoff = SelectionCutoff(3)
+    for fitness in (FALL_FITNESS, 100.0, FALL_FITNESS):
+        cutoff.add(fitness)
+    assert cutoff.cutoff() == FALL_FITNESS # Pali mozgovi su u bazenu roditelja, pa se ništa ne reže
+    cutoff.add(300.0)
+    cutoff.add(200.0)
+    assert cutoff.cutoff() == 100.0
+    cutoff.reset()
+    assert cutoff.cutoff() is None
+
+
+def _next_generations(monkeypatch, breed, fitness_pruning):
+    # Genomi svake nove generacije (elite i djeca) za isto sjeme
+    generations = []
+
+    def recording_breed(*args, **kwargs):
+        population = breed(*args, **kwargs)
+        generations.append([quantize_instructions(brain.instructions) for brain in population])
+        return population
+
+    monkeypatch.setattr(main_ai, "breed_next_generation", recording_breed)
+    random.seed(3)
+    main_ai.run_genetic_algorithm(worker_count=1, batch_simulation=False, checkpoint_interval=0, fitness_pruning=fitness_pruning,
+                                  level_filepaths=None, island_count=1, steady_state=False, headless=True,
+                                  replay_directory=None, legacy_brain_filepath=None, telemetry_filepath=None)
+    pruned = sum(stats["pruning"]["pruned"] for stats in main_ai.generation_stats if "pruning" in stats)
+    return generations, pruned
+
+
+def test_pruning_keeps_next_generation_identical(monkeypatch, tmp_path):
+    # Dugo tlo bez dohvatljivog cilja: većina mozgova preživi, pa granica selekcije postoji od prve generacije
+    level_filepath = tmp_path / "ground.txt"
+    level_filepath.write_text("300,500,20000\n30000,300,100\n")
+    monkeypatch.setattr(main_ai, "LEVEL_FILEPATH", str(level_filepath))
+    monkeypatch.setattr(main_ai, "SAVED_ARCHIVE_FILEPATH", str(tmp_path / "archive.genomes"))
+    monkeypatch.setattr(main_ai, "CHECKPOINT_FILEPATH", str(tmp_path / "checkpoint.pkl"))
+    monkeypatch.setattr(main_ai, "POPULATION_SIZE", 30)
+    monkeypatch.setattr(main_ai, "INSTRUCTION_COUNT", 40)
+    monkeypatch.setattr(main_ai, "ELITISM_COUNT", 4)
+    monkeypatch.setattr(main_ai, "NUM_GENERATIONS", 8)
+
+    breed = main_ai.breed_next_generation
+    expected, _ = _next_generations(monkeypatch, breed, fitness_pruning=False)
+    generations, pruned = _next_generations(monkeypatch, breed, fitness_pruning=True)
+    assert pruned > 0
+    assert len(expected) == main_ai.NUM_GENERATIONS
+    assert generations == expected
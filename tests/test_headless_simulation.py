@@ -0,0 +1,55 @@
+import pytest
+
+from src.ai_game import headless_simulation as hs
+from src.ai_game.ai_brain import AIAction, Brain
+from src.core import level
+
+# Headless simulacija mora dati isti ishod kao iscrtana petlja run_simulation_for_brain.
+
+EXITS = {hs.EXIT_WIN, hs.EXIT_FALL, hs.EXIT_INSTRUCTIONS, hs.EXIT_STAGNATION}
+
+
+def _compiled(path):
+    return level.load_level(hs.SCREEN_WIDTH, hs.SCREEN_HEIGHT, path)
+
+
+def _frame_stepped(actions, compiled_level, **kwargs):
+    return hs.simulate_actions(actions, compiled_level, event_stepping=False, **kwargs)
+
+
+def test_genomes_reach_every_exit_reason(level_files, genomes):
+    reasons = {_frame_stepped(actions, _compiled(path)).exit_reason for path in level_files.values() for actions in genomes}
+    assert EXITS <= reasons
+
+
+class _InstantClock:
+    # Iscrtana simulacija bez čekanja na 60 FPS
+    def tick(self, framerate=0):
+        return 0
+
+
+def _brain(actions):
+    brain = Brain(0, randomize_instructions=False)
+    brain.set_instructions([AIAction(is_jump, (frames + 0.5) / hs.MAX_ACTION_DURATION_FRAMES, x_direction)
+                            for is_jump, frames, x_direction in actions])
+    return brain
+
+
+def test_rendered_loop_matches_headless_simulation(level_files, genomes, monkeypatch):
+    pygame = pytest.importorskip("pygame")
+    from src.ai_game import game_simulation
+    monkeypatch.setattr(pygame.time, "Clock", _InstantClock)
+
+    reasons = set()
+    for name in ("shipped", "easy", "long_ground", "head_bump", "random_0"):
+        compiled_level = _compiled(level_files[name])
+        for actions in genomes[:10]:
+            brain = _brain(actions)
+            assert hs.quantize_instructions(brain.instructions) == actions
+            expected = _frame_stepped(actions, compiled_level)
+            reasons.add(expected.exit_reason)
+            fitness = game_simulation.run_simulation_for_brain(brain, level_files[name], render=True)
+            assert fitness == hs.compute_fitness(expected, len(actions)), (name, actions)
+            assert brain.won == expected.won
+            assert brain.current_instruction_number == expected.instructions_used
+    assert EXITS <= reasons
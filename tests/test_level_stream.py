@@ -0,0 +1,67 @@
+import random
+
+import pytest
+
+from src.ai_game import headless_simulation as hs
+from src.core import level
+from src.core.level_stream import StreamingLevel
+
+
+def _streaming(path):
+    # Mali chunkovi i malo memorije, da se chunkovi tijekom simulacije učitavaju i izbacuju
+    return StreamingLevel(hs.SCREEN_WIDTH, hs.SCREEN_HEIGHT, path, chunk_width=256, max_loaded_chunks=2)
+
+
+def test_streaming_level_matches_compiled_level(level_files, genomes):
+    for path in level_files.values():
+        compiled_level = level.compile_level(hs.SCREEN_WIDTH, hs.SCREEN_HEIGHT, path)
+        streaming_level = _streaming(path)
+        assert streaming_level.goal == compiled_level.goal
+        for actions in genomes:
+            expected_trace, trace = [], []
+            expected = hs.simulate_actions(actions, compiled_level, trace=expected_trace, event_stepping=False)
+            result = hs.simulate_actions(actions, streaming_level, trace=trace, event_stepping=False)
+            assert vars(result) == vars(expected), (path, actions)
+            assert trace == expected_trace
+
+
+def test_streaming_queries_return_the_same_platforms(level_files):
+    rng = random.Random(11)
+    for path in level_files.values():
+        compiled_level = level.compile_level(hs.SCREEN_WIDTH, hs.SCREEN_HEIGHT, path)
+        streaming_level = _streaming(path)
+        for _ in range(300):
+            left = rng.uniform(-500, 12000)
+            right = left + rng.uniform(0, 1500)
+
+            def overlapping(candidate_level):
+                # Indeksi su samo kandidati, pa se uspoređuju platforme koje stvarno prekrivaju raspon
+                boxes = candidate_level.collision_boxes
+                return sorted(box for box in (boxes[key] for key in candidate_level.platform_index.query(left, right))
+                              if box[0] < right and left < box[0] + box[2])
+
+            assert overlapping(streaming_level) == overlapping(compiled_level), (path, left, right)
+
+
+def test_platform_views_agree_on_length_and_iteration(level_files):
+    from src.core.platforms import _StreamedPlatformRects
+    streaming_level = _streaming(level_files["random_0"])
+    streaming_level.platform_index.query(0, 3000)
+    for view in (streaming_level.platforms, streaming_level.collision_boxes, _StreamedPlatformRects(streaming_level)):
+        assert len(list(view)) == len(view)
+    rects = _StreamedPlatformRects(streaming_level)
+    assert [rects[idx] for idx in range(len(rects))] == list(rects)
+
+
+def test_platform_behind_served_range_is_an_error(tmp_path):
+    from src.core.level_stream import UnsortedLevelError
+    lines = [f"{x},450,100" for x in range(400, 400 + 300 * 200, 200)]
+    lines.append("1000,300,100") # Daleko lijevo od prethodnih platformi, iza već posluženih upita
+    path = tmp_path / "unsorted.txt"
+    path.write_text("\n".join(lines) + "\n")
+    streaming_level = _streaming(str(path))
+    streaming_level.platform_index.query(0, 1500)
+    with pytest.raises(UnsortedLevelError):
+        streaming_level.platform_index.query(59000, 60500)
+    with pytest.raises(UnsortedLevelError):
+        streaming_level.platform_index.query(59000, 60500)
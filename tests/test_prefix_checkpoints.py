@@ -0,0 +1,16 @@
+from src.ai_game import headless_simulation as hs
+from src.core import level
+
+
+def test_resume_from_snapshot_matches_full_run(level_files, genomes):
+    for path in level_files.values():
+        compiled_level = level.load_level(hs.SCREEN_WIDTH, hs.SCREEN_HEIGHT, path)
+        for actions in genomes:
+            snapshots = []
+            expected = hs.simulate_actions(actions, compiled_level, snapshots=snapshots, event_stepping=False)
+            for start_index in (1, len(snapshots) // 2, len(snapshots) - 1):
+                if not 0 < start_index < len(snapshots):
+                    continue
+                result = hs.simulate_actions(actions, compiled_level, start_index=start_index,
+                                             start_state=snapshots[start_index], event_stepping=False)
+                assert vars(result) == vars(expected), (path, actions, start_index)
@@ -0,0 +1,16 @@
+import pytest
+
+from src.ai_game import main_ai
+from src.ai_game import train
+
+
+@pytest.mark.parametrize("kwargs", [{"island_count": 2}, {"steady_state": True}])
+def test_resume_is_refused_for_islands_and_steady_state(kwargs):
+    with pytest.raises(ValueError):
+        main_ai.run_genetic_algorithm(resume=True, headless=True, legacy_brain_filepath=None, **kwargs)
+
+
+@pytest.mark.parametrize("argv", [["--resume", "--islands", "2"], ["--resume", "--steady-state"]])
+def test_train_refuses_resume_for_islands_and_steady_state(argv):
+    with pytest.raises(SystemExit):
+        train.main(argv)